@@ -0,0 +1,68 @@
+"""
+Benchmark de Validación de Cadenas de Certificados
+==================================================
+
+Valida N certificados de firmantes emitidos por una misma CA intermedia
+(raíz RSA → intermedia RSA → firmantes Ed25519) con y sin la caché de
+rutas de confianza de CertificateChainValidator:
+- N firmantes distintos: con caché solo se verifica el último eslabón
+- Un mismo firmante N veces (caso típico: muchas firmas de pocos firmantes)
+
+Ejecutar:
+    python bench_chain.py          # 2000 certificados
+    python bench_chain.py 20000
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from certificate_chain import CertificateChainValidator
+from key_manager import KeyManager
+from utils import print_table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    temp_dir = tempfile.mkdtemp()
+    key_manager = KeyManager(keys_directory=temp_dir)
+    
+    # Los mensajes de KeyManager no interesan aquí
+    with contextlib.redirect_stdout(io.StringIO()):
+        root_key, _ = key_manager.generate_key_pair(2048)
+        root = key_manager.create_certificate(root_key, {"name": "Raíz"}, ca=True)
+        inter_key, inter_public = key_manager.generate_key_pair(2048)
+        intermediate = key_manager.issue_certificate(root_key, root, inter_public,
+                                                     {"name": "Intermedia"}, ca=True)
+        leaves = []
+        for i in range(count):
+            _, public_key = key_manager.generate_key_pair(scheme="ed25519")
+            leaves.append(key_manager.issue_certificate(inter_key, intermediate, public_key,
+                                                        {"name": f"Firmante {i}"}))
+    
+    shutil.rmtree(temp_dir)
+    
+    rows = []
+    for workload, certificates in (("Firmantes distintos", leaves),
+                                   ("Mismo firmante", [leaves[0]] * count)):
+        for label, ttl in (("sin caché", 0), ("con caché", 300)):
+            validator = CertificateChainValidator([root], [intermediate], cache_ttl=ttl)
+            start = time.perf_counter()
+            valid = sum(1 for leaf in certificates if validator.validate(leaf)[0])
+            elapsed = time.perf_counter() - start
+            rows.append([f"{workload}, {label}", f"{valid}/{count}",
+                         f"{elapsed * 1000:.1f} ms", f"{count / elapsed:,.0f}/s"])
+    
+    print(f"\nValidación de {count} cadenas raíz → intermedia → firmante\n")
+    print_table(["Caso", "Válidas", "Tiempo", "Certificados/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
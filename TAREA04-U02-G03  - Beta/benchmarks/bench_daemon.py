@@ -0,0 +1,137 @@
+"""
+Prueba de Carga del Demonio de Firma
+====================================
+
+Lanza varios clientes concurrentes contra el demonio de firma y mide:
+- Peticiones por segundo
+- Latencia por petición (p50, p90, p99 y máxima)
+- Tamaño medio de lote formado por el demonio
+
+Por defecto arranca un demonio en este mismo proceso con una clave nueva,
+escuchando en un socket Unix temporal. Con --port o --unix-socket se mide
+un demonio ya en marcha (más realista: clientes y demonio no comparten el GIL).
+
+Ejecutar:
+    python bench_daemon.py
+    python bench_daemon.py --clients 16 --requests 500 --op verify --scheme rsa-pss
+    python bench_daemon.py --port 8765 --token-file ../src/keys/daemon.token --key juan
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from typing import List
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from signing_client import SigningClient
+from utils import print_table
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil de una lista ordenada (método del rango más cercano)."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_client(connect: dict, args, payload: bytes, latencies: List[float],
+               errors: List[str]) -> None:
+    """Un cliente: envía sus peticiones (de pipeline en pipeline) y anota las latencias."""
+    with SigningClient(**connect) as client:
+        signature = client.sign(data=payload, key=args.key) if args.op == "verify" else None
+        request = dict(SigningClient._document(payload, None, args.key), op=args.op)
+        if signature is not None:
+            request["signature"] = signature
+        
+        for start_index in range(0, args.requests, args.pipeline):
+            count = min(args.pipeline, args.requests - start_index)
+            start = time.perf_counter()
+            results = client.request_many([request] * count, raise_errors=False)
+            elapsed = time.perf_counter() - start
+            # En un pipeline todas las respuestas llegan dentro del mismo intervalo
+            latencies.extend([elapsed] * count)
+            errors.extend(str(r) for r in results if isinstance(r, Exception))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del demonio de firma")
+    parser.add_argument("--clients", type=int, default=8, help="Clientes concurrentes")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por cliente")
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="Peticiones enviadas juntas por cada cliente")
+    parser.add_argument("--op", choices=("sign", "verify"), default="sign")
+    parser.add_argument("--size", type=int, default=1024, help="Tamaño del documento en bytes")
+    parser.add_argument("--scheme", default="ed25519",
+                        help="Esquema de la clave del demonio en proceso")
+    parser.add_argument("--port", type=int, help="Puerto de un demonio ya en marcha")
+    parser.add_argument("--unix-socket", help="Socket Unix de un demonio ya en marcha")
+    parser.add_argument("--token-file",
+                        help="Token de acceso de un demonio en TCP (por defecto, "
+                             "la variable FIRMA_DAEMON_TOKEN)")
+    parser.add_argument("--key", default=None, help="Clave del demonio a usar")
+    args = parser.parse_args()
+    
+    daemon = None
+    socket_dir = None
+    if args.port:
+        connect = {"port": args.port}
+        if args.token_file:
+            with open(args.token_file) as f:
+                connect["token"] = f.read().strip()
+    elif args.unix_socket:
+        connect = {"unix_socket": args.unix_socket}
+    else:
+        from signature_schemes import get_scheme
+        from signing_daemon import SigningDaemon
+        
+        socket_dir = tempfile.mkdtemp()
+        daemon = SigningDaemon(unix_socket=os.path.join(socket_dir, "bench.sock"))
+        daemon.add_key("bench", get_scheme(args.scheme).generate_private_key())
+        daemon.start_background()
+        connect = {"unix_socket": daemon.unix_socket}
+        args.key = "bench"
+    
+    payload = os.urandom(args.size)
+    latencies: List[float] = []
+    errors: List[str] = []
+    threads = [threading.Thread(target=run_client, args=(connect, args, payload, latencies, errors))
+               for _ in range(args.clients)]
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    with SigningClient(**connect) as client:
+        stats = client.stats()
+    if daemon is not None:
+        daemon.stop_background()
+        shutil.rmtree(socket_dir)
+    
+    latencies.sort()
+    total = len(latencies)
+    print(f"\nPrueba de carga: {args.clients} clientes x {args.requests} peticiones "
+          f"'{args.op}' de {args.size} bytes (pipeline {args.pipeline})\n")
+    print_table(
+        ["Peticiones/s", "p50", "p90", "p99", "Máx", "Lote medio", "Errores"],
+        [[f"{total / elapsed:,.0f}",
+          f"{percentile(latencies, 0.50) * 1000:.2f} ms",
+          f"{percentile(latencies, 0.90) * 1000:.2f} ms",
+          f"{percentile(latencies, 0.99) * 1000:.2f} ms",
+          f"{latencies[-1] * 1000:.2f} ms",
+          f"{stats['tamano_medio_lote']:.1f}",
+          str(len(errors))]]
+    )
+    if errors:
+        print(f"\nPrimer error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark de Algoritmos de Hash para Firmar
+===========================================
+
+Mide el rendimiento de los algoritmos del registro (SHA-256, SHA-512,
+BLAKE2b) en este equipo y recomienda el más rápido para el parámetro
+`digest` de DigitalSignature.sign_document / sign_many.
+
+Ejecutar:
+    python bench_digests.py          # muestra de 64 MB
+    python bench_digests.py 256      # tamaño de muestra en MB
+"""
+
+import os
+import sys
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from digest_registry import get_digest, measure_digests
+from utils import format_bytes, print_table
+
+
+def main():
+    sample_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    throughput = measure_digests(sample_size=sample_mb * 1024 * 1024)
+    baseline = throughput["sha256"]
+    
+    rows = []
+    for name, rate in sorted(throughput.items(), key=lambda item: -item[1]):
+        rows.append([
+            get_digest(name).label,
+            name,
+            f"{format_bytes(rate)}/s",
+            f"{rate / baseline:.2f}x"
+        ])
+    
+    print(f"\nBenchmark de algoritmos de hash ({sample_mb} MB)\n")
+    print_table(["Algoritmo", "digest=", "Rendimiento", "vs SHA-256"], rows)
+    
+    fastest = max(throughput, key=throughput.get)
+    print(f"\nRecomendado para este equipo: digest=\"{fastest}\"")
+
+
+if __name__ == "__main__":
+    main()
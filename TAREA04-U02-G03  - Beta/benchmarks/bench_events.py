@@ -0,0 +1,85 @@
+"""
+Benchmark de los Eventos de Progreso
+====================================
+
+Compara el coste por mensaje de:
+- print() a /dev/null (lo que hacían los módulos de firma antes)
+- emit() sin oyentes (uso como biblioteca)
+- emit() con console_listener (main.py, demo.py) escribiendo a /dev/null
+
+y el coste total de calculate_hash + sign_document de un documento
+pequeño, donde los mensajes eran una parte apreciable del tiempo.
+
+Ejecutar:
+    python bench_events.py             # 200000 mensajes
+    python bench_events.py 1000000
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from events import console_listener, emit, listening
+from digital_signature import DigitalSignature
+from key_manager import KeyManager
+from utils import print_table
+
+
+def per_call(function, count: int) -> float:
+    """Tiempo medio (s) de una llamada."""
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    document_hash = os.urandom(32).hex()
+    path = "documentos/contrato.pdf"
+    
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        print_cost = per_call(lambda: print(f"✓ Hash calculado: {document_hash[:16]}..."), count)
+        with listening(console_listener):
+            console_cost = per_call(lambda: emit("hash.calculated", path=path, hash=document_hash,
+                                                 algorithm="sha256"), count)
+    silent_cost = per_call(lambda: emit("hash.calculated", path=path, hash=document_hash,
+                                        algorithm="sha256"), count)
+    
+    print(f"\nCoste por mensaje ({count:,} mensajes)\n")
+    print_table(["Salida", "Por mensaje"],
+                [["print() a /dev/null", f"{print_cost * 1e9:.0f} ns"],
+                 ["emit() con console_listener", f"{console_cost * 1e9:.0f} ns"],
+                 ["emit() sin oyentes", f"{silent_cost * 1e9:.0f} ns"]])
+    
+    # Firma de un documento pequeño: con mensajes en consola y sin oyentes
+    temp_dir = tempfile.mkdtemp()
+    document = os.path.join(temp_dir, "doc.txt")
+    with open(document, "w") as f:
+        f.write("Documento pequeño")
+    private_key, _ = KeyManager(keys_directory=temp_dir).generate_key_pair(scheme="ed25519")
+    signature_manager = DigitalSignature(signatures_directory=temp_dir)
+    documents = 2000
+    
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with listening(console_listener):
+            console_sign = per_call(lambda: signature_manager.sign_document(document, private_key),
+                                    documents)
+    silent_sign = per_call(lambda: signature_manager.sign_document(document, private_key),
+                           documents)
+    shutil.rmtree(temp_dir)
+    
+    print(f"\nsign_document() de un documento pequeño (Ed25519, {documents} firmas)\n")
+    print_table(["Salida", "Por firma"],
+                [["console_listener a /dev/null", f"{console_sign * 1e6:.1f} µs"],
+                 ["Sin oyentes", f"{silent_sign * 1e6:.1f} µs"]])
+
+
+if __name__ == "__main__":
+    main()
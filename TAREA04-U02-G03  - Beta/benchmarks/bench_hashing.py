@@ -0,0 +1,86 @@
+"""
+Benchmark de Backends de Hash
+=============================
+
+Compara el bucle original de calculate_hash (f.read de 64KB) con los
+backends mmap y readinto del módulo hashing, y con el modo por bloques
+(árbol de Merkle hasheado en paralelo). El modo por bloques produce una
+raíz de Merkle, no el SHA-256 del archivo, por lo que no se compara su valor.
+
+Ejecutar:
+    python bench_hashing.py            # archivos de 1 MB, 64 MB y 512 MB
+    python bench_hashing.py 10 100     # tamaños personalizados en MB
+"""
+
+import os
+import sys
+import time
+import hashlib
+import tempfile
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from hashing import hash_file
+from merkle import chunk_hashes, merkle_root
+from utils import format_bytes, print_table
+
+
+def legacy_hash(file_path: str) -> str:
+    """Bucle original de calculate_hash: un objeto bytes nuevo por bloque."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(65536), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def best_time(func, file_path: str, repeat: int = 3) -> float:
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(file_path)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    sizes_mb = [int(arg) for arg in sys.argv[1:]] or [1, 64, 512]
+    candidates = [
+        ("read 64KB (original)", legacy_hash),
+        ("readinto", lambda path: hash_file(path, backend="readinto")),
+        ("mmap", lambda path: hash_file(path, backend="mmap")),
+        ("auto", hash_file),
+        (f"merkle 4MB ({os.cpu_count()} hilos)",
+         lambda path: merkle_root(chunk_hashes(path)[0])),
+    ]
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size_mb in sizes_mb:
+            file_path = os.path.join(temp_dir, f"bench_{size_mb}MB.bin")
+            with open(file_path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+            
+            expected = legacy_hash(file_path)
+            size = os.path.getsize(file_path)
+            
+            for name, func in candidates:
+                if not name.startswith("merkle"):
+                    assert func(file_path) == expected, f"{name} produjo un hash distinto"
+                elapsed = best_time(func, file_path)
+                rows.append([
+                    format_bytes(size),
+                    name,
+                    f"{elapsed * 1000:.1f} ms",
+                    f"{format_bytes(size / elapsed)}/s"
+                ])
+    
+    print("\nBenchmark de cálculo de hash SHA-256\n")
+    print_table(["Tamaño", "Backend", "Tiempo", "Rendimiento"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark del Tiempo de Arranque
+================================
+
+Mide, con `python -X importtime`, cuánto cuesta importar cada módulo de
+src/ en un proceso nuevo y si arrastra cryptography o cryptography.x509,
+además del tiempo total de comandos cortos de main.py.
+
+Los módulos de metadatos (formatos de firma, contenedor, registro) no
+deben importar cryptography, y el CLI y el verificador no deben importar
+cryptography.x509 hasta que se usa un certificado. Con --check, el
+script termina con código 1 si alguna de estas reglas deja de cumplirse
+(útil en CI para que no vuelvan las importaciones pesadas).
+
+Ejecutar:
+    python bench_import.py
+    python bench_import.py --repeat 10 --check
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC_DIR)
+
+from utils import print_table
+
+MODULES = ("signature_format", "signature_container", "signature_log", "signature_schemes",
+           "digital_signature", "verification", "cli", "key_manager", "main")
+
+# Módulos que no deben importar cryptography en absoluto
+NO_CRYPTOGRAPHY = ("digest_registry", "signature_format", "signature_container",
+                   "signature_log", "signature_schemes", "signing_client", "cli")
+
+# Módulos que no deben importar cryptography.x509 (solo se carga al usar certificados)
+NO_X509 = ("digital_signature", "verification", "trust_store", "revocation", "main")
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def import_profile(statement: str) -> tuple:
+    """Ejecuta una sentencia en un proceso nuevo y devuelve (µs totales, módulos importados)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            total += int(match.group(1))
+            modules.add(match.group(3))
+    return total, modules
+
+
+def best_profile(statement: str, repeat: int) -> tuple:
+    """Mejor tiempo de importación de varias ejecuciones."""
+    runs = [import_profile(statement) for _ in range(repeat)]
+    return min(total for total, _ in runs), runs[0][1]
+
+
+def command_time(argv: list, repeat: int) -> float:
+    """Mejor tiempo total (s) de un comando de main.py en un proceso nuevo."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, "main.py")] + argv,
+                       capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación de los módulos de src/")
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por medición")
+    parser.add_argument("--check", action="store_true",
+                        help="Terminar con código 1 si un módulo importa dependencias pesadas")
+    args = parser.parse_args()
+    
+    baseline, _ = best_profile("pass", args.repeat)
+    rows = []
+    for module in MODULES:
+        total, modules = best_profile(f"import {module}", args.repeat)
+        rows.append([module, f"{(total - baseline) / 1000:.1f} ms",
+                     "sí" if "cryptography" in modules else "no",
+                     "sí" if "cryptography.x509" in modules else "no"])
+    
+    print(f"\nImportación en un proceso nuevo (sin el arranque de Python, {baseline / 1000:.1f} ms)\n")
+    print_table(["Módulo", "Importación", "cryptography", "x509"], rows)
+    
+    # Un comando corto completo: inspeccionar una firma (no necesita criptografía)
+    temp_dir = tempfile.mkdtemp()
+    signature_path = os.path.join(temp_dir, "doc_signature.json")
+    with open(signature_path, "w") as f:
+        json.dump({"document_name": "doc.txt", "document_hash": "00" * 32, "signature": "",
+                   "timestamp": "2025-11-01T10:00:00", "algorithm": "RSA-PSS with SHA-256",
+                   "key_size": 2048, "format_version": 2}, f)
+    commands = [["--help"], ["inspect", signature_path, "--format", "json"]]
+    print()
+    print_table(["Comando", "Tiempo total"],
+                [["main.py " + " ".join(argv[:1]), f"{command_time(argv, args.repeat) * 1000:.0f} ms"]
+                 for argv in commands])
+    shutil.rmtree(temp_dir)
+    
+    if args.check:
+        failures = []
+        for module in NO_CRYPTOGRAPHY:
+            if "cryptography" in import_profile(f"import {module}")[1]:
+                failures.append(f"{module} importa cryptography")
+        for module in NO_X509:
+            if "cryptography.x509" in import_profile(f"import {module}")[1]:
+                failures.append(f"{module} importa cryptography.x509")
+        for failure in failures:
+            print(f"✗ {failure}")
+        if failures:
+            sys.exit(1)
+        print("\n✓ Sin importaciones pesadas en los módulos de arranque rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark del Coste de las Métricas
+===================================
+
+Mide cuánto añade una medición (histogram.time() o observe) y lo compara
+con las operaciones que se miden: una firma Ed25519/RSA y el hash de un
+documento pequeño. Al final muestra el resumen de las métricas de la
+ejecución, como lo exportaría --metrics.
+
+Ejecutar:
+    python bench_metrics.py             # 200000 mediciones
+    python bench_metrics.py 1000000
+"""
+
+import os
+import sys
+import time
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from digital_signature import _sign_hash
+from metrics import REGISTRY, MetricsRegistry
+from signature_schemes import get_scheme
+from utils import print_table
+
+
+def per_call(function, count: int) -> float:
+    """Tiempo medio (s) de una llamada."""
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    histogram = MetricsRegistry().histogram("bench_seconds", "Benchmark")
+    
+    def timed():
+        with histogram.time():
+            pass
+    
+    span_cost = per_call(timed, count) - per_call(lambda: None, count)
+    observe_cost = per_call(lambda: histogram.observe(0.001), count)
+    
+    document_hash = os.urandom(32).hex()
+    rows = [["histogram.time() (bloque vacío)", f"{span_cost * 1e9:.0f} ns", "-"],
+            ["histogram.observe()", f"{observe_cost * 1e9:.0f} ns", "-"]]
+    for name, runs in (("ed25519", 5000), ("rsa-pss", 500)):
+        scheme = get_scheme(name)
+        private_key = scheme.generate_private_key()
+        # _sign_hash registra cada firma en firma_sign_seconds
+        sign_cost = per_call(lambda: _sign_hash(private_key, document_hash), runs)
+        rows.append([f"Firma {scheme.label}", f"{sign_cost * 1e6:.1f} µs",
+                     f"{span_cost / sign_cost:.2%}"])
+    
+    print(f"\nCoste de una medición ({count:,} mediciones)\n")
+    print_table(["Operación", "Tiempo", "Coste de medirla"], rows)
+    
+    sign = REGISTRY.get("firma_sign_seconds")
+    print(f"\nfirma_sign_seconds en esta ejecución: {sign.count} firmas, "
+          f"p50 ≤ {sign.quantile(0.5) * 1e3:g} ms, p99 ≤ {sign.quantile(0.99) * 1e3:g} ms")
+
+
+if __name__ == "__main__":
+    main()
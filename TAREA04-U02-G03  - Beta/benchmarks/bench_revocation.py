@@ -0,0 +1,95 @@
+"""
+Benchmark de Comprobación de Revocación
+=======================================
+
+Genera una CRL con N números de serie revocados (aleatorios, de 20 bytes
+como los de x509.random_serial_number) y compara:
+- Buscar en la CRL ya parseada (get_revoked_certificate_by_serial_number)
+- Buscar en RevocationIndex (búsqueda binaria sobre el bloque ordenado)
+
+También muestra el tiempo de carga del índice y la memoria que ocupa.
+
+Ejecutar:
+    python bench_revocation.py            # 100000 series
+    python bench_revocation.py 1000000    # la generación de la CRL tarda
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from key_manager import KeyManager
+from revocation import RevocationIndex, load_crl
+from utils import print_table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lookups = 20_000
+    # La búsqueda en la CRL parseada es lineal: se mide con menos consultas
+    crl_lookups = 200
+    temp_dir = tempfile.mkdtemp()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        key_manager = KeyManager(keys_directory=temp_dir)
+        ca_key, _ = key_manager.generate_key_pair(scheme="ecdsa-p256")
+        ca = key_manager.create_certificate(ca_key, {"name": "CA"}, ca=True)
+    
+    print(f"Generando CRL con {count:,} series revocadas...")
+    serials = [x509.random_serial_number() for _ in range(count)]
+    now = datetime.now(timezone.utc)
+    builder = (x509.CertificateRevocationListBuilder().issuer_name(ca.subject)
+               .last_update(now).next_update(now + timedelta(days=7)))
+    for serial in serials:
+        builder = builder.add_revoked_certificate(
+            x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(now).build()
+        )
+    crl_path = os.path.join(temp_dir, "ca.crl")
+    with open(crl_path, "wb") as f:
+        f.write(builder.sign(ca_key, hashes.SHA256()).public_bytes(serialization.Encoding.DER))
+    
+    # Mitad revocadas, mitad no
+    queries = random.sample(serials, lookups // 2) + \
+        [x509.random_serial_number() for _ in range(lookups // 2)]
+    random.shuffle(queries)
+    
+    start = time.perf_counter()
+    crl = load_crl(crl_path)
+    crl_load = time.perf_counter() - start
+    start = time.perf_counter()
+    crl_hits = sum(1 for s in queries[:crl_lookups]
+                   if crl.get_revoked_certificate_by_serial_number(s) is not None)
+    crl_lookup = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    index = RevocationIndex(crl_path, issuers=[ca], check_interval=60)
+    index_load = time.perf_counter() - start
+    start = time.perf_counter()
+    index_hits = [index.is_serial_revoked(s) for s in queries]
+    index_lookup = time.perf_counter() - start
+    
+    shutil.rmtree(temp_dir)
+    assert crl_hits == sum(index_hits[:crl_lookups])
+    
+    print(f"\nRevocación: {count:,} series en la CRL\n")
+    print_table(
+        ["Método", "Carga", "Consultas/s", "Memoria del índice"],
+        [["CRL parseada", f"{crl_load * 1000:.0f} ms", f"{crl_lookups / crl_lookup:,.0f}", "-"],
+         ["RevocationIndex", f"{index_load * 1000:.0f} ms", f"{lookups / index_lookup:,.0f}",
+          f"{index.stats()['bytes'] / 1024 / 1024:.1f} MB"]]
+    )
+
+
+if __name__ == "__main__":
+    main()
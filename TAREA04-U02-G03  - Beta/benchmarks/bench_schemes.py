@@ -0,0 +1,73 @@
+"""
+Benchmark de Esquemas de Firma
+==============================
+
+Compara RSA-PSS (2048 bits), ECDSA P-256 y Ed25519 en:
+- Generación de claves
+- Firmas por segundo (del digest SHA-256 de un documento)
+- Verificaciones por segundo
+- Tamaño de la firma
+
+Ejecutar:
+    python bench_schemes.py          # 200 operaciones por esquema
+    python bench_schemes.py 1000
+"""
+
+import os
+import sys
+import time
+import hashlib
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from signature_format import CURRENT_FORMAT_VERSION
+from signature_schemes import SIGNATURE_SCHEMES
+from utils import print_table
+
+
+def ops_per_second(func, iterations: int) -> float:
+    """Ejecuta una operación varias veces y devuelve las operaciones por segundo."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed > 0 else float("inf")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    document_hash = hashlib.sha256(os.urandom(1024)).hexdigest()
+    version = CURRENT_FORMAT_VERSION
+    
+    rows = []
+    for scheme in SIGNATURE_SCHEMES.values():
+        keygen_runs = 5 if scheme.name == "rsa-pss" else iterations
+        start = time.perf_counter()
+        for _ in range(keygen_runs):
+            private_key = scheme.generate_private_key()
+        keygen_ms = (time.perf_counter() - start) / keygen_runs * 1000
+        public_key = private_key.public_key()
+        
+        signature = scheme.sign(private_key, document_hash, version)
+        sign_rate = ops_per_second(
+            lambda: scheme.sign(private_key, document_hash, version), iterations
+        )
+        verify_rate = ops_per_second(
+            lambda: scheme.verify(public_key, signature, document_hash, version), iterations
+        )
+        
+        rows.append([
+            scheme.label,
+            f"{keygen_ms:.2f} ms",
+            f"{sign_rate:,.0f}/s",
+            f"{verify_rate:,.0f}/s",
+            f"{len(signature)} B"
+        ])
+    
+    print(f"\nBenchmark de esquemas de firma ({iterations} operaciones)\n")
+    print_table(["Esquema", "Generar clave", "Firmas", "Verificaciones", "Firma"], rows)
+
+
+if __name__ == "__main__":
+    main()
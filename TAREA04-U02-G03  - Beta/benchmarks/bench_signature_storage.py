@@ -0,0 +1,97 @@
+"""
+Benchmark de Formatos de Almacenamiento de Firmas
+=================================================
+
+Compara el JSON original (indent=4, firma en hexadecimal) con el
+contenedor binario compacto (.sig): velocidad de guardado y carga,
+y tamaño en disco.
+
+Ejecutar:
+    python bench_signature_storage.py          # 2000 firmas
+    python bench_signature_storage.py 10000
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from key_manager import KeyManager
+from digital_signature import DigitalSignature
+from signature_container import read_signature_file, write_signature_file
+from utils import format_bytes, print_table
+
+
+def make_records(count: int, format_version: int):
+    """Genera `count` firmas reales que solo difieren en el nombre del documento."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        key_manager = KeyManager(keys_directory=temp_dir)
+        private_key, _ = key_manager.generate_key_pair()
+        certificate = key_manager.create_certificate(private_key, {"name": "Benchmark"})
+        
+        doc_path = os.path.join(temp_dir, "documento.txt")
+        with open(doc_path, "w") as f:
+            f.write("Documento de benchmark")
+        
+        manager = DigitalSignature(signatures_directory=temp_dir)
+        base = manager.sign_document(doc_path, private_key, certificate,
+                                     format_version=format_version)
+    
+    return [dict(base, document_name=f"documento_{i}.txt") for i in range(count)]
+
+
+def disk_usage(paths):
+    """Suma el espacio ocupado en disco (bloques asignados si están disponibles)."""
+    total = 0
+    for path in paths:
+        st = os.stat(path)
+        total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+    return total
+
+
+def bench(records, extension: str):
+    """Guarda y carga todas las firmas con la extensión indicada."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = [os.path.join(temp_dir, f"firma_{i}{extension}") for i in range(len(records))]
+        
+        start = time.perf_counter()
+        for record, path in zip(records, paths):
+            write_signature_file(record, path)
+        save_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for path in paths:
+            read_signature_file(path)
+        load_time = time.perf_counter() - start
+        
+        size = sum(os.path.getsize(path) for path in paths)
+        return save_time, load_time, size, disk_usage(paths)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    
+    rows = []
+    for version in (1, 2):
+        records = make_records(count, version)
+        for name, extension in (("JSON", ".json"), ("binario", ".sig")):
+            save_time, load_time, size, usage = bench(records, extension)
+            rows.append([
+                f"v{version}",
+                name,
+                f"{count / save_time:,.0f} firmas/s",
+                f"{count / load_time:,.0f} firmas/s",
+                f"{size / count:.0f} B",
+                format_bytes(usage)
+            ])
+    
+    print(f"\nBenchmark de almacenamiento de {count} firmas\n")
+    print_table(["Formato firma", "Archivo", "Guardado", "Carga",
+                 "Tamaño medio", "Espacio en disco"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark del Almacén de Confianza
+==================================
+
+Verifica (modo metadata_only) N firmas de K firmantes distintos Ed25519:
+- Cargando la clave pública desde su PEM para cada firma (lo que hacía
+  falta antes para verificar en lote firmas de varios firmantes)
+- Resolviendo la clave en un TrustStore por la huella guardada en la firma
+
+Ejecutar:
+    python bench_trust_store.py             # 5000 firmas de 50 firmantes
+    python bench_trust_store.py 20000 200
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+
+# Añadir src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cryptography.hazmat.primitives import serialization
+from digital_signature import DigitalSignature
+from key_manager import KeyManager
+from trust_store import TrustStore
+from verification import SignatureVerifier
+from utils import print_table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    signers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    temp_dir = tempfile.mkdtemp()
+    key_manager = KeyManager(keys_directory=temp_dir)
+    signature_manager = DigitalSignature(signatures_directory=temp_dir)
+    
+    # Los mensajes de firma no interesan aquí
+    with contextlib.redirect_stdout(io.StringIO()):
+        keys = []
+        for i in range(signers):
+            private_key, public_key = key_manager.generate_key_pair(scheme="ed25519")
+            keys.append((private_key, key_manager.save_public_key(public_key, f"firmante{i}")))
+        items = []
+        for i in range(count):
+            private_key, public_path = keys[i % signers]
+            signature = signature_manager.sign_digest(f"doc{i}.txt", os.urandom(32).hex(),
+                                                      private_key)
+            items.append((signature, public_path))
+    
+    verifier = SignatureVerifier()
+    start = time.perf_counter()
+    valid_pem = 0
+    for signature, public_path in items:
+        with open(public_path, "rb") as f:
+            public_key = serialization.load_pem_public_key(f.read())
+        valid_pem += verifier._check_signature(signature["document_hash"], signature, public_key)[0]
+    pem_elapsed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    store = TrustStore.from_directory(temp_dir)
+    load_elapsed = time.perf_counter() - start
+    verifier = SignatureVerifier(trust_store=store)
+    start = time.perf_counter()
+    valid_store = sum(verifier._check_signature(signature["document_hash"], signature, None)[0]
+                      for signature, _ in items)
+    store_elapsed = time.perf_counter() - start
+    
+    shutil.rmtree(temp_dir)
+    
+    print(f"\nVerificación de {count} firmas de {signers} firmantes (solo metadatos)\n")
+    print_table(
+        ["Clave del firmante", "Válidas", "Carga inicial", "Tiempo", "Firmas/s"],
+        [["PEM por firma", f"{valid_pem}/{count}", "-",
+          f"{pem_elapsed * 1000:.1f} ms", f"{count / pem_elapsed:,.0f}"],
+         ["TrustStore (huella)", f"{valid_store}/{count}", f"{load_elapsed * 1000:.1f} ms",
+          f"{store_elapsed * 1000:.1f} ms", f"{count / store_elapsed:,.0f}"]]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,55 @@ Este paquete implementa un sistema completo de firma digital que permite:
 - Verificar la autenticidad e integridad de documentos firmados
 - Gestionar certificados digitales
 
+Las clases principales se importan bajo demanda (PEP 562): `import src`
+no carga cryptography; `src.KeyManager` importa key_manager la primera
+vez que se usa.
+
 Autor: Grupo 3
 Fecha: Noviembre 2025
 """
 
+import os
+import sys
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Grupo 3"
+
+# Atributo público → módulo que lo define
+_LAZY_ATTRIBUTES = {
+    "KeyManager": "key_manager",
+    "DigitalSignature": "digital_signature",
+    "SignatureVerifier": "verification",
+    "TrustStore": "trust_store",
+    "CertificateChainValidator": "certificate_chain",
+    "RevocationIndex": "revocation",
+    "SignatureLog": "signature_log",
+    "SignatureCatalog": "signature_catalog",
+    "HashCache": "hash_cache",
+    "AsyncSignatureService": "async_service",
+    "SigningClient": "signing_client",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    """Importa el módulo de un atributo público la primera vez que se pide."""
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    
+    # Los módulos se importan entre sí por su nombre (como hace main.py)
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    if package_dir not in sys.path:
+        sys.path.insert(0, package_dir)
+    
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,308 @@
+"""
+Módulo de Servicio Asíncrono de Firmas
+======================================
+
+Fachada asyncio sobre DigitalSignature, SignatureVerifier y KeyManager
+para aplicaciones web asíncronas.
+
+Llamar a sign_document o verify_signature directamente desde una
+corrutina bloquea el bucle de eventos mientras se lee el documento y se
+ejecuta la operación criptográfica. Este servicio:
+
+- Ejecuta el trabajo de CPU y de archivos en un pool de hilos acotado
+  (hashlib y OpenSSL liberan el GIL durante el trabajo pesado)
+- Limita las operaciones pendientes (contrapresión): al llegar al límite
+  las peticiones esperan o, con wait=False, se rechazan al instante
+- Admite cancelación: una petición cancelada antes de empezar no llega a
+  ejecutarse; si ya estaba en un hilo, termina allí y su plaza se libera
+  al acabar (el límite de trabajo simultáneo nunca se supera)
+
+Ejemplo:
+    async with AsyncSignatureService(max_workers=4, max_pending=64) as service:
+        signature = await service.sign_document("contrato.pdf", private_key)
+        is_valid, message = await service.verify_signature("contrato.pdf", signature, public_key)
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple
+from digest_registry import DEFAULT_DIGEST
+from digital_signature import DigitalSignature
+from hashing import hash_async_stream
+from key_manager import KeyManager
+from signature_format import CURRENT_FORMAT_VERSION
+from signature_schemes import PrivateKey, PublicKey
+from verification import SignatureVerifier
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Se lanza cuando el servicio tiene demasiadas operaciones pendientes."""
+
+
+class AsyncSignatureService:
+    """
+    Servicio de firma y verificación que no bloquea el bucle de eventos.
+    """
+    
+    def __init__(self, signature_manager: Optional[DigitalSignature] = None,
+                 verifier: Optional[SignatureVerifier] = None,
+                 key_manager: Optional[KeyManager] = None,
+                 max_workers: Optional[int] = None,
+                 max_pending: int = 64):
+        """
+        Inicializa el servicio.
+        
+        Args:
+            signature_manager: Gestor de firmas (por defecto, uno nuevo)
+            verifier: Verificador de firmas (por defecto, uno nuevo)
+            key_manager: Gestor de claves (por defecto, uno nuevo)
+            max_workers: Hilos del pool (por defecto, el de ThreadPoolExecutor)
+            max_pending: Operaciones admitidas a la vez (en ejecución o en cola
+                         del pool). Las demás esperan su turno
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending debe ser al menos 1")
+        
+        self.signature_manager = signature_manager or DigitalSignature()
+        self.verifier = verifier or SignatureVerifier()
+        self.key_manager = key_manager or KeyManager()
+        self.max_pending = max_pending
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="firma")
+        # El semáforo se crea en el bucle de eventos que lo usa
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+        
+        # Métricas
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+    
+    # ------------------------------------------------------------------
+    # Firma
+    # ------------------------------------------------------------------
+    
+    async def sign_document(self, document_path: str, private_key: PrivateKey,
+                            wait: bool = True, **kwargs) -> Dict:
+        """
+        Firma un documento sin bloquear el bucle de eventos.
+        
+        Args:
+            document_path: Ruta del documento
+            private_key: Clave privada del firmante
+            wait: Si es False y el servicio está saturado, lanza ServiceOverloadedError
+            **kwargs: Argumentos de DigitalSignature.sign_document (certificate,
+                      signer_info, format_version, digest, chunked...)
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        return await self._run(self.signature_manager.sign_document,
+                               document_path, private_key, wait=wait, **kwargs)
+    
+    async def sign_and_save(self, document_path: str, private_key: PrivateKey,
+                            wait: bool = True, **kwargs) -> str:
+        """Versión asíncrona de DigitalSignature.sign_and_save()."""
+        return await self._run(self.signature_manager.sign_and_save,
+                               document_path, private_key, wait=wait, **kwargs)
+    
+    async def sign_many(self, document_paths: Iterable[str], private_key: PrivateKey,
+                        return_exceptions: bool = True, **kwargs) -> List[Any]:
+        """
+        Firma muchos documentos pequeños de forma concurrente.
+        
+        Cada documento es una operación independiente: la contrapresión
+        (max_pending) limita cuántas se ejecutan a la vez.
+        
+        Args:
+            document_paths: Rutas de los documentos
+            private_key: Clave privada del firmante
+            return_exceptions: Si es True, los errores se devuelven en la lista
+                               en lugar de cancelar el resto del lote
+            **kwargs: Argumentos de DigitalSignature.sign_document
+        
+        Returns:
+            Firmas (o excepciones) en el mismo orden que document_paths
+        """
+        return await asyncio.gather(
+            *(self.sign_document(path, private_key, **kwargs) for path in document_paths),
+            return_exceptions=return_exceptions
+        )
+    
+    async def sign_stream(self, stream: AsyncIterable[bytes], private_key: PrivateKey,
+                          document_name: str, certificate=None,
+                          signer_info: Optional[Dict[str, str]] = None,
+                          format_version: int = CURRENT_FORMAT_VERSION,
+                          digest: str = DEFAULT_DIGEST, wait: bool = True) -> Dict:
+        """
+        Firma un flujo asíncrono (p. ej. el cuerpo de una subida HTTP).
+        
+        El hash se calcula en el bucle de eventos a medida que llegan los
+        bloques; solo la operación criptográfica se envía al pool.
+        
+        Args:
+            stream: Iterador asíncrono de bloques de bytes
+            private_key: Clave privada del firmante
+            document_name: Nombre con el que se registra el documento
+            certificate: Certificado opcional del firmante
+            signer_info: Información adicional del firmante
+            format_version: Versión del formato de firma
+            digest: Algoritmo de hash (ver digest_registry)
+            wait: Si es False y el servicio está saturado, lanza ServiceOverloadedError
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        document_hash, _ = await hash_async_stream(stream, digest)
+        return await self._run(
+            self.signature_manager.sign_digest, document_name, document_hash, private_key,
+            certificate, signer_info, format_version, digest, wait=wait
+        )
+    
+    # ------------------------------------------------------------------
+    # Verificación
+    # ------------------------------------------------------------------
+    
+    async def verify_signature(self, document_path: str, signature_data: Dict,
+                               public_key: PublicKey, mode: str = "signature_first",
+                               wait: bool = True) -> Tuple[bool, str]:
+        """Versión asíncrona de SignatureVerifier.verify_signature()."""
+        return await self._run(self.verifier.verify_signature, document_path,
+                               signature_data, public_key, mode, wait=wait)
+    
+    async def full_verification(self, document_path: str, signature_data: Dict,
+                                public_key: PublicKey, certificate=None,
+                                mode: str = "signature_first",
+                                wait: bool = True) -> Dict[str, Any]:
+        """Versión asíncrona de SignatureVerifier.full_verification()."""
+        return await self._run(self.verifier.full_verification, document_path,
+                               signature_data, public_key, certificate, mode, wait=wait)
+    
+    async def load_signature(self, signature_path: str, wait: bool = True) -> Dict:
+        """Versión asíncrona de DigitalSignature.load_signature()."""
+        return await self._run(self.signature_manager.load_signature, signature_path, wait=wait)
+    
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+    
+    async def generate_key_pair(self, key_size: int = 2048, wait: bool = True,
+                                **kwargs) -> Tuple[PrivateKey, PublicKey]:
+        """Versión asíncrona de KeyManager.generate_key_pair()."""
+        return await self._run(self.key_manager.generate_key_pair, key_size, wait=wait, **kwargs)
+    
+    async def load_private_key(self, filepath: str, password: Optional[str] = None,
+                               wait: bool = True) -> PrivateKey:
+        """Versión asíncrona de KeyManager.load_private_key() (la KDF no bloquea el bucle)."""
+        return await self._run(self.key_manager.load_private_key, filepath, password, wait=wait)
+    
+    async def load_public_key(self, filepath: str, wait: bool = True) -> PublicKey:
+        """Versión asíncrona de KeyManager.load_public_key()."""
+        return await self._run(self.key_manager.load_public_key, filepath, wait=wait)
+    
+    async def load_certificate(self, filepath: str, wait: bool = True):
+        """Versión asíncrona de KeyManager.load_certificate()."""
+        return await self._run(self.key_manager.load_certificate, filepath, wait=wait)
+    
+    # ------------------------------------------------------------------
+    # Ciclo de vida y métricas
+    # ------------------------------------------------------------------
+    
+    def metrics(self) -> Dict[str, int]:
+        """
+        Devuelve las métricas del servicio.
+        
+        Returns:
+            Diccionario con las operaciones en curso, en espera, completadas,
+            fallidas, canceladas y rechazadas por saturación
+        """
+        return {
+            "en_curso": self._in_flight,
+            "en_espera": self._waiting,
+            "completadas": self._completed,
+            "fallidas": self._failed,
+            "canceladas": self._cancelled,
+            "rechazadas": self._rejected
+        }
+    
+    async def close(self) -> None:
+        """Espera a las operaciones en curso y detiene el pool de hilos."""
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+    
+    async def __aenter__(self) -> "AsyncSignatureService":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+    
+    async def _run(self, func: Callable, *args, wait: bool = True, **kwargs) -> Any:
+        """
+        Ejecuta una función bloqueante en el pool, respetando el límite de pendientes.
+        
+        Raises:
+            ServiceOverloadedError: Si wait es False y no hay plazas libres
+            RuntimeError: Si el servicio está cerrado
+        """
+        if self._closed:
+            raise RuntimeError("El servicio de firmas está cerrado")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        
+        if not wait and self._slots.locked():
+            self._rejected += 1
+            raise ServiceOverloadedError(
+                f"Servicio saturado: {self.max_pending} operaciones pendientes"
+            )
+        
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            raise
+        finally:
+            self._waiting -= 1
+        
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._finished()
+            raise
+        # La plaza se libera cuando termina el hilo, no cuando se cancela la espera
+        future.add_done_callback(lambda _: self._call_in_loop(loop, self._finished))
+        
+        try:
+            # Si la tarea se cancela antes de que un hilo tome la operación,
+            # el futuro se cancela y la operación no llega a ejecutarse
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        
+        self._completed += 1
+        return result
+    
+    def _finished(self) -> None:
+        """Libera la plaza de una operación terminada (en el hilo del bucle)."""
+        self._in_flight -= 1
+        self._slots.release()
+    
+    @staticmethod
+    def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable) -> None:
+        """Programa una función en el bucle de eventos desde otro hilo."""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # El bucle ya se cerró: no queda nadie esperando la plaza
+            pass
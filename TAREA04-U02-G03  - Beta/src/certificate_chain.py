@@ -0,0 +1,363 @@
+"""
+Módulo de Validación de Cadenas de Certificados
+===============================================
+
+Valida la cadena de confianza de un certificado hasta un conjunto de
+autoridades raíz locales (CA):
+
+1. Se busca el emisor de cada certificado entre las raíces y los
+   intermedios conocidos (por Authority/Subject Key Identifier y, si el
+   certificado no los tiene, por nombre)
+2. Se comprueba la firma de cada eslabón con la clave pública del emisor
+3. Los emisores deben ser CA (Basic Constraints) y respetar su path_length
+4. Todos los certificados de la cadena deben estar vigentes
+
+Caché de rutas de confianza:
+----------------------------
+Cada cadena validada se guarda durante ttl segundos indexada por
+(identificador de clave del sujeto, identificador de clave del emisor).
+Al validar un certificado nuevo solo se comprueba su firma contra el
+emisor: la ruta del emisor hasta la raíz sale de la caché. Verificar
+100k firmas de unos pocos emisores construye cada ruta una sola vez.
+La vigencia se vuelve a comprobar en cada llamada (es muy barata), de
+modo que un certificado que expira dentro del TTL se rechaza igualmente.
+
+Ejemplo:
+    validator = CertificateChainValidator.from_directory("ca/raices", "ca/intermedios")
+    is_valid, message = validator.validate(certificate)
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+
+DEFAULT_CHAIN_CACHE_TTL = 300.0  # segundos
+DEFAULT_MAX_CHAIN_DEPTH = 8
+DEFAULT_CHAIN_CACHE_ENTRIES = 100_000
+
+CERTIFICATE_EXTENSIONS = (".pem", ".crt", ".cer")
+
+
+class ChainValidationError(Exception):
+    """La cadena de un certificado no se puede construir o no es válida."""
+
+
+def check_validity(certificate: x509.Certificate, at: Optional[datetime] = None) -> None:
+    """
+    Comprueba que un certificado esté vigente en un momento dado.
+    
+    Las fechas se comparan en UTC con zona horaria (not_valid_*_utc), como
+    en SignatureVerifier.verify_certificate().
+    
+    Args:
+        certificate: Certificado a comprobar
+        at: Momento de la comprobación, con zona horaria (por defecto, ahora)
+    
+    Raises:
+        ChainValidationError: Si el certificado aún no es válido o ha expirado
+    """
+    at = at or datetime.now(timezone.utc)
+    if at < certificate.not_valid_before_utc:
+        raise ChainValidationError(
+            f"El certificado '{CertificateChainValidator._name(certificate)}' aún no es válido"
+        )
+    if at > certificate.not_valid_after_utc:
+        raise ChainValidationError(
+            f"El certificado '{CertificateChainValidator._name(certificate)}' ha expirado"
+        )
+
+
+def subject_key_id(certificate: x509.Certificate) -> str:
+    """
+    Identificador de la clave del sujeto (hexadecimal).
+    
+    Se usa la extensión Subject Key Identifier; si no existe, se calcula
+    a partir de la clave pública (método 1 de RFC 5280).
+    """
+    try:
+        return certificate.extensions.get_extension_for_class(
+            x509.SubjectKeyIdentifier).value.digest.hex()
+    except x509.ExtensionNotFound:
+        return x509.SubjectKeyIdentifier.from_public_key(certificate.public_key()).digest.hex()
+
+
+def authority_key_id(certificate: x509.Certificate) -> Optional[str]:
+    """Identificador de la clave del emisor (extensión AKI), o None si no existe."""
+    try:
+        key_id = certificate.extensions.get_extension_for_class(
+            x509.AuthorityKeyIdentifier).value.key_identifier
+    except x509.ExtensionNotFound:
+        return None
+    return key_id.hex() if key_id else None
+
+
+def load_certificates(path: str) -> List[x509.Certificate]:
+    """
+    Carga los certificados de un archivo (PEM con uno o varios, o DER) o de
+    todos los archivos .pem/.crt/.cer de un directorio.
+    """
+    if os.path.isdir(path):
+        certificates = []
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(CERTIFICATE_EXTENSIONS):
+                certificates.extend(load_certificates(os.path.join(path, name)))
+        return certificates
+    
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"-----BEGIN CERTIFICATE-----" in data:
+        return x509.load_pem_x509_certificates(data)
+    return [x509.load_der_x509_certificate(data)]
+
+
+def _fingerprint(certificate: x509.Certificate) -> bytes:
+    """Huella SHA-256 de un certificado."""
+    return certificate.fingerprint(hashes.SHA256())
+
+
+class CertificateChainValidator:
+    """
+    Validador de cadenas de certificados con caché de rutas de confianza.
+    """
+    
+    def __init__(self, roots: Iterable[x509.Certificate],
+                 intermediates: Iterable[x509.Certificate] = (),
+                 cache_ttl: float = DEFAULT_CHAIN_CACHE_TTL,
+                 max_depth: int = DEFAULT_MAX_CHAIN_DEPTH,
+                 max_cache_entries: int = DEFAULT_CHAIN_CACHE_ENTRIES):
+        """
+        Inicializa el validador.
+        
+        Args:
+            roots: Certificados raíz de confianza (anclas)
+            intermediates: Certificados intermedios conocidos (no son de confianza
+                           por sí mismos: deben encadenar hasta una raíz)
+            cache_ttl: Segundos que se conserva una cadena validada (0 desactiva la caché)
+            max_depth: Longitud máxima de una cadena
+            max_cache_entries: Cadenas máximas en caché (se descartan las más antiguas)
+        """
+        self.cache_ttl = cache_ttl
+        self.max_depth = max_depth
+        self.max_cache_entries = max_cache_entries
+        
+        self._roots: Dict[bytes, x509.Certificate] = {}
+        self._by_key_id: Dict[str, List[x509.Certificate]] = {}
+        self._by_subject: Dict[x509.Name, List[x509.Certificate]] = {}
+        self._cache: Dict[Tuple[str, str], Tuple[bytes, List[x509.Certificate], float]] = {}
+        self._lock = threading.Lock()
+        
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        for root in roots:
+            self.add_root(root)
+        for intermediate in intermediates:
+            self.add_intermediate(intermediate)
+    
+    @classmethod
+    def from_directory(cls, roots_path: str, intermediates_path: Optional[str] = None,
+                       **kwargs) -> "CertificateChainValidator":
+        """
+        Crea un validador con las raíces (e intermedios) de archivos o directorios locales.
+        
+        Raises:
+            ValueError: Si no se encuentra ninguna raíz
+        """
+        roots = load_certificates(roots_path)
+        if not roots:
+            raise ValueError(f"No hay certificados raíz en '{roots_path}'")
+        intermediates = load_certificates(intermediates_path) if intermediates_path else []
+        return cls(roots, intermediates, **kwargs)
+    
+    def add_root(self, certificate: x509.Certificate) -> None:
+        """Añade una raíz de confianza."""
+        self._roots[_fingerprint(certificate)] = certificate
+        self._index(certificate)
+    
+    def add_intermediate(self, certificate: x509.Certificate) -> None:
+        """Añade un certificado intermedio conocido."""
+        self._index(certificate)
+    
+    def clear_cache(self) -> None:
+        """Vacía la caché de cadenas (p. ej. tras cambiar las raíces)."""
+        with self._lock:
+            self._cache.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Devuelve aciertos, fallos y entradas de la caché de cadenas."""
+        with self._lock:
+            return {"aciertos": self.cache_hits, "fallos": self.cache_misses,
+                    "entradas": len(self._cache), "raices": len(self._roots)}
+    
+    def validate(self, certificate: x509.Certificate,
+                 intermediates: Iterable[x509.Certificate] = (),
+                 at: Optional[datetime] = None) -> Tuple[bool, str]:
+        """
+        Valida un certificado y su cadena hasta una raíz de confianza.
+        
+        Args:
+            certificate: Certificado a validar
+            intermediates: Intermedios adicionales (p. ej. enviados con la firma)
+            at: Momento de la validación (por defecto, ahora)
+        
+        Returns:
+            Tupla (es_válido: bool, mensaje: str)
+        """
+        try:
+            chain = self.build_chain(certificate, intermediates, at)
+        except ChainValidationError as e:
+            return False, f"FALLO: {e}"
+        
+        subjects = " → ".join(self._name(c) for c in chain)
+        return True, f"ÉXITO: Cadena de confianza válida ({subjects})"
+    
+    def build_chain(self, certificate: x509.Certificate,
+                    intermediates: Iterable[x509.Certificate] = (),
+                    at: Optional[datetime] = None) -> List[x509.Certificate]:
+        """
+        Construye y valida la cadena de un certificado.
+        
+        Returns:
+            Lista [certificado, intermedios..., raíz]
+        
+        Raises:
+            ChainValidationError: Si la cadena no se puede construir o no es válida
+        """
+        extra = {}
+        for intermediate in intermediates:
+            extra.setdefault(subject_key_id(intermediate), []).append(intermediate)
+        
+        chain = self._build(certificate, extra, 0)
+        self._check_validity(chain, at or datetime.now(timezone.utc))
+        return chain
+    
+    # ------------------------------------------------------------------
+    # Construcción de la cadena
+    # ------------------------------------------------------------------
+    
+    def _build(self, certificate: x509.Certificate,
+               extra: Dict[str, List[x509.Certificate]], depth: int) -> List[x509.Certificate]:
+        """Cadena de un certificado, reutilizando las rutas ya validadas."""
+        if _fingerprint(certificate) in self._roots:
+            return [certificate]
+        if depth >= self.max_depth:
+            raise ChainValidationError("La cadena supera la longitud máxima")
+        
+        key = self._cache_key(certificate)
+        cached = self._cached(key, certificate)
+        if cached is not None:
+            return cached
+        
+        issuer = self._find_issuer(certificate, extra)
+        self._check_issuer(issuer)
+        chain = [certificate] + self._build(issuer, extra, depth + 1)
+        self._check_path_length(chain)
+        
+        if self.cache_ttl > 0:
+            with self._lock:
+                self._cache[key] = (_fingerprint(certificate), chain,
+                                    time.monotonic() + self.cache_ttl)
+                # Los diccionarios conservan el orden de inserción: la primera es la más antigua
+                while len(self._cache) > self.max_cache_entries:
+                    del self._cache[next(iter(self._cache))]
+        return chain
+    
+    def _find_issuer(self, certificate: x509.Certificate,
+                     extra: Dict[str, List[x509.Certificate]]) -> x509.Certificate:
+        """Busca el emisor cuya clave verifica la firma del certificado."""
+        issuer_key_id = authority_key_id(certificate)
+        if issuer_key_id is not None:
+            candidates = self._by_key_id.get(issuer_key_id, []) + extra.get(issuer_key_id, [])
+        else:
+            candidates = self._by_subject.get(certificate.issuer, []) + \
+                [c for group in extra.values() for c in group if c.subject == certificate.issuer]
+        
+        for candidate in candidates:
+            if candidate is certificate:
+                continue
+            try:
+                certificate.verify_directly_issued_by(candidate)
+                return candidate
+            except (ValueError, TypeError, InvalidSignature):
+                continue
+        
+        raise ChainValidationError(
+            f"No se encontró un emisor de confianza para '{self._name(certificate)}'"
+        )
+    
+    def _check_issuer(self, issuer: x509.Certificate) -> None:
+        """Un emisor debe ser una CA (las raíces antiguas sin la extensión se aceptan)."""
+        try:
+            constraints = issuer.extensions.get_extension_for_class(x509.BasicConstraints).value
+        except x509.ExtensionNotFound:
+            if _fingerprint(issuer) in self._roots:
+                return
+            raise ChainValidationError(f"'{self._name(issuer)}' no es una autoridad certificadora")
+        if not constraints.ca:
+            raise ChainValidationError(f"'{self._name(issuer)}' no es una autoridad certificadora")
+        
+        try:
+            usage = issuer.extensions.get_extension_for_class(x509.KeyUsage).value
+        except x509.ExtensionNotFound:
+            return
+        if not usage.key_cert_sign:
+            raise ChainValidationError(f"'{self._name(issuer)}' no puede firmar certificados")
+    
+    def _check_path_length(self, chain: List[x509.Certificate]) -> None:
+        """Comprueba path_length: CA intermedias permitidas por debajo de cada CA."""
+        for position, ca in enumerate(chain[1:], start=1):
+            try:
+                limit = ca.extensions.get_extension_for_class(x509.BasicConstraints).value.path_length
+            except x509.ExtensionNotFound:
+                continue
+            # Intermedios entre esta CA y el certificado final
+            if limit is not None and position - 1 > limit:
+                raise ChainValidationError(f"'{self._name(ca)}' supera su path_length ({limit})")
+    
+    @staticmethod
+    def _check_validity(chain: List[x509.Certificate], at: datetime) -> None:
+        """Todos los certificados de la cadena deben estar vigentes."""
+        for certificate in chain:
+            check_validity(certificate, at)
+    
+    # ------------------------------------------------------------------
+    # Índices y caché
+    # ------------------------------------------------------------------
+    
+    def _index(self, certificate: x509.Certificate) -> None:
+        """Indexa un certificado por identificador de clave y por nombre."""
+        self._by_key_id.setdefault(subject_key_id(certificate), []).append(certificate)
+        self._by_subject.setdefault(certificate.subject, []).append(certificate)
+        self.clear_cache()
+    
+    @staticmethod
+    def _cache_key(certificate: x509.Certificate) -> Tuple[str, str]:
+        """(identificador del sujeto, identificador del emisor) de un certificado."""
+        issuer_key_id = authority_key_id(certificate) or certificate.issuer.rfc4514_string()
+        return subject_key_id(certificate), issuer_key_id
+    
+    def _cached(self, key: Tuple[str, str],
+                certificate: x509.Certificate) -> Optional[List[x509.Certificate]]:
+        """Cadena en caché de un certificado (misma huella y sin caducar), o None."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                fingerprint, chain, expires_at = entry
+                if time.monotonic() < expires_at and fingerprint == _fingerprint(certificate):
+                    self.cache_hits += 1
+                    return chain
+                if time.monotonic() >= expires_at:
+                    del self._cache[key]
+            self.cache_misses += 1
+            return None
+    
+    @staticmethod
+    def _name(certificate: x509.Certificate) -> str:
+        """Nombre común del sujeto (o el nombre completo si no tiene)."""
+        names = certificate.subject.get_attributes_for_oid(x509.oid.NameOID.COMMON_NAME)
+        return names[0].value if names else certificate.subject.rfc4514_string()
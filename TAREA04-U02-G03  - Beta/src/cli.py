@@ -0,0 +1,442 @@
+"""
+Módulo de Línea de Comandos No Interactiva
+==========================================
+
+Subcomandos para usar el sistema de firma desde scripts, cron o CI, sin
+los menús de input() de main.py:
+
+    python main.py keygen juan --scheme ed25519 --cn "Juan Pérez"
+    python main.py sign "documentos/*.pdf" --key keys/juan_private.pem --jobs 4
+    python main.py verify "documentos/*.pdf" --public-key keys/juan_public.pem --format json
+    python main.py verify "documentos/*.pdf" --trust-store keys
+    python main.py verify "documentos/*.pdf" --trust-store keys --storage log
+    python main.py inspect "signatures/*.json"
+
+Los archivos se indican como rutas o patrones glob (se expanden aquí, también
+en Windows) o en un archivo de lista con @lista.txt (un argumento por línea).
+
+Salida:
+- --format text (por defecto): una línea por archivo
+- --format json: un único documento JSON en stdout
+Con --verbose, los mensajes de progreso de los módulos de firma (eventos,
+ver events.py) se escriben en stderr, de modo que stdout solo contiene el
+resultado. Sin --verbose no se muestran.
+
+Códigos de salida:
+- 0: todo correcto
+- 1: alguna firma no es válida o algún documento no se pudo firmar
+- 2: uso incorrecto (argumentos)
+- 3: error de entrada (archivo inexistente, clave ilegible...)
+
+Con --metrics ARCHIVO se guardan al terminar las métricas de tiempo del
+comando (ver metrics.py): en JSON si el archivo termina en .json y, si no,
+en el formato de texto de Prometheus.
+
+Contraseña de la clave privada: se lee de la variable de entorno indicada
+con --password-env (nunca como argumento). Si falta y hay terminal, se pide.
+"""
+
+import os
+import sys
+import glob
+import json
+import getpass
+import argparse
+from typing import TYPE_CHECKING, Dict, List, Optional
+from digest_registry import DEFAULT_DIGEST, available_digests
+from digital_signature import (LOG_STORAGE_FORMAT, DigitalSignature, _default_output_name,
+                               output_name_collisions)
+from signature_container import STORAGE_FORMATS, read_signature_file
+from signature_format import get_format_version, get_hash_algorithm
+from signature_log import SignatureLog
+from signature_schemes import DEFAULT_SCHEME, SIGNATURE_SCHEMES
+from trust_store import TrustStore
+from verification import VERIFICATION_MODES, SignatureVerifier
+from events import listening, stream_listener
+from metrics import REGISTRY
+
+# key_manager (y con él cryptography) solo se importa en los comandos que usan
+# claves: inspect y --help arrancan sin cargarlo
+if TYPE_CHECKING:
+    from key_manager import KeyManager
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+
+
+class CliError(Exception):
+    """Error de entrada que termina el comando con EXIT_ERROR."""
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """
+    Expande rutas y patrones glob, sin duplicados y en orden.
+    
+    Raises:
+        CliError: Si un patrón no coincide con ningún archivo o una ruta no existe
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+            if not matches:
+                raise CliError(f"El patrón '{pattern}' no coincide con ningún archivo")
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            raise CliError(f"El archivo '{pattern}' no existe")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def _read_password(env_var: Optional[str], prompt: str) -> Optional[str]:
+    """Contraseña desde la variable de entorno indicada, o pedida si hay terminal."""
+    if env_var:
+        if env_var not in os.environ:
+            raise CliError(f"La variable de entorno '{env_var}' no está definida")
+        return os.environ[env_var]
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt) or None
+    return None
+
+
+def _load_private_key(key_manager: "KeyManager", path: str, env_var: Optional[str]):
+    """Carga una clave privada, pidiendo la contraseña solo si está cifrada."""
+    if not os.path.isfile(path):
+        raise CliError(f"La clave privada '{path}' no existe")
+    password = os.environ.get(env_var) if env_var else None
+    try:
+        return key_manager.load_private_key(path, password)
+    except TypeError:
+        password = _read_password(env_var, "Contraseña de la clave privada: ")
+        if password is None:
+            raise CliError("La clave privada está cifrada: usar --password-env")
+        return key_manager.load_private_key(path, password)
+    except ValueError as e:
+        raise CliError(f"No se pudo cargar la clave privada: {e}")
+
+
+def _check_output_names(documents: List[str]) -> None:
+    """
+    Falla si dos documentos comparten el archivo de firma por defecto.
+    
+    Raises:
+        CliError: Si, p. ej., un glob recursivo encuentra a/x.pdf y b/x.pdf
+    """
+    for name, paths in output_name_collisions(documents).items():
+        raise CliError(f"Los documentos {', '.join(paths)} tienen el mismo archivo de "
+                       f"firma '{name}': usar un directorio de firmas (--signatures) "
+                       f"para cada uno")
+
+
+def _find_signature(document_path: str, signatures_dir: str) -> str:
+    """
+    Ruta del archivo de firma por defecto de un documento (.json o .sig).
+    
+    Si no existe ninguno se devuelve la ruta .json: la verificación de ese
+    documento falla con un error y el resto del lote continúa.
+    """
+    base = os.path.join(signatures_dir, _default_output_name(document_path))
+    for extension in STORAGE_FORMATS.values():
+        if os.path.isfile(base + extension):
+            return base + extension
+    return base + STORAGE_FORMATS["json"]
+
+
+def _read_log_signatures(locations: List[str]) -> List:
+    """
+    Lee firmas del registro de sign --storage log.
+    
+    Args:
+        locations: Rutas <directorio del registro>/<identificador> (como las
+                   del catálogo), todas del mismo registro
+    
+    Returns:
+        Los datos de cada firma; una firma que no está en el registro se
+        devuelve como su ruta (inexistente), de modo que la verificación de
+        ese documento falla y el resto del lote continúa
+    
+    Raises:
+        CliError: Si el directorio del registro no existe
+    """
+    log_dir = os.path.dirname(locations[0])
+    if not os.path.isdir(log_dir):
+        raise CliError(f"El registro de firmas '{log_dir}' no existe")
+    with SignatureLog(log_dir) as log:
+        return [log.get(os.path.basename(location))
+                if os.path.basename(location) in log else location
+                for location in locations]
+
+
+# ----------------------------------------------------------------------
+# Subcomandos
+# ----------------------------------------------------------------------
+
+def cmd_keygen(args) -> Dict:
+    """Genera un par de claves y su certificado autofirmado."""
+    from key_manager import KeyManager
+    key_manager = KeyManager(keys_directory=args.keys_dir)
+    password = None
+    if args.password_env or args.encrypt:
+        password = _read_password(args.password_env, "Contraseña para la clave privada: ")
+        if not password:
+            raise CliError("Se pidió cifrar la clave pero no hay contraseña (usar --password-env)")
+    
+    private_key, public_key = key_manager.generate_key_pair(args.key_size, scheme=args.scheme)
+    owner_info = {"name": args.cn or args.name, "organization": args.org, "city": args.city,
+                  "state": args.state, "country": args.country.upper()}
+    certificate = key_manager.create_certificate(private_key, owner_info, days_valid=args.days)
+    
+    return {
+        "clave_privada": key_manager.save_private_key(private_key, args.name, password),
+        "clave_publica": key_manager.save_public_key(public_key, args.name),
+        "certificado": key_manager.save_certificate(certificate, args.name),
+        "esquema": args.scheme,
+        "cifrada": bool(password),
+        "exito": True
+    }
+
+
+def cmd_sign(args) -> Dict:
+    """Firma documentos en lote (en paralelo con --jobs)."""
+    from key_manager import KeyManager
+    documents = expand_paths(args.files)
+    _check_output_names(documents)
+    key_manager = KeyManager(keys_directory=os.path.dirname(args.key) or ".")
+    private_key = _load_private_key(key_manager, args.key, args.password_env)
+    certificate = None
+    if args.cert:
+        if not os.path.isfile(args.cert):
+            raise CliError(f"El certificado '{args.cert}' no existe")
+        certificate = key_manager.load_certificate(args.cert)
+    
+    signature_manager = DigitalSignature(signatures_directory=args.signatures,
+                                         storage_format=args.storage)
+    results = signature_manager.sign_many(documents, private_key, certificate,
+                                          max_workers=args.jobs, digest=args.digest)
+    
+    items = [{"documento": r["documento"], "exito": r["exito"],
+              "archivo_firma": r["archivo_firma"], "error": r["error"]} for r in results]
+    return {"resultados": items, "total": len(items),
+            "firmados": sum(1 for r in items if r["exito"]),
+            "exito": all(r["exito"] for r in items)}
+
+
+def cmd_verify(args) -> Dict:
+    """Verifica documentos en lote (en paralelo con --jobs)."""
+    documents = expand_paths(args.files)
+    if args.signature and len(documents) != 1:
+        raise CliError("--signature solo se admite con un único documento")
+    if not args.signature:
+        _check_output_names(documents)
+    
+    trust_store = None
+    public_key = None
+    if args.trust_store:
+        for path in args.trust_store:
+            if not os.path.exists(path):
+                raise CliError(f"El almacén de confianza '{path}' no existe")
+        # Una sola carga: la clave de cada firma se busca por su huella
+        trust_store = TrustStore.from_directory(*args.trust_store)
+    else:
+        if not os.path.isfile(args.public_key):
+            raise CliError(f"La clave pública '{args.public_key}' no existe")
+        from key_manager import KeyManager
+        public_key = KeyManager(keys_directory=os.path.dirname(args.public_key) or ".") \
+            .load_public_key(args.public_key)
+    
+    if args.storage == LOG_STORAGE_FORMAT:
+        # Con el registro, --signature es el identificador de la firma
+        locations = [os.path.join(args.signatures, "log",
+                                  args.signature or _default_output_name(document))
+                     for document in documents]
+        signatures = _read_log_signatures(locations)
+    else:
+        signatures = [args.signature or _find_signature(document, args.signatures)
+                      for document in documents]
+        locations = signatures
+    items = [(document, signature, public_key)
+             for document, signature in zip(documents, signatures)]
+    
+    verifier = SignatureVerifier(trust_store=trust_store)
+    summary = verifier.verify_many(items, max_workers=args.jobs, mode=args.mode)
+    
+    results = [{"documento": r["documento"], "archivo_firma": location,
+                "valida": r["valida"], "mensaje": r["mensaje"]}
+               for r, location in zip(summary["resultados"], locations)]
+    return {"resultados": results, "total": summary["total"], "validas": summary["validas"],
+            "invalidas": summary["invalidas"], "tiempo_total": summary["tiempo_total"],
+            "exito": summary["invalidas"] == 0}
+
+
+def cmd_inspect(args) -> Dict:
+    """Muestra los metadatos de archivos de firma sin verificarlos."""
+    results = []
+    for path in expand_paths(args.files):
+        try:
+            data = read_signature_file(path)
+            results.append({
+                "archivo_firma": path,
+                "documento": data.get("document_name"),
+                "hash": data.get("document_hash"),
+                "algoritmo": data.get("algorithm"),
+                "hash_algorithm": get_hash_algorithm(data),
+                "esquema": data.get("signature_scheme", DEFAULT_SCHEME),
+                "format_version": get_format_version(data),
+                "key_size": data.get("key_size"),
+                "fecha": data.get("timestamp"),
+                "firmante": data.get("signer"),
+                "huella_clave": data.get("key_fingerprint"),
+                "por_bloques": "hash_mode" in data,
+                "exito": True
+            })
+        except (OSError, ValueError, KeyError) as e:
+            results.append({"archivo_firma": path, "exito": False, "error": str(e)})
+    return {"resultados": results, "total": len(results),
+            "exito": all(r["exito"] for r in results)}
+
+
+# ----------------------------------------------------------------------
+# Salida
+# ----------------------------------------------------------------------
+
+def _print_text(command: str, result: Dict) -> None:
+    """Imprime el resultado de un comando en formato legible, una línea por archivo."""
+    if command == "keygen":
+        print(f"✓ Clave privada: {result['clave_privada']}")
+        print(f"✓ Clave pública: {result['clave_publica']}")
+        print(f"✓ Certificado:   {result['certificado']}")
+        return
+    
+    for item in result["resultados"]:
+        if command == "sign":
+            line = (f"✓ {item['documento']} -> {item['archivo_firma']}" if item["exito"]
+                    else f"✗ {item['documento']}: {item['error']}")
+        elif command == "verify":
+            line = f"{'✓' if item['valida'] else '✗'} {item['documento']}: {item['mensaje']}"
+        elif item["exito"]:
+            signer = (item["firmante"] or {}).get("nombre", "-")
+            line = (f"{item['archivo_firma']}: {item['documento']} | {item['algoritmo']} | "
+                    f"v{item['format_version']} | {item['fecha']} | {signer}")
+        else:
+            line = f"✗ {item['archivo_firma']}: {item['error']}"
+        print(line)
+    
+    if command == "sign":
+        print(f"{result['firmados']}/{result['total']} documentos firmados")
+    elif command == "verify":
+        print(f"{result['validas']}/{result['total']} firmas válidas "
+              f"en {result['tiempo_total']:.3f} s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construye el analizador de argumentos con los subcomandos."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--format", choices=("text", "json"), default="text",
+                        help="Formato de la salida en stdout")
+    common.add_argument("-v", "--verbose", action="store_true",
+                        help="Mostrar el progreso de la firma/verificación en stderr")
+    common.add_argument("--metrics", metavar="ARCHIVO",
+                        help="Guardar al terminar las métricas de tiempo (hash, firma, "
+                             "carga de claves...): .json o formato de Prometheus")
+
+    parser = argparse.ArgumentParser(
+        prog="main.py", fromfile_prefix_chars="@",
+        description="Sistema de firma digital (sin argumentos: menú interactivo)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    keygen = subparsers.add_parser("keygen", parents=[common], help="Generar claves y certificado")
+    keygen.add_argument("name", help="Nombre de las claves (<nombre>_private.pem...)")
+    keygen.add_argument("--keys-dir", default="keys", help="Directorio de claves")
+    keygen.add_argument("--scheme", choices=list(SIGNATURE_SCHEMES), default=DEFAULT_SCHEME)
+    keygen.add_argument("--key-size", type=int, default=2048, help="Bits de la clave RSA")
+    keygen.add_argument("--cn", help="Nombre del propietario (por defecto, el de las claves)")
+    keygen.add_argument("--org", default="ESPOL", help="Organización")
+    keygen.add_argument("--city", default="Guayaquil", help="Ciudad")
+    keygen.add_argument("--state", default="Guayas", help="Estado o provincia")
+    keygen.add_argument("--country", default="EC", help="Código de país de 2 letras")
+    keygen.add_argument("--days", type=int, default=365, help="Días de validez del certificado")
+    keygen.add_argument("--encrypt", action="store_true",
+                        help="Cifrar la clave privada (pide la contraseña)")
+    keygen.add_argument("--password-env", help="Variable de entorno con la contraseña")
+    
+    sign = subparsers.add_parser("sign", parents=[common], help="Firmar documentos")
+    sign.add_argument("files", nargs="+", help="Documentos o patrones glob")
+    sign.add_argument("--key", required=True, help="Clave privada (PEM)")
+    sign.add_argument("--cert", help="Certificado del firmante (PEM)")
+    sign.add_argument("--password-env", help="Variable de entorno con la contraseña")
+    sign.add_argument("--signatures", default="signatures", help="Directorio de firmas")
+    sign.add_argument("--storage", choices=list(STORAGE_FORMATS) + [LOG_STORAGE_FORMAT],
+                      default="json", help="Formato de almacenamiento de las firmas")
+    sign.add_argument("--digest", choices=available_digests(), default=DEFAULT_DIGEST)
+    sign.add_argument("--jobs", "-j", type=int, default=1, help="Procesos en paralelo")
+    
+    verify = subparsers.add_parser("verify", parents=[common], help="Verificar documentos")
+    verify.add_argument("files", nargs="+", help="Documentos o patrones glob")
+    key_source = verify.add_mutually_exclusive_group(required=True)
+    key_source.add_argument("--public-key", help="Clave pública del firmante (PEM)")
+    key_source.add_argument("--trust-store", action="append",
+                            help="Archivo o directorio de certificados/claves públicas; la "
+                                 "clave de cada firma se busca por su huella (repetible)")
+    verify.add_argument("--signatures", default="signatures",
+                        help="Directorio con las firmas <documento>_signature.json/.sig")
+    verify.add_argument("--signature", help="Archivo de firma, o identificador en el registro "
+                                            "con --storage log (solo con un documento)")
+    verify.add_argument("--storage", choices=list(STORAGE_FORMATS) + [LOG_STORAGE_FORMAT],
+                        default="json",
+                        help="Con 'log', las firmas se leen del registro <signatures>/log "
+                             "(sign --storage log); si no, de los archivos .json/.sig")
+    verify.add_argument("--mode", choices=VERIFICATION_MODES, default="signature_first")
+    verify.add_argument("--jobs", "-j", type=int, default=1, help="Hilos en paralelo")
+    
+    inspect = subparsers.add_parser("inspect", parents=[common],
+                                    help="Mostrar metadatos de archivos de firma")
+    inspect.add_argument("files", nargs="+", help="Archivos de firma o patrones glob")
+    
+    return parser
+
+
+COMMANDS = {"keygen": cmd_keygen, "sign": cmd_sign, "verify": cmd_verify, "inspect": cmd_inspect}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Punto de entrada de la línea de comandos no interactiva.
+    
+    Returns:
+        Código de salida (ver EXIT_*)
+    """
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    
+    if getattr(args, "jobs", 1) < 1:
+        print("✗ --jobs debe ser al menos 1", file=sys.stderr)
+        return EXIT_USAGE
+    
+    try:
+        if args.verbose:
+            # Los mensajes de progreso van a stderr: no se mezclan con el resultado
+            with listening(stream_listener(sys.stderr)):
+                result = COMMANDS[args.command](args)
+        else:
+            result = COMMANDS[args.command](args)
+        if args.metrics:
+            REGISTRY.write(args.metrics)
+    except CliError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return EXIT_ERROR
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        _print_text(args.command, result)
+    return EXIT_OK if result["exito"] else EXIT_FAILED
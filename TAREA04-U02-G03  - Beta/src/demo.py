@@ -18,6 +18,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from key_manager import KeyManager
 from digital_signature import DigitalSignature
 from verification import SignatureVerifier
+from events import console_listener, subscribe
 
 
 def print_section(title):
@@ -281,6 +282,8 @@ Lugar: Guayaquil, Ecuador
 
 
 if __name__ == "__main__":
+    # La demostración muestra los mensajes de progreso de los módulos
+    subscribe(console_listener)
     try:
         demo()
     except Exception as e:
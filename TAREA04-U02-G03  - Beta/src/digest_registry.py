@@ -0,0 +1,161 @@
+"""
+Módulo de Registro de Algoritmos de Hash
+========================================
+
+Algoritmos de resumen disponibles para firmar documentos. El algoritmo se
+elige en cada firma y se guarda en los metadatos (campo "hash_algorithm"),
+de modo que el verificador sabe cuál usar.
+
+Algoritmos registrados:
+-----------------------
+- sha256:  SHA-256 (por defecto, compatible con las firmas existentes)
+- sha512:  SHA-512, más rápido por byte que SHA-256 en CPU de 64 bits
+           sin extensiones SHA-NI
+- blake2b: BLAKE2b-512, el más rápido en software en la mayoría de CPU
+           (ver TAREA03-U01-G03/funcion-hash-BLAKE2b.py)
+
+Firma del resumen:
+------------------
+El digest se firma precedido del nombre del algoritmo (p. ej.
+"blake2b-512:"), con el hash rsa_hash del algoritmo (SHA-256 para
+BLAKE2b, que OpenSSL no admite en RSA). Sin ese prefijo, la firma de un
+digest d de un algoritmo sería también una firma válida, con otro
+algoritmo, de un documento cuyo contenido fuese d. signature_format
+añade delante la versión del formato.
+
+Elegir el algoritmo más rápido del equipo:
+    python ../benchmarks/bench_digests.py
+
+cryptography solo se importa al firmar o verificar: leer metadatos o
+hashear documentos no lo necesita (ver benchmarks/bench_import.py).
+"""
+
+import time
+import hashlib
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives import hashes
+
+DEFAULT_DIGEST = "sha256"
+
+
+def _hash_factory(name: str) -> Callable[[], "hashes.HashAlgorithm"]:
+    """Fábrica de un algoritmo de cryptography.hashes que lo importa al usarse."""
+    def factory() -> "hashes.HashAlgorithm":
+        from cryptography.hazmat.primitives import hashes
+        return getattr(hashes, name)()
+    return factory
+
+
+class DigestAlgorithm:
+    """
+    Algoritmo de resumen utilizable para firmar documentos.
+    """
+    
+    def __init__(self, name: str, label: str, digest_size: int,
+                 rsa_hash: Callable[[], "hashes.HashAlgorithm"]):
+        """
+        Define un algoritmo de resumen.
+        
+        Args:
+            name: Nombre en hashlib (se guarda en los metadatos de la firma)
+            label: Nombre legible (p. ej. "SHA-512")
+            digest_size: Tamaño del digest en bytes
+            rsa_hash: Fábrica del algoritmo de cryptography con el que RSA-PSS
+                      y ECDSA hashean el mensaje firmado
+        """
+        self.name = name
+        self.label = label
+        self.digest_size = digest_size
+        self.rsa_hash = rsa_hash
+        # Prefijo del digest en el mensaje firmado
+        self.domain = f"{name}-{digest_size * 8}:".encode("ascii")
+    
+    def new(self):
+        """Crea un objeto de hash de hashlib."""
+        return hashlib.new(self.name)
+    
+    def message_to_sign(self, digest: bytes) -> Tuple[bytes, "hashes.HashAlgorithm"]:
+        """
+        Devuelve los datos y el algoritmo a pasar a RSA para firmar un digest.
+        
+        Args:
+            digest: Digest binario del documento
+        
+        Returns:
+            Tupla (domain + digest, rsa_hash) para private_key.sign /
+            public_key.verify
+        """
+        if len(digest) != self.digest_size:
+            raise ValueError(f"El digest no tiene el tamaño de {self.label}")
+        return self.domain + digest, self.rsa_hash()
+
+
+_REGISTRY: Dict[str, DigestAlgorithm] = {}
+
+
+def register_digest(algorithm: DigestAlgorithm) -> None:
+    """Registra (o reemplaza) un algoritmo de resumen."""
+    _REGISTRY[algorithm.name] = algorithm
+
+
+def get_digest(name: str) -> DigestAlgorithm:
+    """
+    Devuelve un algoritmo registrado.
+    
+    Raises:
+        ValueError: Si el algoritmo no está registrado
+    """
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Algoritmo de hash no soportado: {name}")
+
+
+def available_digests() -> List[str]:
+    """Devuelve los nombres de los algoritmos registrados."""
+    return list(_REGISTRY)
+
+
+def measure_digests(sample_size: int = 16 * 1024 * 1024,
+                    repeat: int = 3) -> Dict[str, float]:
+    """
+    Mide el rendimiento de cada algoritmo registrado en este equipo.
+    
+    Args:
+        sample_size: Bytes hasheados en cada medición
+        repeat: Número de mediciones (se toma la mejor)
+    
+    Returns:
+        Diccionario nombre → bytes por segundo
+    """
+    data = memoryview(bytes(sample_size))
+    results = {}
+    for name, algorithm in _REGISTRY.items():
+        best = float("inf")
+        for _ in range(repeat):
+            hasher = algorithm.new()
+            start = time.perf_counter()
+            for offset in range(0, sample_size, 1024 * 1024):
+                hasher.update(data[offset:offset + 1024 * 1024])
+            hasher.digest()
+            best = min(best, time.perf_counter() - start)
+        results[name] = sample_size / best if best > 0 else float("inf")
+    return results
+
+
+def fastest_digest(sample_size: int = 16 * 1024 * 1024, repeat: int = 3) -> str:
+    """
+    Devuelve el algoritmo registrado más rápido en este equipo.
+    
+    Todos los algoritmos registrados son seguros para firmas, por lo que
+    la elección solo depende del rendimiento.
+    """
+    throughput = measure_digests(sample_size, repeat)
+    return max(throughput, key=throughput.get)
+
+
+register_digest(DigestAlgorithm("sha256", "SHA-256", 32, _hash_factory("SHA256")))
+register_digest(DigestAlgorithm("sha512", "SHA-512", 64, _hash_factory("SHA512")))
+register_digest(DigestAlgorithm("blake2b", "BLAKE2b-512", 64, _hash_factory("SHA256")))
@@ -3,25 +3,294 @@ Módulo de Firma Digital de Documentos
 ======================================
 
 Este módulo implementa las funcionalidades principales de firma digital:
-- Firma de documentos usando RSA y hashing SHA-256
+- Firma de documentos usando RSA (o Ed25519/ECDSA P-256) y hashing SHA-256
+  (o SHA-512/BLAKE2b)
 - Generación de metadatos de firma
-- Serialización de firmas en formato JSON
+- Serialización de firmas en formato JSON o en un contenedor binario compacto
+- Registro de solo anexado para volúmenes altos de firmas (signature_log)
+- Modo por bloques para documentos grandes: árbol de Merkle hasheado en paralelo
+- Firma por lotes en paralelo usando un pool de procesos
 
 Conceptos Criptográficos:
 ------------------------
 - Hash SHA-256: Genera un resumen único del documento (256 bits)
 - Firma RSA: Cifra el hash con la clave privada del firmante
 - Padding PSS: Esquema de relleno probabilístico para mayor seguridad
+- Formato v2: Se firma el digest binario con la versión y el algoritmo, ver signature_format
 """
 
 import os
-import json
-import hashlib
+import threading
 from datetime import datetime
-from typing import Dict, Optional
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from cryptography import x509
+from typing import TYPE_CHECKING, AsyncIterable, Dict, Iterable, List, Optional
+from hash_cache import HashCache
+from signature_container import STORAGE_FORMATS, read_signature_file, write_signature_file
+from signature_log import SignatureLog
+from hashing import hash_async_stream, hash_file, hash_stream
+from digest_registry import DEFAULT_DIGEST, get_digest
+from merkle import DEFAULT_MERKLE_CHUNK_SIZE, MERKLE_HASH_MODE, chunk_hashes, merkle_root
+from signature_format import (CURRENT_FORMAT_VERSION, SIGNATURE_FORMAT_V1,
+                              SUPPORTED_FORMAT_VERSIONS, encode_signature)
+from signature_schemes import DEFAULT_SCHEME, PrivateKey, get_scheme, scheme_for_key
+from trust_store import key_fingerprint
+from events import emit
+from metrics import REGISTRY, sign_seconds, signature_write_seconds
+
+if TYPE_CHECKING:
+    from cryptography import x509
+    from signature_catalog import SignatureCatalog
+
+
+# Clave privada cargada en cada proceso trabajador de sign_many().
+# Se carga una sola vez por proceso mediante _init_sign_worker().
+_worker_private_key = None
+_worker_signer = None
+_worker_format_version = CURRENT_FORMAT_VERSION
+_worker_digest = DEFAULT_DIGEST
+_worker_key_fingerprint = None
+# True en los procesos del pool: las métricas se devuelven con cada resultado
+_worker_in_pool = False
+# Sin pool, el lote se firma en el proceso actual con las mismas variables:
+# un lote a la vez
+_inline_worker_lock = threading.Lock()
+
+# Formato de almacenamiento que anexa las firmas a un SignatureLog
+LOG_STORAGE_FORMAT = "log"
+
+
+def _sign_hash(private_key: PrivateKey, document_hash: str,
+               format_version: int = CURRENT_FORMAT_VERSION,
+               digest: str = DEFAULT_DIGEST) -> bytes:
+    """
+    Firma un hash hexadecimal con el esquema de la clave (RSA-PSS, Ed25519 o ECDSA).
+    
+    Args:
+        private_key: Clave privada del firmante
+        document_hash: Hash hexadecimal del documento
+        format_version: Versión del formato de firma (1: hash en texto, 2: digest binario)
+        digest: Algoritmo con el que se calculó el hash (ver digest_registry)
+    
+    Returns:
+        Bytes de la firma del esquema de la clave
+    """
+    scheme = scheme_for_key(private_key)
+    with sign_seconds.time():
+        return scheme.sign(private_key, document_hash, format_version, digest)
+
+
+def signer_from_certificate(certificate: "x509.Certificate") -> Dict[str, str]:
+    """
+    Extrae la información del firmante que se guarda en la firma.
+    
+    Args:
+        certificate: Certificado del firmante
+    
+    Returns:
+        Diccionario con nombre, organización y número de serie
+    """
+    from cryptography.x509.oid import NameOID
+    subject = certificate.subject
+    return {
+        "nombre": subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
+        "organizacion": subject.get_attributes_for_oid(NameOID.ORGANIZATION_NAME)[0].value,
+        "certificado_serie": str(certificate.serial_number)
+    }
+
+
+def _build_signature_data(document_path: str, document_hash: str,
+                          signature_bytes: bytes, key_size: int,
+                          signer: Optional[Dict[str, str]] = None,
+                          format_version: int = CURRENT_FORMAT_VERSION,
+                          digest: str = DEFAULT_DIGEST,
+                          scheme: str = DEFAULT_SCHEME,
+                          key_fingerprint: Optional[str] = None) -> Dict:
+    """
+    Construye el diccionario de metadatos de una firma.
+    
+    Args:
+        document_path: Ruta del documento firmado
+        document_hash: Hash hexadecimal del documento
+        signature_bytes: Bytes de la firma (RSA-PSS, Ed25519 o ECDSA)
+        key_size: Tamaño de la clave en bits
+        signer: Información opcional del firmante
+        format_version: Versión del formato de firma
+        digest: Algoritmo con el que se calculó el hash
+        scheme: Esquema de firma (ver signature_schemes)
+        key_fingerprint: Huella de la clave pública del firmante (ver trust_store)
+    
+    Returns:
+        Diccionario con los datos de la firma
+    """
+    signature_data = {
+        "document_name": os.path.basename(document_path),
+        "document_hash": document_hash,
+        # v1: hexadecimal, v2: base64
+        "signature": encode_signature(signature_bytes, format_version),
+        "timestamp": datetime.now().isoformat(),
+        "algorithm": f"{get_scheme(scheme).label} with {get_digest(digest).label}",
+        "key_size": key_size
+    }
+    
+    # Los archivos v1 se mantienen idénticos al formato original
+    if format_version != SIGNATURE_FORMAT_V1:
+        signature_data["format_version"] = format_version
+        # Permite al verificador encontrar la clave en un TrustStore
+        if key_fingerprint:
+            signature_data["key_fingerprint"] = key_fingerprint
+    
+    # Las firmas SHA-256 no llevan el campo, como las anteriores al registro
+    if digest != DEFAULT_DIGEST:
+        signature_data["hash_algorithm"] = digest
+    if scheme != DEFAULT_SCHEME:
+        signature_data["signature_scheme"] = scheme
+    
+    if signer:
+        signature_data["signer"] = signer
+    
+    return signature_data
+
+
+def create_signature(document_name: str, document_hash: str, private_key: PrivateKey,
+                     signer: Optional[Dict[str, str]] = None,
+                     format_version: int = CURRENT_FORMAT_VERSION,
+                     digest: str = DEFAULT_DIGEST,
+                     fingerprint: Optional[str] = None) -> Dict:
+    """
+    Firma un hash ya calculado y construye los datos de la firma.
+    
+    A diferencia de DigitalSignature.sign_digest(), no emite eventos ni
+    necesita un directorio de firmas: la usan los servicios que mantienen
+    las claves en memoria (sign_many, signing_daemon).
+    
+    Args:
+        document_name: Nombre (o ruta) del documento firmado
+        document_hash: Hash hexadecimal del documento
+        private_key: Clave privada del firmante
+        signer: Información opcional del firmante (ver signer_from_certificate)
+        format_version: Versión del formato de firma
+        digest: Algoritmo con el que se calculó el hash
+        fingerprint: Huella de la clave pública (None: se calcula)
+    
+    Returns:
+        Diccionario con los datos de la firma
+    """
+    signature_bytes = _sign_hash(private_key, document_hash, format_version, digest)
+    scheme = scheme_for_key(private_key)
+    return _build_signature_data(
+        document_name, document_hash, signature_bytes, scheme.key_size(private_key),
+        signer, format_version, digest, scheme.name,
+        fingerprint or key_fingerprint(private_key)
+    )
+
+
+def _default_output_name(document_path: str) -> str:
+    """Genera el nombre de archivo de firma por defecto para un documento."""
+    doc_name = os.path.splitext(os.path.basename(document_path))[0]
+    return f"{doc_name}_signature"
+
+
+def output_name_collisions(document_paths: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Documentos distintos que tendrían el mismo archivo de firma por defecto.
+    
+    El nombre solo depende del nombre del documento: a/informe.pdf y
+    b/informe.pdf (p. ej. de un glob recursivo) se pisarían la firma.
+    
+    Args:
+        document_paths: Rutas de los documentos
+    
+    Returns:
+        Diccionario nombre de firma -> rutas que lo comparten (vacío si no hay)
+    """
+    by_name: Dict[str, Dict[str, str]] = {}
+    for path in document_paths:
+        # Una misma ruta escrita de dos formas no es una colisión
+        by_name.setdefault(_default_output_name(path), {}) \
+            .setdefault(os.path.normcase(os.path.abspath(path)), path)
+    return {name: list(paths.values()) for name, paths in by_name.items() if len(paths) > 1}
+
+
+def _init_sign_worker(private_key_pem: bytes, signer: Optional[Dict[str, str]],
+                      format_version: int = CURRENT_FORMAT_VERSION,
+                      digest: str = DEFAULT_DIGEST, in_pool: bool = False) -> None:
+    """
+    Inicializa un proceso trabajador de sign_many().
+    
+    La clave privada se deserializa UNA sola vez por proceso, en lugar
+    de hacerlo para cada documento del lote.
+    
+    Args:
+        private_key_pem: Clave privada serializada en PEM (sin cifrar)
+        signer: Información del firmante a incluir en cada firma
+        format_version: Versión del formato de firma del lote
+        digest: Algoritmo de hash del lote
+        in_pool: True si se ejecuta en un proceso del pool (ver _sign_worker)
+    """
+    global _worker_private_key, _worker_signer, _worker_format_version, _worker_digest
+    global _worker_key_fingerprint, _worker_in_pool
+    from cryptography.hazmat.primitives import serialization
+    _worker_private_key = serialization.load_pem_private_key(private_key_pem, password=None)
+    _worker_key_fingerprint = key_fingerprint(_worker_private_key)
+    _worker_signer = signer
+    _worker_format_version = format_version
+    _worker_digest = digest
+    _worker_in_pool = in_pool
+    if in_pool:
+        # Con fork, el proceso hereda las métricas del principal: empezar de cero
+        REGISTRY.reset()
+
+
+def _reset_sign_worker() -> None:
+    """Descarta la clave y los datos del lote cargados por _init_sign_worker()."""
+    global _worker_private_key, _worker_signer, _worker_format_version, _worker_digest
+    global _worker_key_fingerprint, _worker_in_pool
+    _worker_private_key = None
+    _worker_signer = None
+    _worker_format_version = CURRENT_FORMAT_VERSION
+    _worker_digest = DEFAULT_DIGEST
+    _worker_key_fingerprint = None
+    _worker_in_pool = False
+
+
+def _sign_worker(task: tuple) -> Dict:
+    """
+    Firma un documento dentro de un proceso trabajador.
+    
+    Los errores se capturan y se devuelven en el resultado para que un
+    archivo defectuoso no detenga el resto del lote.
+    
+    Args:
+        task: Tupla (ruta_documento, ruta del archivo de firma o None, hash en caché o None)
+    
+    Returns:
+        Diccionario con el resultado de la firma del documento
+    """
+    document_path, signature_path, cached_hash = task
+    result = {"documento": document_path, "exito": False, "firma": None,
+              "archivo_firma": None, "error": None}
+    
+    try:
+        document_hash = cached_hash or hash_file(document_path, _worker_digest)
+        signature_data = create_signature(
+            document_path, document_hash, _worker_private_key, _worker_signer,
+            _worker_format_version, _worker_digest, _worker_key_fingerprint
+        )
+        
+        if signature_path is not None:
+            with signature_write_seconds.time():
+                write_signature_file(signature_data, signature_path)
+            result["archivo_firma"] = signature_path
+        
+        result["firma"] = signature_data
+        result["exito"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    
+    if _worker_in_pool:
+        # Las métricas de este proceso se suman en el principal (sign_many)
+        result["_metricas"] = REGISTRY.drain()
+    return result
+
 
 
 class DigitalSignature:
@@ -34,19 +303,36 @@ class DigitalSignature:
     - No repudio: El firmante no puede negar haber firmado
     """
     
-    def __init__(self, signatures_directory: str = "signatures"):
+    def __init__(self, signatures_directory: str = "signatures",
+                 hash_cache: Optional[HashCache] = None,
+                 catalog: Optional["SignatureCatalog"] = None,
+                 storage_format: str = "json"):
         """
         Inicializa el gestor de firmas digitales.
         
         Args:
             signatures_directory: Directorio donde se guardarán las firmas
+            hash_cache: Caché opcional de hashes para no releer documentos sin cambios
+            catalog: Catálogo opcional que indexa cada firma guardada
+            storage_format: "json" (legible), "binary" (contenedor compacto .sig)
+                            o "log" (registro de solo anexado en <directorio>/log)
         """
+        if storage_format not in STORAGE_FORMATS and storage_format != LOG_STORAGE_FORMAT:
+            raise ValueError(f"Formato de almacenamiento desconocido: {storage_format}")
+        
         self.signatures_directory = signatures_directory
+        self.storage_format = storage_format
+        self.hash_cache = hash_cache
+        self.catalog = catalog
         os.makedirs(signatures_directory, exist_ok=True)
+        
+        self.signature_log = None
+        if storage_format == LOG_STORAGE_FORMAT:
+            self.signature_log = SignatureLog(os.path.join(signatures_directory, "log"))
     
-    def calculate_hash(self, file_path: str) -> str:
+    def calculate_hash(self, file_path: str, algorithm: str = DEFAULT_DIGEST) -> str:
         """
-        Calcula el hash SHA-256 de un archivo.
+        Calcula el hash SHA-256 (u otro algoritmo registrado) de un archivo.
         
         El hash es una "huella digital" única del archivo:
         - Cualquier cambio en el archivo produce un hash completamente diferente
@@ -55,6 +341,7 @@ class DigitalSignature:
         
         Args:
             file_path: Ruta del archivo a hashear
+            algorithm: Algoritmo de hash (ver digest_registry)
         
         Returns:
             Hash hexadecimal del archivo
@@ -62,21 +349,25 @@ class DigitalSignature:
         Note:
             SHA-256 es el estándar de la industria para firmas digitales
         """
-        sha256_hash = hashlib.sha256()
-        
-        # Leer el archivo en bloques para manejar archivos grandes
-        with open(file_path, "rb") as f:
-            # Leer en bloques de 64KB
-            for byte_block in iter(lambda: f.read(65536), b""):
-                sha256_hash.update(byte_block)
-        
-        hash_hex = sha256_hash.hexdigest()
-        print(f"✓ Hash calculado: {hash_hex[:16]}...")
+        get_digest(algorithm)
+        # Si el archivo no cambió desde la última vez, la caché evita leerlo
+        if self.hash_cache is not None:
+            hash_hex = self.hash_cache.get_or_compute(
+                file_path, lambda path: hash_file(path, algorithm), algorithm
+            )
+        else:
+            # Leer el archivo por bloques (o con mmap) para manejar archivos grandes
+            hash_hex = hash_file(file_path, algorithm)
+        emit("hash.calculated", path=file_path, hash=hash_hex, algorithm=algorithm)
         return hash_hex
     
-    def sign_document(self, document_path: str, private_key: rsa.RSAPrivateKey,
-                     certificate: Optional[x509.Certificate] = None,
-                     signer_info: Optional[Dict[str, str]] = None) -> Dict:
+    def sign_document(self, document_path: str, private_key: PrivateKey,
+                     certificate: Optional["x509.Certificate"] = None,
+                     signer_info: Optional[Dict[str, str]] = None,
+                     format_version: int = CURRENT_FORMAT_VERSION,
+                     chunked: bool = False,
+                     chunk_size: int = DEFAULT_MERKLE_CHUNK_SIZE,
+                     digest: str = DEFAULT_DIGEST) -> Dict:
         """
         Firma un documento digitalmente.
         
@@ -90,6 +381,13 @@ class DigitalSignature:
             private_key: Clave privada del firmante
             certificate: Certificado opcional del firmante
             signer_info: Información adicional del firmante
+            format_version: Versión del formato de firma (2 por defecto, 1 para
+                            compatibilidad con verificadores antiguos)
+            chunked: Si es True, el documento se hashea por bloques en paralelo
+                     y se firma la raíz del árbol de Merkle (ver merkle.py)
+            chunk_size: Tamaño de bloque en bytes del modo por bloques
+            digest: Algoritmo de hash: "sha256" (por defecto), "sha512" o "blake2b".
+                    Se guarda en la firma para que el verificador lo use
         
         Returns:
             Diccionario con los datos de la firma
@@ -98,84 +396,220 @@ class DigitalSignature:
             - Solo el propietario de la clave privada puede crear esta firma
             - La firma es única para este documento específico
         """
-        print(f"\n📝 Firmando documento: {os.path.basename(document_path)}")
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Versión de formato de firma no soportada: {format_version}")
+        get_digest(digest)
+        if chunked and digest != DEFAULT_DIGEST:
+            raise ValueError("El modo por bloques solo admite SHA-256")
+        
+        emit("sign.started", document=os.path.basename(document_path))
+        
+        if chunked:
+            return self._sign_chunked(document_path, private_key, certificate,
+                                      signer_info, format_version, chunk_size)
         
         # 1. Calcular el hash del documento
-        document_hash = self.calculate_hash(document_path)
-        
-        # 2. Firmar el hash con la clave privada
-        # PSS (Probabilistic Signature Scheme) es más seguro que PKCS1v15
-        signature_bytes = private_key.sign(
-            document_hash.encode(),  # Convertir hash a bytes
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),  # Función de generación de máscara
-                salt_length=padding.PSS.MAX_LENGTH  # Longitud máxima de sal
-            ),
-            hashes.SHA256()
-        )
+        document_hash = self.calculate_hash(document_path, digest)
         
-        # 3. Preparar metadatos de la firma
-        signature_data = {
-            "document_name": os.path.basename(document_path),
-            "document_hash": document_hash,
-            "signature": signature_bytes.hex(),  # Convertir bytes a hexadecimal
-            "timestamp": datetime.now().isoformat(),
-            "algorithm": "RSA-PSS with SHA-256",
-            "key_size": private_key.key_size
-        }
-        
-        # Añadir información del certificado si está disponible
-        if certificate:
-            subject = certificate.subject
-            signature_data["signer"] = {
-                "nombre": subject.get_attributes_for_oid(x509.oid.NameOID.COMMON_NAME)[0].value,
-                "organizacion": subject.get_attributes_for_oid(x509.oid.NameOID.ORGANIZATION_NAME)[0].value,
-                "certificado_serie": str(certificate.serial_number)
-            }
-        elif signer_info:
-            signature_data["signer"] = signer_info
-        
-        print(f"✓ Documento firmado exitosamente")
-        print(f"  Algoritmo: {signature_data['algorithm']}")
-        print(f"  Tamaño de clave: {signature_data['key_size']} bits")
+        # 2 y 3. Firmar el hash y preparar los metadatos
+        return self.sign_digest(document_path, document_hash, private_key,
+                                certificate, signer_info, format_version, digest)
+    
+    def _sign_chunked(self, document_path: str, private_key: PrivateKey,
+                      certificate: Optional["x509.Certificate"],
+                      signer_info: Optional[Dict[str, str]],
+                      format_version: int, chunk_size: int) -> Dict:
+        """
+        Firma un documento en modo por bloques.
         
+        El campo document_hash contiene la raíz de Merkle; los hashes de los
+        bloques se guardan para que la verificación pueda localizar cambios.
+        """
+        leaves, document_size = chunk_hashes(document_path, chunk_size)
+        root = merkle_root(leaves)
+        emit("sign.merkle_root", chunks=len(leaves), root=root)
+        
+        signature_data = self.sign_digest(document_path, root, private_key,
+                                          certificate, signer_info, format_version)
+        signature_data.update({
+            "hash_mode": MERKLE_HASH_MODE,
+            "chunk_size": chunk_size,
+            "document_size": document_size,
+            "chunk_hashes": leaves
+        })
         return signature_data
     
+    def sign_digest(self, document_name: str, document_hash: str,
+                    private_key: PrivateKey,
+                    certificate: Optional["x509.Certificate"] = None,
+                    signer_info: Optional[Dict[str, str]] = None,
+                    format_version: int = CURRENT_FORMAT_VERSION,
+                    digest: str = DEFAULT_DIGEST) -> Dict:
+        """
+        Firma un hash ya calculado y construye los datos de la firma.
+        
+        Útil cuando el hash se calcula en otro lugar (un flujo asíncrono, un
+        servicio remoto): no se lee ningún archivo.
+        
+        Args:
+            document_name: Nombre (o ruta) del documento firmado
+            document_hash: Hash hexadecimal del documento
+            private_key: Clave privada del firmante
+            certificate: Certificado opcional del firmante
+            signer_info: Información adicional del firmante
+            format_version: Versión del formato de firma
+            digest: Algoritmo con el que se calculó el hash
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Versión de formato de firma no soportada: {format_version}")
+        get_digest(digest)
+        
+        # Firmar el hash con la clave privada y preparar los metadatos,
+        # con la información del certificado si está disponible
+        signer = signer_from_certificate(certificate) if certificate else signer_info
+        signature_data = create_signature(document_name, document_hash, private_key,
+                                          signer, format_version, digest)
+        
+        emit("sign.completed", document=document_name, algorithm=signature_data["algorithm"],
+             key_size=signature_data["key_size"])
+        
+        return signature_data
+    
+    def sign_stream(self, stream, private_key: PrivateKey, document_name: str,
+                    certificate: Optional["x509.Certificate"] = None,
+                    signer_info: Optional[Dict[str, str]] = None,
+                    format_version: int = CURRENT_FORMAT_VERSION,
+                    digest: str = DEFAULT_DIGEST) -> Dict:
+        """
+        Firma datos que llegan por un flujo, sin guardarlos en disco.
+        
+        El hash se calcula a medida que se leen los datos y la firma se
+        genera al terminar el flujo. Útil para subidas, tuberías y stdin.
+        
+        Args:
+            stream: Objeto binario tipo archivo (p. ej. sys.stdin.buffer) o
+                    iterable de bloques de bytes
+            private_key: Clave privada del firmante
+            document_name: Nombre con el que se registra el documento en la firma
+            certificate: Certificado opcional del firmante
+            signer_info: Información adicional del firmante
+            format_version: Versión del formato de firma
+            digest: Algoritmo de hash (ver digest_registry)
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Versión de formato de firma no soportada: {format_version}")
+        get_digest(digest)
+        
+        emit("sign.stream_started", document=document_name)
+        
+        document_hash, _ = hash_stream(stream, digest)
+        emit("hash.calculated", path=document_name, hash=document_hash, algorithm=digest)
+        
+        return self.sign_digest(document_name, document_hash, private_key,
+                                certificate, signer_info, format_version, digest)
+    
+    async def sign_async_stream(self, stream: AsyncIterable[bytes],
+                                private_key: PrivateKey, document_name: str,
+                                certificate: Optional["x509.Certificate"] = None,
+                                signer_info: Optional[Dict[str, str]] = None,
+                                format_version: int = CURRENT_FORMAT_VERSION,
+                                digest: str = DEFAULT_DIGEST) -> Dict:
+        """
+        Versión asíncrona de sign_stream() para iteradores asíncronos de bytes.
+        
+        Args:
+            stream: Iterador asíncrono de bloques de bytes
+            private_key: Clave privada del firmante
+            document_name: Nombre con el que se registra el documento en la firma
+            certificate: Certificado opcional del firmante
+            signer_info: Información adicional del firmante
+            format_version: Versión del formato de firma
+            digest: Algoritmo de hash (ver digest_registry)
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Versión de formato de firma no soportada: {format_version}")
+        get_digest(digest)
+        
+        emit("sign.stream_started", document=document_name)
+        
+        document_hash, _ = await hash_async_stream(stream, digest)
+        emit("hash.calculated", path=document_name, hash=document_hash, algorithm=digest)
+        
+        return self.sign_digest(document_name, document_hash, private_key,
+                                certificate, signer_info, format_version, digest)
+    
     def save_signature(self, signature_data: Dict, output_filename: str) -> str:
         """
-        Guarda la firma digital en un archivo JSON.
+        Guarda la firma digital en un archivo JSON (o .sig en formato binario).
+        
+        Con el formato "log" la firma se anexa al registro de firmas y
+        `output_filename` pasa a ser su identificador.
         
         Args:
             signature_data: Datos de la firma
             output_filename: Nombre del archivo de firma (sin extensión)
         
         Returns:
-            Ruta del archivo de firma guardado
+            Ruta del archivo de firma guardado (o identificador en el registro)
         """
-        filepath = os.path.join(self.signatures_directory, f"{output_filename}.json")
+        if self.signature_log is not None:
+            with signature_write_seconds.time():
+                self.signature_log.append(output_filename, signature_data)
+            if self.catalog is not None:
+                self.catalog.add(self._log_location(output_filename), signature_data)
+            emit("signature.appended", record_id=output_filename)
+            return output_filename
+        
+        filepath = self._signature_path(output_filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(signature_data, f, indent=4, ensure_ascii=False)
+        with signature_write_seconds.time():
+            write_signature_file(signature_data, filepath)
         
-        print(f"✓ Firma guardada en: {filepath}")
+        if self.catalog is not None:
+            self.catalog.add(filepath, signature_data)
+        
+        emit("signature.saved", path=filepath)
         return filepath
     
     def load_signature(self, signature_path: str) -> Dict:
         """
-        Carga una firma digital desde un archivo JSON.
+        Carga una firma digital desde un archivo JSON o binario.
+        
+        El formato se detecta automáticamente por el contenido del archivo.
+        Con el formato "log" también se aceptan identificadores del registro.
         
         Args:
-            signature_path: Ruta del archivo de firma
+            signature_path: Ruta del archivo de firma o identificador en el registro
         
         Returns:
             Diccionario con los datos de la firma
         """
-        with open(signature_path, 'r', encoding='utf-8') as f:
-            signature_data = json.load(f)
+        if self.signature_log is not None and signature_path in self.signature_log:
+            signature_data = self.signature_log.get(signature_path)
+        else:
+            signature_data = read_signature_file(signature_path)
         
-        print(f"✓ Firma cargada desde: {signature_path}")
+        emit("signature.loaded", path=signature_path)
         return signature_data
     
+    def _signature_path(self, output_filename: str) -> str:
+        """Devuelve la ruta del archivo de firma según el formato de almacenamiento."""
+        extension = STORAGE_FORMATS[self.storage_format]
+        return os.path.join(self.signatures_directory, f"{output_filename}{extension}")
+    
+    def _log_location(self, record_id: str) -> str:
+        """Ruta con la que el catálogo identifica una firma del registro."""
+        return os.path.join(self.signature_log.directory, record_id)
+    
     def display_signature_info(self, signature_data: Dict) -> None:
         """
         Muestra información detallada de una firma digital.
@@ -191,6 +625,8 @@ class DigitalSignature:
         print(f"Fecha y hora: {signature_data['timestamp']}")
         print(f"Algoritmo: {signature_data['algorithm']}")
         print(f"Tamaño de clave: {signature_data['key_size']} bits")
+        if 'key_fingerprint' in signature_data:
+            print(f"Huella de la clave: {signature_data['key_fingerprint'][:32]}...")
         
         if 'signer' in signature_data:
             print("\nInformación del Firmante:")
@@ -200,9 +636,10 @@ class DigitalSignature:
         print(f"\nFirma (primeros 64 caracteres): {signature_data['signature'][:64]}...")
         print("="*60 + "\n")
     
-    def sign_and_save(self, document_path: str, private_key: rsa.RSAPrivateKey,
-                     certificate: Optional[x509.Certificate] = None,
-                     output_name: Optional[str] = None) -> str:
+    def sign_and_save(self, document_path: str, private_key: PrivateKey,
+                     certificate: Optional["x509.Certificate"] = None,
+                     output_name: Optional[str] = None,
+                     chunked: bool = False) -> str:
         """
         Método de conveniencia que firma y guarda en un solo paso.
         
@@ -211,19 +648,152 @@ class DigitalSignature:
             private_key: Clave privada del firmante
             certificate: Certificado opcional
             output_name: Nombre personalizado para el archivo de firma
+            chunked: Si es True, firma en modo por bloques (árbol de Merkle)
         
         Returns:
             Ruta del archivo de firma guardado
         """
         # Generar nombre de salida si no se proporciona
         if not output_name:
-            doc_name = os.path.splitext(os.path.basename(document_path))[0]
-            output_name = f"{doc_name}_signature"
+            output_name = _default_output_name(document_path)
         
         # Firmar el documento
-        signature_data = self.sign_document(document_path, private_key, certificate)
+        signature_data = self.sign_document(document_path, private_key, certificate,
+                                            chunked=chunked)
         
         # Guardar la firma
         signature_path = self.save_signature(signature_data, output_name)
         
         return signature_path
+    
+    @staticmethod
+    def _collision_result(document_path: str, output_name: str) -> Dict:
+        """Resultado de sign_many() de un documento que comparte archivo de firma."""
+        return {"documento": document_path, "exito": False, "firma": None,
+                "archivo_firma": None,
+                "error": (f"Otro documento del lote con el mismo nombre usaría el archivo "
+                          f"de firma '{output_name}'")}
+    
+    def sign_many(self, document_paths: Iterable[str], private_key: PrivateKey,
+                  certificate: Optional["x509.Certificate"] = None,
+                  signer_info: Optional[Dict[str, str]] = None,
+                  save: bool = True,
+                  max_workers: Optional[int] = None,
+                  format_version: int = CURRENT_FORMAT_VERSION,
+                  digest: str = DEFAULT_DIGEST) -> List[Dict]:
+        """
+        Firma un lote de documentos en paralelo usando un pool de procesos.
+        
+        El hash y la firma de cada documento se reparten entre varios
+        procesos, de modo que el rendimiento escala con el número de núcleos.
+        Cada proceso trabajador carga la clave privada una sola vez.
+        
+        Args:
+            document_paths: Rutas de los documentos a firmar
+            private_key: Clave privada del firmante
+            certificate: Certificado opcional del firmante
+            signer_info: Información adicional del firmante (si no hay certificado)
+            save: Si es True, guarda cada firma como <documento>_signature.json
+                  (o .sig con el formato binario, o la anexa al registro con "log")
+            max_workers: Número de procesos (por defecto, uno por núcleo).
+                         Con 1 se firma en el proceso actual, sin pool.
+            format_version: Versión del formato de firma
+            digest: Algoritmo de hash del lote (ver digest_registry)
+        
+        Returns:
+            Lista de resultados en el MISMO orden que document_paths. Cada
+            resultado contiene: documento, exito, firma, archivo_firma y error.
+        
+        Note:
+            Un error en un documento (p. ej. archivo inexistente) se reporta
+            en su resultado y no detiene la firma del resto del lote. Con
+            save, los documentos cuyo archivo de firma coincidiría con el de
+            otro documento del lote no se firman (ver output_name_collisions).
+        """
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"Versión de formato de firma no soportada: {format_version}")
+        get_digest(digest)
+        
+        document_paths = list(document_paths)
+        signer = signer_from_certificate(certificate) if certificate else signer_info
+        collided = {}
+        if save:
+            for name, paths in output_name_collisions(document_paths).items():
+                collided.update((path, name) for path in paths)
+        
+        # Consultar la caché en el proceso principal: los aciertos no se releen
+        cache_keys = {}
+        tasks = []
+        for path in document_paths:
+            if path in collided:
+                continue
+            cached_hash = None
+            if self.hash_cache is not None:
+                try:
+                    cache_keys[path], cached_hash = self.hash_cache.lookup(path, digest)
+                except OSError:
+                    pass
+            signature_path = None
+            if save and self.signature_log is None:
+                signature_path = self._signature_path(_default_output_name(path))
+            tasks.append((path, signature_path, cached_hash))
+        
+        # Las claves privadas no se pueden serializar con pickle: se envían en PEM
+        from cryptography.hazmat.primitives import serialization
+        private_key_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        
+        emit("sign.batch_started", count=len(tasks))
+        
+        if max_workers == 1 or len(tasks) <= 1:
+            # La clave no debe quedarse en el módulo al terminar el lote
+            with _inline_worker_lock:
+                try:
+                    _init_sign_worker(private_key_pem, signer, format_version, digest)
+                    results = [_sign_worker(task) for task in tasks]
+                finally:
+                    _reset_sign_worker()
+        else:
+            # multiprocessing solo se importa cuando hay un pool que crear
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     initializer=_init_sign_worker,
+                                     initargs=(private_key_pem, signer,
+                                               format_version, digest, True)) as executor:
+                # map() conserva el orden de entrada
+                chunksize = max(1, len(tasks) // ((max_workers or os.cpu_count() or 1) * 4))
+                results = list(executor.map(_sign_worker, tasks, chunksize=chunksize))
+            for result in results:
+                REGISTRY.merge(result.pop("_metricas", None))
+        
+        if collided:
+            signed_iter = iter(results)
+            results = [self._collision_result(path, collided[path]) if path in collided
+                       else next(signed_iter) for path in document_paths]
+        
+        if self.hash_cache is not None:
+            for result in results:
+                if result["exito"] and result["documento"] in cache_keys:
+                    self.hash_cache.store(result["documento"], cache_keys[result["documento"]],
+                                          result["firma"]["document_hash"])
+            self.hash_cache.save()
+        
+        if save and self.signature_log is not None:
+            # Los procesos no comparten el registro: se anexa todo el lote de una vez
+            signed_results = [r for r in results if r["exito"]]
+            for result in signed_results:
+                result["archivo_firma"] = _default_output_name(result["documento"])
+            self.signature_log.append_many((r["archivo_firma"], r["firma"])
+                                           for r in signed_results)
+        
+        if self.catalog is not None:
+            locate = self._log_location if self.signature_log is not None else str
+            self.catalog.add_many((locate(r["archivo_firma"]), r["firma"]) for r in results
+                                  if r["exito"] and r["archivo_firma"])
+        
+        signed = sum(1 for r in results if r["exito"])
+        emit("sign.batch_completed", signed=signed, total=len(results))
+        return results
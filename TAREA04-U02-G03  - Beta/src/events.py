@@ -0,0 +1,184 @@
+"""
+Módulo de Eventos
+=================
+
+Los módulos de firma no imprimen en la terminal: emiten eventos
+estructurados (un nombre y sus campos) con emit(). Quien quiera verlos
+registra un oyente:
+
+- console_listener: imprime los mensajes de siempre (con emojis); lo usan
+  main.py y demo.py
+- logging_listener: los envía al logger "firma_digital" del módulo logging
+- Cualquier función listener(event, fields)
+
+Sin oyentes (uso como biblioteca, lotes, demonio), emit() solo comprueba
+que la lista está vacía: no se formatea ningún texto ni se escribe nada.
+
+Ejemplo:
+    with listening(console_listener):
+        signature_manager.sign_document("contrato.pdf", private_key)
+
+Eventos y campos:
+    hash.calculated          path, hash, algorithm
+    sign.started             document
+    sign.stream_started      document
+    sign.merkle_root         chunks, root
+    sign.completed           document, algorithm, key_size
+    sign.batch_started       count
+    sign.batch_completed     signed, total
+    signature.saved          path
+    signature.appended       record_id
+    signature.loaded         path
+    key.generating           label
+    key.generated            label
+    key.saved                kind ("private"/"public"), path
+    key.loaded               kind, path
+    certificate.created
+    certificate.issued
+    certificate.saved        path
+    certificate.loaded       path
+    verify.started           document
+    verify.stream_started    document
+    verify.hashes            original, current
+    verify.integrity_ok
+    verify.signature_ok
+    verify.batch_started     count
+    verify.batch_completed   valid, total, elapsed
+    verify.certificate_started
+    verify.chain_ok
+    verify.certificate_dates not_before, not_after, now
+    verify.certificate_ok
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+Listener = Callable[[str, Dict[str, Any]], None]
+
+# Lista de oyentes registrados. Se sustituye entera al registrar o quitar un
+# oyente, de modo que emit() puede recorrerla sin bloquear
+_listeners: List[Listener] = []
+_lock = threading.Lock()
+
+# Mensaje de consola de cada evento (str.format con los campos del evento)
+CONSOLE_MESSAGES = {
+    "hash.calculated": "✓ Hash calculado: {hash:.16}...",
+    "sign.started": "\n📝 Firmando documento: {document}",
+    "sign.stream_started": "\n📝 Firmando flujo: {document}",
+    "sign.merkle_root": "✓ Raíz de Merkle calculada ({chunks} bloques): {root:.16}...",
+    "sign.completed": ("✓ Documento firmado exitosamente\n"
+                       "  Algoritmo: {algorithm}\n"
+                       "  Tamaño de clave: {key_size} bits"),
+    "sign.batch_started": "\n📝 Firmando lote de {count} documentos...",
+    "sign.batch_completed": "✓ Lote firmado: {signed}/{total} documentos",
+    "signature.saved": "✓ Firma guardada en: {path}",
+    "signature.appended": "✓ Firma anexada al registro: {record_id}",
+    "signature.loaded": "✓ Firma cargada desde: {path}",
+    "key.generating": "Generando par de claves {label}...",
+    "key.generated": "✓ Par de claves generado exitosamente",
+    "key.saved": "✓ Clave {kind_es} guardada en: {path}",
+    "key.loaded": "✓ Clave {kind_es} cargada desde: {path}",
+    "certificate.created": "✓ Certificado digital creado",
+    "certificate.issued": "✓ Certificado emitido por la CA",
+    "certificate.saved": "✓ Certificado guardado en: {path}",
+    "certificate.loaded": "✓ Certificado cargado desde: {path}",
+    "verify.started": "\n🔍 Verificando firma del documento: {document}",
+    "verify.stream_started": "\n🔍 Verificando firma del flujo: {document}",
+    "verify.hashes": "Hash original: {original:.32}...\nHash actual:   {current:.32}...",
+    "verify.integrity_ok": "✓ Integridad verificada: los hashes coinciden",
+    "verify.signature_ok": "✓ Firma criptográfica verificada",
+    "verify.batch_started": "\n🔍 Verificando lote de {count} documentos...",
+    "verify.batch_completed": ("✓ Lote verificado: {valid}/{total} firmas válidas "
+                               "en {elapsed:.3f} s"),
+    "verify.certificate_started": "\n🔐 Verificando certificado digital...",
+    "verify.chain_ok": "✓ Cadena de confianza verificada",
+    "verify.certificate_dates": ("Válido desde: {not_before}\n"
+                                 "Válido hasta: {not_after}\n"
+                                 "Fecha actual: {now}"),
+    "verify.certificate_ok": "✓ Certificado válido temporalmente",
+}
+
+_KEY_KINDS = {"private": "privada", "public": "pública"}
+
+
+def emit(event: str, **fields: Any) -> None:
+    """
+    Notifica un evento a los oyentes registrados.
+    
+    Args:
+        event: Nombre del evento (ver la lista del módulo)
+        **fields: Datos del evento, sin formatear
+    """
+    listeners = _listeners
+    if not listeners:
+        return
+    for listener in listeners:
+        listener(event, fields)
+
+
+def has_listeners() -> bool:
+    """Indica si hay algún oyente (para evitar preparar campos costosos)."""
+    return bool(_listeners)
+
+
+def subscribe(listener: Listener) -> Listener:
+    """Registra un oyente; se devuelve para poder quitarlo después."""
+    global _listeners
+    with _lock:
+        _listeners = _listeners + [listener]
+    return listener
+
+
+def unsubscribe(listener: Listener) -> None:
+    """Quita un oyente registrado (no hace nada si no lo estaba)."""
+    global _listeners
+    with _lock:
+        _listeners = [registered for registered in _listeners if registered is not listener]
+
+
+@contextmanager
+def listening(listener: Listener) -> Iterator[Listener]:
+    """Registra un oyente mientras dura el bloque with."""
+    subscribe(listener)
+    try:
+        yield listener
+    finally:
+        unsubscribe(listener)
+
+
+def format_event(event: str, fields: Dict[str, Any]) -> str:
+    """
+    Texto legible de un evento.
+    
+    Returns:
+        El mensaje de CONSOLE_MESSAGES, o "evento campo=valor ..." si el
+        evento no tiene mensaje
+    """
+    template = CONSOLE_MESSAGES.get(event)
+    if template is None:
+        return " ".join([event] + [f"{name}={value}" for name, value in fields.items()])
+    if "kind" in fields:
+        fields = dict(fields, kind_es=_KEY_KINDS.get(fields["kind"], fields["kind"]))
+    return template.format(**fields)
+
+
+def console_listener(event: str, fields: Dict[str, Any]) -> None:
+    """Imprime el evento en stdout como los mensajes de la aplicación."""
+    print(format_event(event, fields))
+
+
+def stream_listener(stream) -> Listener:
+    """Oyente que escribe los mensajes en otro flujo (p. ej. sys.stderr)."""
+    def listener(event: str, fields: Dict[str, Any]) -> None:
+        print(format_event(event, fields), file=stream)
+    return listener
+
+
+def logging_listener(event: str, fields: Dict[str, Any]) -> None:
+    """Envía el evento al logger "firma_digital" (nivel INFO, campos en extra)."""
+    # logging solo se importa si se usa este oyente (arranque rápido del CLI)
+    import logging
+    logger = logging.getLogger("firma_digital")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(format_event(event, fields), extra={"event": event, "fields": fields})
@@ -0,0 +1,277 @@
+"""
+Módulo de Caché de Hashes de Documentos
+========================================
+
+Este módulo implementa una caché persistente de hashes de archivos que
+comparten DigitalSignature y SignatureVerifier:
+- Evita volver a leer documentos que no han cambiado desde la última vez
+- Persiste en disco (JSON) entre ejecuciones
+- Limita su tamaño expulsando las entradas menos usadas (LRU)
+- Lleva contadores de aciertos y fallos
+
+Identificación de un archivo:
+-----------------------------
+La clave de la caché es (algoritmo, dispositivo, inodo, tamaño, mtime_ns).
+Si cualquiera de estos valores cambia, el archivo se vuelve a hashear.
+Los archivos modificados hace menos de `racy_window` segundos no se guardan,
+ya que una segunda escritura dentro del mismo tick de mtime no sería detectada.
+
+Los cambios pendientes se guardan con close() (o al salir de un bloque
+with) y, para las cachés que siguen abiertas, al terminar el programa.
+"""
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Cachés abiertas que se guardan al terminar el programa. Con referencias
+# débiles, registrar una caché no impide liberarla
+_open_caches: "weakref.WeakSet[HashCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def _save_open_caches() -> None:
+    """Guarda los cambios pendientes de las cachés que no se cerraron."""
+    for cache in list(_open_caches):
+        try:
+            cache.save()
+        except OSError:
+            # El directorio de la caché ya no existe: solo cuesta volver a hashear
+            pass
+
+
+class HashCache:
+    """
+    Caché persistente de hashes indexada por los metadatos del archivo.
+    
+    Un acierto devuelve el hash sin abrir el documento, por lo que un
+    documento de varios GB que no ha cambiado se "hashea" en microsegundos.
+    """
+    
+    def __init__(self, cache_path: str = ".hash_cache.json",
+                 max_entries: int = 10000,
+                 flush_every: int = 100,
+                 racy_window: float = 2.0):
+        """
+        Inicializa la caché y carga las entradas guardadas en disco.
+        
+        Args:
+            cache_path: Archivo JSON donde se persiste la caché
+            max_entries: Número máximo de entradas antes de expulsar las más antiguas
+            flush_every: Número de escrituras tras las que se guarda en disco
+            racy_window: Segundos mínimos desde la última modificación para cachear
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.racy_window = racy_window
+        
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        
+        self._load()
+        _open_caches.add(self)
+    
+    @staticmethod
+    def file_key(file_path: str, algorithm: str = "sha256") -> Tuple[str, os.stat_result]:
+        """
+        Calcula la clave de caché de un archivo a partir de sus metadatos.
+        
+        Args:
+            file_path: Ruta del archivo
+            algorithm: Algoritmo de hash al que corresponde la entrada
+        
+        Returns:
+            Tupla (clave, resultado de os.stat)
+        """
+        st = os.stat(file_path)
+        key = f"{algorithm}:{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+        return key, st
+    
+    def lookup(self, file_path: str, algorithm: str = "sha256") -> Tuple[str, Optional[str]]:
+        """
+        Busca el hash de un archivo en la caché.
+        
+        Args:
+            file_path: Ruta del archivo
+            algorithm: Algoritmo de hash
+        
+        Returns:
+            Tupla (clave, hash o None si no está en caché)
+        """
+        key, st = self.file_key(file_path, algorithm)
+        
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.bytes_saved += st.st_size
+                self._entries.move_to_end(key)
+        
+        return key, digest
+    
+    def store(self, file_path: str, key: str, digest: str) -> bool:
+        """
+        Guarda un hash si el archivo no cambió mientras se calculaba.
+        
+        Args:
+            file_path: Ruta del archivo
+            key: Clave obtenida con lookup() ANTES de calcular el hash
+            digest: Hash calculado
+        
+        Returns:
+            True si la entrada se guardó en la caché
+        """
+        algorithm = key.split(":", 1)[0]
+        try:
+            current_key, st = self.file_key(file_path, algorithm)
+        except OSError:
+            return False
+        
+        # Si el archivo cambió durante el cálculo, o es demasiado reciente,
+        # el hash podría no corresponder a la clave
+        if current_key != key:
+            return False
+        if time.time() - st.st_mtime < self.racy_window:
+            return False
+        
+        with self._lock:
+            self._entries[key] = digest
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._pending_writes += 1
+            flush = self._pending_writes >= self.flush_every
+        
+        if flush:
+            self.save()
+        return True
+    
+    def get_or_compute(self, file_path: str, compute: Callable[[str], str],
+                       algorithm: str = "sha256") -> str:
+        """
+        Devuelve el hash de un archivo desde la caché o lo calcula.
+        
+        Args:
+            file_path: Ruta del archivo
+            compute: Función que calcula el hash a partir de la ruta
+            algorithm: Algoritmo de hash
+        
+        Returns:
+            Hash hexadecimal del archivo
+        """
+        key, digest = self.lookup(file_path, algorithm)
+        if digest is None:
+            digest = compute(file_path)
+            self.store(file_path, key, digest)
+        return digest
+    
+    def save(self) -> None:
+        """
+        Guarda la caché en disco si hay cambios pendientes.
+        
+        El cerrojo se mantiene desde la copia de las entradas hasta el
+        reemplazo del archivo: dos guardados del mismo proceso no se
+        intercalan, y cada guardado escribe su propio archivo temporal
+        (mkstemp), de modo que tampoco chocan los de otros procesos.
+        """
+        with self._lock:
+            if self._pending_writes == 0:
+                return
+            data = {"version": 1, "entries": list(self._entries.items())}
+            
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            # Escritura atómica: un archivo temporal reemplaza al anterior
+            fd, tmp_path = tempfile.mkstemp(dir=directory or ".",
+                                            prefix=os.path.basename(self.cache_path) + ".",
+                                            suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.cache_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._pending_writes = 0
+    
+    def close(self) -> None:
+        """Guarda los cambios pendientes; la caché deja de guardarse al terminar el programa."""
+        self.save()
+        _open_caches.discard(self)
+    
+    def __enter__(self) -> "HashCache":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def clear(self) -> None:
+        """Elimina todas las entradas y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.bytes_saved = 0
+            self._pending_writes = 1
+        self.save()
+    
+    def stats(self) -> Dict[str, any]:
+        """
+        Devuelve las estadísticas de uso de la caché.
+        
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos, bytes
+            no leídos gracias a la caché y número de entradas
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "aciertos": self.hits,
+                "fallos": self.misses,
+                "tasa_aciertos": self.hits / lookups if lookups else 0.0,
+                "bytes_ahorrados": self.bytes_saved,
+                "entradas": len(self._entries)
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _load(self) -> None:
+        """Carga las entradas guardadas en disco (si existen)."""
+        if not os.path.exists(self.cache_path):
+            return
+        
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = data.get("entries", [])
+        except (OSError, ValueError, AttributeError):
+            # Una caché corrupta se descarta: solo cuesta volver a hashear
+            return
+        if not isinstance(entries, list):
+            return
+        
+        # Las entradas defectuosas se descartan una a una
+        for entry in entries[-self.max_entries:]:
+            if not isinstance(entry, list) or len(entry) != 2:
+                continue
+            key, digest = entry
+            if isinstance(key, str) and isinstance(digest, str):
+                self._entries[key] = digest
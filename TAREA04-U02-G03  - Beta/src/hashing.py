@@ -0,0 +1,208 @@
+"""
+Módulo de Cálculo de Hashes de Archivos
+========================================
+
+Este módulo centraliza la lectura de archivos para calcular su hash,
+compartida por DigitalSignature y SignatureVerifier:
+- mmap: el hash se alimenta directamente desde la memoria mapeada (sin copias)
+- readinto: lectura en un único búfer reutilizado (sin crear un bytes por bloque)
+- read: lectura clásica por bloques, usada como referencia en los benchmarks
+- Flujos: objetos tipo archivo, iterables y iteradores asíncronos de bytes
+
+Selección automática:
+---------------------
+- Archivos regulares grandes: mmap
+- Archivos regulares pequeños, tuberías y dispositivos: readinto
+- El tamaño de bloque crece con el tamaño del archivo
+
+Cada hash calculado se registra en las métricas firma_hash_seconds y
+firma_hash_bytes_total (ver metrics.py).
+"""
+
+import os
+import stat
+import mmap
+import time
+import hashlib
+from typing import AsyncIterable, Iterable, Tuple, Union
+from metrics import observe_hash
+
+# Umbral a partir del cual se usa mmap en modo automático
+MMAP_THRESHOLD = 1024 * 1024  # 1 MB
+
+# Tamaño de bloque para tuberías y archivos cuyo tamaño no se conoce
+DEFAULT_CHUNK_SIZE = 64 * 1024  # 64 KB
+
+BACKENDS = ("auto", "mmap", "readinto", "read")
+
+
+def choose_chunk_size(file_size: int) -> int:
+    """
+    Elige el tamaño de bloque según el tamaño del archivo.
+    
+    Bloques más grandes reducen el número de llamadas al hash y al sistema
+    operativo en archivos grandes, sin desperdiciar memoria en los pequeños.
+    
+    Args:
+        file_size: Tamaño del archivo en bytes
+    
+    Returns:
+        Tamaño de bloque en bytes
+    """
+    if file_size < 1024 * 1024:           # < 1 MB
+        return DEFAULT_CHUNK_SIZE
+    if file_size < 64 * 1024 * 1024:      # < 64 MB
+        return 256 * 1024
+    return 1024 * 1024
+
+
+def _update_mmap(hasher, f, file_size: int, chunk_size: int) -> int:
+    """Alimenta el hash desde una vista mmap del archivo, sin copiar datos."""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            for offset in range(0, file_size, chunk_size):
+                # El slice de un memoryview no copia los bytes
+                with view[offset:offset + chunk_size] as chunk:
+                    hasher.update(chunk)
+    return file_size
+
+
+def _update_readinto(hasher, f, chunk_size: int) -> int:
+    """Alimenta el hash leyendo en un único búfer reutilizado."""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        n = f.readinto(buffer)
+        if not n:
+            break
+        hasher.update(view[:n])
+        total += n
+    view.release()
+    return total
+
+
+def _update_read(hasher, f, chunk_size: int) -> int:
+    """Alimenta el hash con f.read() (crea un objeto bytes por bloque)."""
+    total = 0
+    for byte_block in iter(lambda: f.read(chunk_size), b""):
+        hasher.update(byte_block)
+        total += len(byte_block)
+    return total
+
+
+def hash_file(file_path: str, algorithm: str = "sha256", backend: str = "auto") -> str:
+    """
+    Calcula el hash de un archivo con el backend de lectura indicado.
+    
+    Args:
+        file_path: Ruta del archivo (también se aceptan tuberías y dispositivos)
+        algorithm: Nombre del algoritmo en hashlib
+        backend: "auto", "mmap", "readinto" o "read"
+    
+    Returns:
+        Hash hexadecimal del archivo
+    
+    Note:
+        Si el archivo no es regular (tubería, /dev/stdin...) o mmap falla,
+        se usa readinto automáticamente.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de hash desconocido: {backend}")
+    
+    start = time.perf_counter()
+    hasher = hashlib.new(algorithm)
+    
+    # buffering=0: lectura directa, sin el búfer intermedio de Python
+    with open(file_path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        is_regular = stat.S_ISREG(st.st_mode)
+        chunk_size = choose_chunk_size(st.st_size) if is_regular else DEFAULT_CHUNK_SIZE
+        
+        if backend == "auto":
+            backend = "mmap" if is_regular and st.st_size >= MMAP_THRESHOLD else "readinto"
+        
+        if backend == "mmap" and is_regular and st.st_size > 0:
+            try:
+                size = _update_mmap(hasher, f, st.st_size, chunk_size)
+                observe_hash(time.perf_counter() - start, size)
+                return hasher.hexdigest()
+            except (OSError, ValueError):
+                # Sistemas de archivos sin soporte de mmap: volver a empezar
+                hasher = hashlib.new(algorithm)
+                f.seek(0)
+        
+        if backend == "read":
+            size = _update_read(hasher, f, chunk_size)
+        else:
+            size = _update_readinto(hasher, f, chunk_size)
+    
+    observe_hash(time.perf_counter() - start, size)
+    return hasher.hexdigest()
+
+
+def hash_stream(stream: Union[Iterable[bytes], object], algorithm: str = "sha256",
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, int]:
+    """
+    Calcula el hash de un flujo de datos a medida que se lee.
+    
+    Los datos nunca se guardan en disco ni se acumulan en memoria.
+    
+    Args:
+        stream: Objeto binario tipo archivo (sys.stdin.buffer, BytesIO,
+                socket.makefile...) o iterable de bloques de bytes
+        algorithm: Nombre del algoritmo en hashlib
+        chunk_size: Tamaño de bloque para los objetos tipo archivo
+    
+    Returns:
+        Tupla (hash hexadecimal, número de bytes leídos)
+    """
+    start = time.perf_counter()
+    hasher = hashlib.new(algorithm)
+    total = 0
+    
+    if hasattr(stream, "readinto"):
+        buffer = bytearray(chunk_size)
+        with memoryview(buffer) as view:
+            while True:
+                n = stream.readinto(buffer)
+                if not n:
+                    break
+                hasher.update(view[:n])
+                total += n
+    elif hasattr(stream, "read"):
+        for block in iter(lambda: stream.read(chunk_size), b""):
+            hasher.update(block)
+            total += len(block)
+    else:
+        for block in stream:
+            hasher.update(block)
+            total += len(block)
+    
+    # Incluye la espera de los datos del flujo, no solo el cálculo del hash
+    observe_hash(time.perf_counter() - start, total)
+    return hasher.hexdigest(), total
+
+
+async def hash_async_stream(stream: AsyncIterable[bytes],
+                            algorithm: str = "sha256") -> Tuple[str, int]:
+    """
+    Calcula el hash de un iterador asíncrono de bloques de bytes.
+    
+    Args:
+        stream: Iterador asíncrono (p. ej. el cuerpo de una petición HTTP)
+        algorithm: Nombre del algoritmo en hashlib
+    
+    Returns:
+        Tupla (hash hexadecimal, número de bytes leídos)
+    """
+    start = time.perf_counter()
+    hasher = hashlib.new(algorithm)
+    total = 0
+    
+    async for block in stream:
+        hasher.update(block)
+        total += len(block)
+    
+    observe_hash(time.perf_counter() - start, total)
+    return hasher.hexdigest(), total
@@ -0,0 +1,345 @@
+"""
+Módulo de Verificación Incremental
+==================================
+
+Reverificación periódica (p. ej. nocturna) de directorios firmados en la
+que el tiempo depende de lo que cambió, no del tamaño del corpus.
+
+Se guarda una instantánea con, por cada documento verificado:
+    tamaño, mtime_ns, inodo, hash verificado y huella de la firma
+
+En la siguiente ejecución:
+- Documentos sin cambios (mismos metadatos, misma firma y misma clave):
+  se dan por verificados sin leerlos. Opcionalmente, una fracción
+  aleatoria (`sample_rate`) se vuelve a verificar por completo.
+- Documentos nuevos o modificados: se hashean y verifican de nuevo.
+- Documentos de la instantánea que ya no existen: se informan como faltantes.
+
+Ejecutar sobre un directorio de firmas:
+    python incremental_verification.py ../signatures ../keys/alice_public.pem
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from cryptography.hazmat.primitives import serialization
+from signature_container import read_signature_file
+from signature_catalog import SIGNATURE_EXTENSIONS
+from signature_schemes import PublicKey
+from trust_store import key_fingerprint
+from verification import SignatureVerifier
+
+
+class IncrementalVerifier:
+    """
+    Verificador que solo vuelve a leer los documentos que cambiaron.
+    
+    Ejemplo:
+        verifier = IncrementalVerifier("signatures/.verification_snapshot.json")
+        report = verifier.verify_directory("signatures", public_key, "documents")
+        print(report["modificados"], report["faltantes"])
+    """
+    
+    def __init__(self, snapshot_path: str = ".verification_snapshot.json",
+                 verifier: Optional[SignatureVerifier] = None,
+                 sample_rate: float = 0.0,
+                 racy_window: float = 2.0):
+        """
+        Inicializa el verificador y carga la instantánea anterior.
+        
+        Args:
+            snapshot_path: Archivo JSON donde se guarda la instantánea
+            verifier: Verificador usado para los documentos que se leen
+            sample_rate: Fracción (0-1) de documentos sin cambios que se
+                         vuelven a verificar por completo
+            racy_window: Segundos mínimos entre la modificación de un documento
+                         y su verificación para confiar en sus metadatos
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate debe estar entre 0 y 1")
+        
+        self.snapshot_path = snapshot_path
+        self.verifier = verifier or SignatureVerifier()
+        self.sample_rate = sample_rate
+        self.racy_window = racy_window
+        
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+    
+    def verify(self, items: Iterable[Tuple[str, Union[str, Dict], PublicKey]],
+               max_workers: Optional[int] = None,
+               mode: str = "signature_first") -> Dict[str, any]:
+        """
+        Verifica un conjunto de documentos de forma incremental.
+        
+        Args:
+            items: Tripletas (ruta_documento, firma, clave_pública), como en
+                   SignatureVerifier.verify_many. Con clave None, se busca en
+                   el trust_store del verificador
+            max_workers: Número de hilos para los documentos que se leen
+            mode: Modo de verificación de los documentos que se leen
+        
+        Returns:
+            Diccionario con las listas de documentos nuevos, modificados,
+            faltantes, verificados (sin cambios) e inválidos, y estadísticas
+        
+        Note:
+            Los documentos de la instantánea que no aparecen en `items` se
+            conservan; solo se informan como faltantes si ya no existen.
+        """
+        start = time.perf_counter()
+        report = {"nuevos": [], "modificados": [], "faltantes": [], "verificados": [],
+                  "invalidos": [], "muestreados": 0, "bytes_procesados": 0}
+        to_verify = []
+        seen = set()
+        
+        for document_path, signature, public_key in items:
+            path = os.path.abspath(document_path)
+            seen.add(path)
+            try:
+                signature_data = (signature if isinstance(signature, dict)
+                                  else read_signature_file(signature))
+            except (OSError, ValueError) as e:
+                report["invalidos"].append({"documento": document_path,
+                                            "mensaje": f"ERROR: {str(e)}"})
+                continue
+            
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._forget(path)
+                report["faltantes"].append(document_path)
+                continue
+            
+            if public_key is None:
+                public_key = self.verifier.resolve_public_key(signature_data)
+                if public_key is None:
+                    self._forget(path)
+                    report["invalidos"].append({
+                        "documento": document_path,
+                        "mensaje": "FALLO: La clave del firmante no está en el almacén de confianza"
+                    })
+                    continue
+            
+            # key_fingerprint() ya guarda la huella de cada objeto clave
+            fingerprint = _signature_fingerprint(signature_data, key_fingerprint(public_key))
+            
+            entry = self._entries.get(path)
+            state = self._entry_state(entry, st, fingerprint)
+            if state == "sin_cambios":
+                if not (self.sample_rate and random.random() < self.sample_rate):
+                    report["verificados"].append(document_path)
+                    continue
+                report["muestreados"] += 1
+                category = "verificados"
+            elif state == "dudoso":
+                # Mismos metadatos, pero no se puede confiar en ellos: se relee
+                category = "verificados"
+            else:
+                category = "nuevos" if entry is None else "modificados"
+            
+            to_verify.append((document_path, path, st, signature_data, public_key,
+                              fingerprint, category))
+        
+        # Documentos de ejecuciones anteriores que ya no existen
+        with self._lock:
+            forgotten = [path for path in self._entries
+                         if path not in seen and not os.path.exists(path)]
+        for path in forgotten:
+            self._forget(path)
+            report["faltantes"].append(path)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda task: self._verify_changed(task, mode),
+                                        to_verify))
+        
+        for (document_path, *_, category), (is_valid, message, size) in zip(to_verify, results):
+            report["bytes_procesados"] += size
+            if category != "verificados" or is_valid:
+                report[category].append(document_path)
+            if not is_valid:
+                report["invalidos"].append({"documento": document_path, "mensaje": message})
+        
+        self.save()
+        report["tiempo_total"] = time.perf_counter() - start
+        return report
+    
+    def verify_directory(self, signatures_directory: str, public_key: PublicKey,
+                         documents_directory: Optional[str] = None,
+                         max_workers: Optional[int] = None) -> Dict[str, any]:
+        """
+        Verifica de forma incremental todas las firmas de un directorio.
+        
+        Args:
+            signatures_directory: Directorio con archivos de firma (.json o .sig)
+            public_key: Clave pública del firmante
+            documents_directory: Directorio de los documentos (por defecto, el
+                                 mismo que el de las firmas)
+            max_workers: Número de hilos para los documentos que se leen
+        
+        Returns:
+            Informe de verify()
+        """
+        documents_directory = documents_directory or signatures_directory
+        items = []
+        for filename in sorted(os.listdir(signatures_directory)):
+            if os.path.splitext(filename)[1] not in SIGNATURE_EXTENSIONS:
+                continue
+            signature_path = os.path.join(signatures_directory, filename)
+            try:
+                signature_data = read_signature_file(signature_path)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(signature_data, dict) or "document_name" not in signature_data:
+                # Otros JSON del directorio (p. ej. la propia instantánea)
+                continue
+            document_path = os.path.join(documents_directory, signature_data["document_name"])
+            items.append((document_path, signature_data, public_key))
+        
+        return self.verify(items, max_workers=max_workers)
+    
+    def save(self) -> None:
+        """Guarda la instantánea en disco (escritura atómica)."""
+        with self._lock:
+            data = {"version": 1, "entries": dict(self._entries)}
+        
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.snapshot_path)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _entry_state(self, entry: Optional[Dict], st: os.stat_result, fingerprint: str) -> str:
+        """
+        Compara un documento con su entrada de la instantánea.
+        
+        Returns:
+            "sin_cambios" si puede darse por verificado sin leerlo, "dudoso" si
+            los metadatos coinciden pero hay que releerlo (falló la última vez o
+            se modificó justo antes de verificarlo) y "modificado" en otro caso
+        """
+        if entry is None:
+            return "modificado"
+        if (entry["size"], entry["mtime_ns"], entry["inode"]) != _stat_tuple(st):
+            return "modificado"
+        if entry["signature"] != fingerprint:
+            return "modificado"
+        if not entry["valid"]:
+            return "dudoso"
+        # Una modificación dentro del mismo tick de mtime no cambiaría los metadatos
+        if entry["verified_at"] - st.st_mtime_ns / 1e9 < self.racy_window:
+            return "dudoso"
+        return "sin_cambios"
+    
+    def _verify_changed(self, task: tuple, mode: str) -> Tuple[bool, str, int]:
+        """Verifica por completo un documento y actualiza su entrada."""
+        document_path, path, st, signature_data, public_key, fingerprint, _ = task
+        verified_at = time.time()
+        try:
+            is_valid, message, current_hash = self.verifier.verify_document(
+                document_path, signature_data, public_key, mode
+            )
+        except Exception as e:
+            is_valid, message, current_hash = False, f"ERROR: {str(e)}", None
+        
+        # Solo se guarda la entrada si el archivo no cambió durante la lectura
+        try:
+            unchanged = _stat_tuple(os.stat(path)) == _stat_tuple(st)
+        except OSError:
+            unchanged = False
+        if unchanged:
+            with self._lock:
+                self._entries[path] = {
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "inode": st.st_ino,
+                    "hash": current_hash,
+                    "signature": fingerprint,
+                    "valid": is_valid and current_hash is not None,
+                    "verified_at": verified_at
+                }
+        else:
+            self._forget(path)
+        
+        return is_valid, message, st.st_size if current_hash is not None else 0
+    
+    def _forget(self, path: str) -> None:
+        """Elimina un documento de la instantánea."""
+        with self._lock:
+            self._entries.pop(path, None)
+    
+    def _load(self) -> None:
+        """Carga la instantánea guardada en disco (si existe)."""
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                self._entries = dict(json.load(f).get("entries", {}))
+        except (OSError, ValueError, AttributeError):
+            # Sin instantánea (o corrupta): todo se verifica como nuevo
+            self._entries = {}
+
+
+def _stat_tuple(st: os.stat_result) -> tuple:
+    """Metadatos que identifican el contenido de un archivo."""
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _signature_fingerprint(signature_data: Dict, key_fingerprint: str) -> str:
+    """Huella de la firma y la clave: si cambia alguna, el documento se reverifica."""
+    material = "|".join([str(signature_data.get("document_hash")),
+                         str(signature_data.get("signature")), key_fingerprint])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos del verificador incremental."""
+    parser = argparse.ArgumentParser(description="Verificación incremental de firmas")
+    parser.add_argument("signatures", help="Directorio de firmas")
+    parser.add_argument("public_key", help="Clave pública del firmante (PEM)")
+    parser.add_argument("--documents", help="Directorio de documentos (por defecto, el de firmas)")
+    parser.add_argument("--snapshot", help="Instantánea (por defecto, <firmas>/.verification_snapshot.json)")
+    parser.add_argument("--sample", type=float, default=0.0,
+                        help="Fracción de documentos sin cambios que se reverifican")
+    
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.signatures):
+        print(f"✗ El directorio '{args.signatures}' no existe")
+        return 1
+    
+    with open(args.public_key, 'rb') as f:
+        public_key = serialization.load_pem_public_key(f.read())
+    
+    snapshot = args.snapshot or os.path.join(args.signatures, ".verification_snapshot.json")
+    verifier = IncrementalVerifier(snapshot, sample_rate=args.sample)
+    report = verifier.verify_directory(args.signatures, public_key, args.documents)
+    
+    for label, key in (("Nuevos", "nuevos"), ("Modificados", "modificados"),
+                       ("Faltantes", "faltantes")):
+        for path in report[key]:
+            print(f"  {label}: {path}")
+    for failure in report["invalidos"]:
+        print(f"  ✗ {failure['documento']}: {failure['mensaje']}")
+    
+    print(f"✓ {len(report['verificados'])} sin cambios, {len(report['nuevos'])} nuevos, "
+          f"{len(report['modificados'])} modificados, {len(report['faltantes'])} faltantes, "
+          f"{len(report['invalidos'])} inválidos ({report['muestreados']} muestreados) "
+          f"en {report['tiempo_total']:.3f} s")
+    return 0 if not report["invalidos"] and not report["faltantes"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
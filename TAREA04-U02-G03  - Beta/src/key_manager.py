@@ -3,27 +3,153 @@ Módulo de Gestión de Claves Criptográficas
 ===========================================
 
 Este módulo proporciona funcionalidades para:
-- Generar pares de claves RSA (pública y privada)
+- Generar pares de claves RSA, Ed25519 o ECDSA P-256 (pública y privada)
 - Guardar y cargar claves en formato PEM
 - Crear certificados digitales con información del propietario
 - Gestionar la infraestructura de claves
+- Mantener en caché (LRU) las claves y certificados ya parseados
 
 Conceptos Criptográficos:
 ------------------------
 - RSA: Algoritmo de criptografía asimétrica (clave pública/privada)
+- Ed25519 / ECDSA P-256: Curvas elípticas, claves y firmas mucho más rápidas
 - PEM: Formato de codificación para claves y certificados
 - Key Size: 2048 bits para balance seguridad/rendimiento
 """
 
 import os
 import json
+import hmac
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Tuple, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Tuple, Dict, Optional
 from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
-from cryptography import x509
-from cryptography.x509.oid import NameOID
+from signature_schemes import DEFAULT_SCHEME, PrivateKey, PublicKey, get_scheme, scheme_for_key
+from events import emit
+from metrics import key_generation_seconds, key_load_seconds
+
+# x509 solo se importa al crear o leer certificados (ver benchmarks/bench_import.py)
+if TYPE_CHECKING:
+    from cryptography import x509
+    from key_pool import KeyPool
+
+
+def _owner_name(owner_info: Dict[str, str]) -> "x509.Name":
+    """Nombre X.509 del propietario de un certificado."""
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    return x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, owner_info.get("country", "EC")),
+        x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, owner_info.get("state", "Guayas")),
+        x509.NameAttribute(NameOID.LOCALITY_NAME, owner_info.get("city", "Guayaquil")),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, owner_info.get("organization", "ESPOL")),
+        x509.NameAttribute(NameOID.COMMON_NAME, owner_info.get("name", "Usuario")),
+    ])
+
+
+def _add_ca_extensions(builder: "x509.CertificateBuilder",
+                       path_length: Optional[int]) -> "x509.CertificateBuilder":
+    """Marca un certificado como CA capaz de firmar certificados."""
+    from cryptography import x509
+    return (
+        builder
+        .add_extension(x509.BasicConstraints(ca=True, path_length=path_length), critical=True)
+        .add_extension(x509.KeyUsage(
+            digital_signature=True, content_commitment=False, key_encipherment=False,
+            data_encipherment=False, key_agreement=False, key_cert_sign=True,
+            crl_sign=True, encipher_only=False, decipher_only=False
+        ), critical=True)
+    )
+
+
+class ParsedObjectCache:
+    """
+    Caché LRU de claves y certificados ya parseados.
+    
+    Parsear un PEM (y, sobre todo, derivar la clave de una contraseña en un
+    PKCS8 cifrado) es costoso. La caché guarda el objeto resultante indexado
+    por (tipo, ruta, mtime, tamaño, huella de la contraseña): si el archivo
+    cambia en disco, la entrada antigua deja de coincidir automáticamente.
+    
+    La huella es un HMAC-SHA256 con un secreto aleatorio de la caché: sin
+    el secreto, no sirve para probar contraseñas por fuerza bruta.
+    """
+    
+    def __init__(self, max_entries: int = 128):
+        """
+        Inicializa la caché.
+        
+        Args:
+            max_entries: Número máximo de objetos en memoria
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._password_secret = os.urandom(32)
+    
+    def get_or_load(self, kind: str, filepath: str, loader: Callable[[], Any],
+                    password: Optional[str] = None) -> Any:
+        """
+        Devuelve el objeto en caché o lo carga con `loader`.
+        
+        Args:
+            kind: Tipo de objeto ("private", "public" o "cert")
+            filepath: Ruta del archivo PEM
+            loader: Función sin argumentos que lee y parsea el archivo
+            password: Contraseña usada (forma parte de la clave de caché)
+        
+        Returns:
+            Objeto parseado
+        """
+        st = os.stat(filepath)
+        # Solo se guarda una huella de la contraseña, nunca la contraseña
+        password_id = (hmac.new(self._password_secret, password.encode(), hashlib.sha256).digest()
+                       if password else None)
+        key = (kind, os.path.abspath(filepath), st.st_mtime_ns, st.st_size, password_id)
+        
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        
+        obj = loader()
+        
+        with self._lock:
+            self._entries[key] = obj
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        return obj
+    
+    def invalidate(self, filepath: Optional[str] = None) -> None:
+        """
+        Elimina entradas de la caché.
+        
+        Args:
+            filepath: Ruta cuyas entradas se eliminan (None para vaciar la caché)
+        """
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(filepath)
+            for key in [k for k in self._entries if k[1] == path]:
+                del self._entries[key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Devuelve aciertos, fallos y número de entradas de la caché."""
+        with self._lock:
+            return {"aciertos": self.hits, "fallos": self.misses,
+                    "entradas": len(self._entries)}
 
 
 class KeyManager:
@@ -32,20 +158,33 @@ class KeyManager:
     
     Esta clase implementa las operaciones necesarias para trabajar con
     criptografía de clave pública (RSA) en el contexto de firmas digitales.
+    
+    Las claves y certificados cargados se guardan en una caché compartida
+    por todas las instancias, de modo que un servicio que firma miles de
+    documentos no vuelve a parsear el PEM ni a derivar la contraseña.
     """
     
-    def __init__(self, keys_directory: str = "keys"):
+    # Caché compartida por todas las instancias de KeyManager
+    object_cache = ParsedObjectCache()
+    
+    def __init__(self, keys_directory: str = "keys", use_cache: bool = True,
+                 key_pool: Optional["KeyPool"] = None):
         """
         Inicializa el gestor de claves.
         
         Args:
             keys_directory: Directorio donde se almacenarán las claves
+            use_cache: Si es True, reutiliza claves y certificados ya parseados
+            key_pool: Pool opcional de claves pregeneradas en segundo plano
         """
         self.keys_directory = keys_directory
+        self.use_cache = use_cache
+        self.key_pool = key_pool
         # Crear el directorio si no existe
         os.makedirs(keys_directory, exist_ok=True)
     
-    def generate_key_pair(self, key_size: int = 2048) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+    def generate_key_pair(self, key_size: int = 2048,
+                          scheme: str = DEFAULT_SCHEME) -> Tuple[PrivateKey, PublicKey]:
         """
         Genera un par de claves RSA (privada y pública).
         
@@ -55,6 +194,8 @@ class KeyManager:
         
         Args:
             key_size: Tamaño de la clave en bits (2048 recomendado, 4096 para más seguridad)
+            scheme: Esquema de firma: "rsa-pss" (por defecto), "ed25519" o "ecdsa-p256".
+                    Para las curvas elípticas se ignora key_size
         
         Returns:
             Tupla (clave_privada, clave_pública)
@@ -62,30 +203,49 @@ class KeyManager:
         Note:
             - 2048 bits: Seguridad estándar, buen rendimiento
             - 4096 bits: Mayor seguridad, menor rendimiento
+            - Si hay un KeyPool configurado, la clave se toma del pool
+            - Ed25519 y ECDSA P-256 generan claves casi al instante
         """
-        print(f"Generando par de claves RSA de {key_size} bits...")
+        if scheme != DEFAULT_SCHEME:
+            signature_scheme = get_scheme(scheme)
+            emit("key.generating", label=signature_scheme.label)
+            with key_generation_seconds.time():
+                private_key = signature_scheme.generate_private_key()
+            emit("key.generated", label=signature_scheme.label)
+            return private_key, private_key.public_key()
+        
+        label = f"RSA de {key_size} bits"
+        emit("key.generating", label=label)
+        
+        if self.key_pool is not None:
+            # Se mide la espera del llamador (casi nula si el pool tiene claves)
+            with key_generation_seconds.time():
+                private_key, public_key = self.key_pool.get(key_size)
+            emit("key.generated", label=label)
+            return private_key, public_key
         
         # Generar clave privada RSA
         # La clave privada contiene tanto la información privada como pública
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,  # Exponente público estándar (2^16 + 1)
-            key_size=key_size,
-            backend=default_backend()
-        )
+        with key_generation_seconds.time():
+            private_key = rsa.generate_private_key(
+                public_exponent=65537,  # Exponente público estándar (2^16 + 1)
+                key_size=key_size,
+                backend=default_backend()
+            )
         
         # Extraer la clave pública de la privada
         public_key = private_key.public_key()
         
-        print("✓ Par de claves generado exitosamente")
+        emit("key.generated", label=label)
         return private_key, public_key
     
-    def save_private_key(self, private_key: rsa.RSAPrivateKey, filename: str, 
+    def save_private_key(self, private_key: PrivateKey, filename: str, 
                         password: Optional[str] = None) -> str:
         """
         Guarda la clave privada en un archivo PEM.
         
         Args:
-            private_key: Clave privada RSA a guardar
+            private_key: Clave privada a guardar (RSA, Ed25519 o ECDSA)
             filename: Nombre del archivo (sin extensión)
             password: Contraseña opcional para cifrar la clave privada
         
@@ -114,16 +274,17 @@ class KeyManager:
         # Guardar en archivo
         with open(filepath, 'wb') as f:
             f.write(pem)
+        self.object_cache.invalidate(filepath)
         
-        print(f"✓ Clave privada guardada en: {filepath}")
+        emit("key.saved", kind="private", path=filepath)
         return filepath
     
-    def save_public_key(self, public_key: rsa.RSAPublicKey, filename: str) -> str:
+    def save_public_key(self, public_key: PublicKey, filename: str) -> str:
         """
         Guarda la clave pública en un archivo PEM.
         
         Args:
-            public_key: Clave pública RSA a guardar
+            public_key: Clave pública a guardar (RSA, Ed25519 o ECDSA)
             filename: Nombre del archivo (sin extensión)
         
         Returns:
@@ -143,11 +304,12 @@ class KeyManager:
         # Guardar en archivo
         with open(filepath, 'wb') as f:
             f.write(pem)
+        self.object_cache.invalidate(filepath)
         
-        print(f"✓ Clave pública guardada en: {filepath}")
+        emit("key.saved", kind="public", path=filepath)
         return filepath
     
-    def load_private_key(self, filepath: str, password: Optional[str] = None) -> rsa.RSAPrivateKey:
+    def load_private_key(self, filepath: str, password: Optional[str] = None) -> PrivateKey:
         """
         Carga una clave privada desde un archivo PEM.
         
@@ -156,19 +318,26 @@ class KeyManager:
             password: Contraseña si la clave está cifrada
         
         Returns:
-            Objeto de clave privada RSA
+            Objeto de clave privada (el tipo depende del archivo PEM)
+        
+        Note:
+            Las llamadas repetidas con el mismo archivo y contraseña usan la
+            caché y no repiten la derivación de la contraseña (KDF).
         """
-        with open(filepath, 'rb') as f:
-            private_key = serialization.load_pem_private_key(
-                f.read(),
-                password=password.encode() if password else None,
-                backend=default_backend()
-            )
+        def load():
+            with open(filepath, 'rb') as f:
+                return serialization.load_pem_private_key(
+                    f.read(),
+                    password=password.encode() if password else None,
+                    backend=default_backend()
+                )
         
-        print(f"✓ Clave privada cargada desde: {filepath}")
+        private_key = self._load_cached("private", filepath, load, password)
+        
+        emit("key.loaded", kind="private", path=filepath)
         return private_key
     
-    def load_public_key(self, filepath: str) -> rsa.RSAPublicKey:
+    def load_public_key(self, filepath: str) -> PublicKey:
         """
         Carga una clave pública desde un archivo PEM.
         
@@ -176,20 +345,24 @@ class KeyManager:
             filepath: Ruta del archivo PEM
         
         Returns:
-            Objeto de clave pública RSA
+            Objeto de clave pública (el tipo depende del archivo PEM)
         """
-        with open(filepath, 'rb') as f:
-            public_key = serialization.load_pem_public_key(
-                f.read(),
-                backend=default_backend()
-            )
+        def load():
+            with open(filepath, 'rb') as f:
+                return serialization.load_pem_public_key(
+                    f.read(),
+                    backend=default_backend()
+                )
+        
+        public_key = self._load_cached("public", filepath, load)
         
-        print(f"✓ Clave pública cargada desde: {filepath}")
+        emit("key.loaded", kind="public", path=filepath)
         return public_key
     
-    def create_certificate(self, private_key: rsa.RSAPrivateKey, 
+    def create_certificate(self, private_key: PrivateKey, 
                           owner_info: Dict[str, str], 
-                          days_valid: int = 365) -> x509.Certificate:
+                          days_valid: int = 365,
+                          ca: bool = False) -> "x509.Certificate":
         """
         Crea un certificado digital autofirmado.
         
@@ -200,6 +373,8 @@ class KeyManager:
             private_key: Clave privada para firmar el certificado
             owner_info: Información del propietario (nombre, organización, etc.)
             days_valid: Días de validez del certificado
+            ca: Si es True, crea una CA raíz local que puede emitir certificados
+                (ver issue_certificate y certificate_chain)
         
         Returns:
             Certificado X.509 autofirmado
@@ -208,22 +383,17 @@ class KeyManager:
             Este es un certificado autofirmado (self-signed).
             En producción, se usaría una Autoridad Certificadora (CA).
         """
+        from cryptography import x509
         public_key = private_key.public_key()
         
         # Construir el "subject" (información del propietario)
-        subject = x509.Name([
-            x509.NameAttribute(NameOID.COUNTRY_NAME, owner_info.get("country", "EC")),
-            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, owner_info.get("state", "Guayas")),
-            x509.NameAttribute(NameOID.LOCALITY_NAME, owner_info.get("city", "Guayaquil")),
-            x509.NameAttribute(NameOID.ORGANIZATION_NAME, owner_info.get("organization", "ESPOL")),
-            x509.NameAttribute(NameOID.COMMON_NAME, owner_info.get("name", "Usuario")),
-        ])
+        subject = _owner_name(owner_info)
         
         # El "issuer" es igual al "subject" porque es autofirmado
         issuer = subject
         
         # Crear el certificado
-        cert = (
+        builder = (
             x509.CertificateBuilder()
             .subject_name(subject)
             .issuer_name(issuer)
@@ -231,13 +401,68 @@ class KeyManager:
             .serial_number(x509.random_serial_number())
             .not_valid_before(datetime.utcnow())
             .not_valid_after(datetime.utcnow() + timedelta(days=days_valid))
-            .sign(private_key, hashes.SHA256(), default_backend())
+            .add_extension(x509.SubjectKeyIdentifier.from_public_key(public_key), critical=False)
+        )
+        if ca:
+            builder = _add_ca_extensions(builder, path_length=None)
+        
+        # Ed25519 no admite un algoritmo de hash externo (None)
+        cert = builder.sign(private_key, scheme_for_key(private_key).certificate_hash(),
+                            default_backend())
+        
+        emit("certificate.created")
+        return cert
+    
+    def issue_certificate(self, issuer_private_key: PrivateKey,
+                          issuer_certificate: "x509.Certificate",
+                          subject_public_key: PublicKey,
+                          owner_info: Dict[str, str],
+                          days_valid: int = 365,
+                          ca: bool = False,
+                          path_length: Optional[int] = None) -> "x509.Certificate":
+        """
+        Emite un certificado firmado por una CA (raíz o intermedia).
+        
+        Args:
+            issuer_private_key: Clave privada de la CA emisora
+            issuer_certificate: Certificado de la CA emisora
+            subject_public_key: Clave pública del titular
+            owner_info: Información del titular (como en create_certificate)
+            days_valid: Días de validez del certificado
+            ca: Si es True, el certificado es una CA intermedia
+            path_length: CA intermedias permitidas por debajo (solo con ca=True)
+        
+        Returns:
+            Certificado X.509 con los identificadores de clave del sujeto y del emisor
+        """
+        from cryptography import x509
+        builder = (
+            x509.CertificateBuilder()
+            .subject_name(_owner_name(owner_info))
+            .issuer_name(issuer_certificate.subject)
+            .public_key(subject_public_key)
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(datetime.utcnow())
+            .not_valid_after(datetime.utcnow() + timedelta(days=days_valid))
+            .add_extension(x509.SubjectKeyIdentifier.from_public_key(subject_public_key),
+                           critical=False)
+            .add_extension(x509.AuthorityKeyIdentifier.from_issuer_public_key(
+                issuer_certificate.public_key()), critical=False)
         )
+        if ca:
+            builder = _add_ca_extensions(builder, path_length)
+        else:
+            builder = builder.add_extension(x509.BasicConstraints(ca=False, path_length=None),
+                                            critical=True)
+        
+        cert = builder.sign(issuer_private_key,
+                            scheme_for_key(issuer_private_key).certificate_hash(),
+                            default_backend())
         
-        print("✓ Certificado digital creado")
+        emit("certificate.issued")
         return cert
     
-    def save_certificate(self, certificate: x509.Certificate, filename: str) -> str:
+    def save_certificate(self, certificate: "x509.Certificate", filename: str) -> str:
         """
         Guarda un certificado en formato PEM.
         
@@ -255,11 +480,12 @@ class KeyManager:
         
         with open(filepath, 'wb') as f:
             f.write(pem)
+        self.object_cache.invalidate(filepath)
         
-        print(f"✓ Certificado guardado en: {filepath}")
+        emit("certificate.saved", path=filepath)
         return filepath
     
-    def load_certificate(self, filepath: str) -> x509.Certificate:
+    def load_certificate(self, filepath: str) -> "x509.Certificate":
         """
         Carga un certificado desde un archivo PEM.
         
@@ -269,13 +495,39 @@ class KeyManager:
         Returns:
             Certificado X.509
         """
-        with open(filepath, 'rb') as f:
-            cert = x509.load_pem_x509_certificate(f.read(), default_backend())
+        from cryptography import x509
         
-        print(f"✓ Certificado cargado desde: {filepath}")
+        def load():
+            with open(filepath, 'rb') as f:
+                return x509.load_pem_x509_certificate(f.read(), default_backend())
+        
+        cert = self._load_cached("cert", filepath, load)
+        
+        emit("certificate.loaded", path=filepath)
         return cert
     
-    def get_certificate_info(self, certificate: x509.Certificate) -> Dict[str, str]:
+    def _load_cached(self, kind: str, filepath: str, loader: Callable[[], Any],
+                     password: Optional[str] = None) -> Any:
+        """Carga un objeto a través de la caché compartida (si está activada)."""
+        def timed_loader():
+            # Solo se mide la lectura y el parseo del PEM, no los aciertos de caché
+            with key_load_seconds.time():
+                return loader()
+        
+        if not self.use_cache:
+            return timed_loader()
+        return self.object_cache.get_or_load(kind, filepath, timed_loader, password)
+    
+    def invalidate_cache(self, filepath: Optional[str] = None) -> None:
+        """
+        Elimina claves y certificados de la caché compartida.
+        
+        Args:
+            filepath: Ruta a invalidar (None para vaciar toda la caché)
+        """
+        self.object_cache.invalidate(filepath)
+    
+    def get_certificate_info(self, certificate: "x509.Certificate") -> Dict[str, str]:
         """
         Extrae información legible de un certificado.
         
@@ -285,6 +537,7 @@ class KeyManager:
         Returns:
             Diccionario con información del certificado
         """
+        from cryptography.x509.oid import NameOID
         subject = certificate.subject
         
         info = {
@@ -293,8 +546,8 @@ class KeyManager:
             "ciudad": subject.get_attributes_for_oid(NameOID.LOCALITY_NAME)[0].value,
             "estado": subject.get_attributes_for_oid(NameOID.STATE_OR_PROVINCE_NAME)[0].value,
             "pais": subject.get_attributes_for_oid(NameOID.COUNTRY_NAME)[0].value,
-            "valido_desde": certificate.not_valid_before.strftime("%Y-%m-%d %H:%M:%S"),
-            "valido_hasta": certificate.not_valid_after.strftime("%Y-%m-%d %H:%M:%S"),
+            "valido_desde": certificate.not_valid_before_utc.strftime("%Y-%m-%d %H:%M:%S"),
+            "valido_hasta": certificate.not_valid_after_utc.strftime("%Y-%m-%d %H:%M:%S"),
             "numero_serie": str(certificate.serial_number)
         }
         
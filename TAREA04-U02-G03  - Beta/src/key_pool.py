@@ -0,0 +1,264 @@
+"""
+Módulo de Pool de Claves RSA Pregeneradas
+=========================================
+
+Generar una clave RSA es lento: cientos de milisegundos con 2048 bits y
+varios segundos con 4096 bits. Este módulo mantiene un pool de claves
+generadas en segundo plano, en procesos trabajadores, para entregarlas
+al instante cuando se necesitan (alta de usuarios, opción 1 de main.py).
+
+Funcionamiento:
+---------------
+- Por cada tamaño de clave se mantiene una cola de claves listas
+- Cuando la cola baja de `low_watermark`, se encargan claves nuevas
+  hasta llegar a `target`
+- Si la cola está vacía, la clave se genera en el momento (como antes)
+
+Seguridad:
+----------
+Las claves viajan del proceso trabajador al principal en DER sin cifrar,
+a través de la tubería local del pool. Nunca se escriben en disco y
+cada clave se entrega una sola vez.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+# Tras este número de generaciones fallidas seguidas de un tamaño, el pool
+# deja de reponerlas (p. ej. un tamaño de clave que no admite cryptography)
+MAX_CONSECUTIVE_ERRORS = 3
+
+
+def _generate_key_der(key_size: int) -> bytes:
+    """
+    Genera una clave privada RSA dentro de un proceso trabajador.
+    
+    Args:
+        key_size: Tamaño de la clave en bits
+    
+    Returns:
+        Clave privada serializada en DER (PKCS8, sin cifrar)
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+class KeyPool:
+    """
+    Pool de pares de claves RSA generados en segundo plano.
+    
+    Ejemplo:
+        pool = KeyPool(key_sizes=(2048,))
+        key_manager = KeyManager(key_pool=pool)
+        private_key, public_key = key_manager.generate_key_pair()  # instantáneo
+        pool.shutdown()
+    """
+    
+    def __init__(self, key_sizes: Iterable[int] = (2048,), target: int = 4,
+                 low_watermark: int = 2, max_workers: Optional[int] = None):
+        """
+        Inicializa el pool y comienza a generar claves.
+        
+        Args:
+            key_sizes: Tamaños de clave (en bits) que mantiene el pool
+            target: Número de claves listas que se intenta mantener por tamaño
+            low_watermark: Por debajo de este número se encargan claves nuevas
+            max_workers: Número de procesos generadores (por defecto, uno por núcleo)
+        """
+        if target < 1:
+            raise ValueError("target debe ser al menos 1")
+        if low_watermark > target:
+            raise ValueError("low_watermark no puede ser mayor que target")
+        
+        self.target = target
+        self.low_watermark = low_watermark
+        
+        self._ready: Dict[int, deque] = {size: deque() for size in key_sizes}
+        self._pending: Dict[int, int] = {size: 0 for size in key_sizes}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._futures = set()
+        
+        # Métricas
+        self._started_at = time.monotonic()
+        self._generated = {size: 0 for size in key_sizes}
+        self._refill_latency = {size: 0.0 for size in key_sizes}
+        self._served_from_pool = 0
+        self._generated_inline = 0
+        self._errors = 0
+        self._consecutive_errors = {size: 0 for size in key_sizes}
+        
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        
+        for size in self._ready:
+            self._refill(size)
+    
+    def get(self, key_size: int = 2048) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+        """
+        Entrega un par de claves del pool.
+        
+        Args:
+            key_size: Tamaño de la clave en bits
+        
+        Returns:
+            Tupla (clave_privada, clave_pública)
+        
+        Note:
+            Si no hay claves listas (o el tamaño no está en el pool), la clave
+            se genera en el proceso actual y se encarga una recarga.
+        """
+        der = None
+        with self._lock:
+            queue = self._ready.get(key_size)
+            if queue:
+                der = queue.popleft()
+                self._served_from_pool += 1
+            else:
+                self._generated_inline += 1
+        
+        if key_size in self._ready:
+            self._refill(key_size)
+        
+        if der is None:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+        else:
+            private_key = serialization.load_der_private_key(der, password=None)
+        
+        return private_key, private_key.public_key()
+    
+    def wait_until_ready(self, key_size: int = 2048, count: int = 1,
+                         timeout: Optional[float] = None) -> bool:
+        """
+        Espera hasta que haya al menos `count` claves listas.
+        
+        Args:
+            key_size: Tamaño de la clave en bits
+            count: Número de claves que se esperan
+            timeout: Tiempo máximo de espera en segundos
+        
+        Returns:
+            True si las claves están listas antes del timeout
+        """
+        with self._available:
+            return self._available.wait_for(
+                lambda: len(self._ready.get(key_size, ())) >= count or self._closed,
+                timeout
+            ) and not self._closed
+    
+    def metrics(self) -> Dict[str, any]:
+        """
+        Devuelve las métricas del pool.
+        
+        Returns:
+            Diccionario con la profundidad del pool, las claves en generación,
+            las claves generadas, la tasa de recarga (claves/s desde el inicio),
+            la latencia media desde el encargo hasta que la clave está lista y
+            cuántas claves se sirvieron al instante
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at
+            total_generated = sum(self._generated.values())
+            return {
+                "profundidad": {size: len(queue) for size, queue in self._ready.items()},
+                "pendientes": dict(self._pending),
+                "generadas": dict(self._generated),
+                "tasa_recarga": total_generated / elapsed if elapsed > 0 else 0.0,
+                "latencia_media_recarga": {
+                    size: (self._refill_latency[size] / self._generated[size]
+                           if self._generated[size] else 0.0)
+                    for size in self._ready
+                },
+                "servidas_desde_pool": self._served_from_pool,
+                "generadas_en_linea": self._generated_inline,
+                "errores": self._errors
+            }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Detiene los procesos generadores y descarta las claves no entregadas.
+        
+        Args:
+            wait: Si es True, espera a que terminen las generaciones en curso
+        """
+        with self._available:
+            self._closed = True
+            for queue in self._ready.values():
+                queue.clear()
+            futures = list(self._futures)
+            self._available.notify_all()
+        
+        # Las generaciones que aún no empezaron se cancelan
+        for future in futures:
+            future.cancel()
+        self._executor.shutdown(wait=wait)
+    
+    def __enter__(self) -> "KeyPool":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+    
+    def _refill(self, key_size: int) -> None:
+        """Encarga claves nuevas si el pool está por debajo de la marca mínima."""
+        submitted = []
+        # Se encarga con el cerrojo tomado: shutdown() no puede cerrar el
+        # ejecutor entre la comprobación de _closed y submit()
+        with self._lock:
+            if self._closed or self._consecutive_errors[key_size] >= MAX_CONSECUTIVE_ERRORS:
+                return
+            available = len(self._ready[key_size]) + self._pending[key_size]
+            if available >= self.low_watermark and available > 0:
+                return
+            for _ in range(self.target - available):
+                try:
+                    future = self._executor.submit(_generate_key_der, key_size)
+                except RuntimeError:
+                    # Pool de procesos roto: get() generará las claves en línea
+                    self._errors += 1
+                    break
+                self._pending[key_size] += 1
+                self._futures.add(future)
+                submitted.append((future, time.monotonic()))
+        
+        # Fuera del cerrojo: si la generación ya terminó, el callback se
+        # ejecuta aquí mismo y toma el cerrojo
+        for future, submitted_at in submitted:
+            future.add_done_callback(
+                lambda f, size=key_size, t0=submitted_at: self._on_generated(size, t0, f)
+            )
+    
+    def _on_generated(self, key_size: int, submitted_at: float, future: Future) -> None:
+        """
+        Guarda en la cola una clave generada por un proceso trabajador.
+        
+        Si la generación falló, se encarga otra para que el pool vuelva a
+        su nivel (hasta MAX_CONSECUTIVE_ERRORS fallos seguidos).
+        """
+        with self._available:
+            self._pending[key_size] -= 1
+            self._futures.discard(future)
+            if future.cancelled() or self._closed:
+                return
+            failed = future.exception() is not None
+            if failed:
+                self._errors += 1
+                self._consecutive_errors[key_size] += 1
+            else:
+                self._consecutive_errors[key_size] = 0
+                self._ready[key_size].append(future.result())
+                self._generated[key_size] += 1
+                self._refill_latency[key_size] += time.monotonic() - submitted_at
+                self._available.notify_all()
+        
+        if failed:
+            self._refill(key_size)
@@ -22,10 +22,6 @@ from pathlib import Path
 # Añadir el directorio src al path para imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from key_manager import KeyManager
-from digital_signature import DigitalSignature
-from verification import SignatureVerifier
-
 # Importar colorama para colores en la terminal (opcional)
 try:
     from colorama import init, Fore, Style
@@ -43,9 +39,24 @@ class DigitalSignatureApp:
     
     def __init__(self):
         """Inicializa los componentes de la aplicación."""
+        # Importaciones diferidas: con argumentos, main() pasa a cli sin cargar
+        # la aplicación interactiva (ni el pool de procesos ni x509)
+        from key_manager import KeyManager
+        from digital_signature import DigitalSignature
+        from verification import SignatureVerifier
+        from trust_store import TrustStore
+        from events import console_listener, subscribe
+        
+        # Los módulos de firma no imprimen: la aplicación muestra sus eventos
+        subscribe(console_listener)
+        
+        # El pool de claves se crea la primera vez que se usa la opción 1
+        self.key_pool = None
         self.key_manager = KeyManager()
         self.signature_manager = DigitalSignature()
-        self.verifier = SignatureVerifier()
+        # Claves públicas y certificados de keys/, indexados por huella
+        self.trust_store = TrustStore()
+        self.verifier = SignatureVerifier(trust_store=self.trust_store)
         
         # Estado de la aplicación
         self.current_private_key = None
@@ -53,6 +64,25 @@ class DigitalSignatureApp:
         self.current_certificate = None
         self.current_key_name = None
     
+    def start_key_pool(self):
+        """
+        Crea el pool de claves pregeneradas (solo la primera vez).
+        
+        La clave se genera en segundo plano mientras el usuario completa
+        los datos del certificado de la opción 1.
+        """
+        if self.key_pool is None:
+            from key_pool import KeyPool
+            self.key_pool = KeyPool(key_sizes=(2048,), target=1, low_watermark=1, max_workers=1)
+            self.key_manager.key_pool = self.key_pool
+    
+    def close(self):
+        """Detiene el pool de claves, si se llegó a crear."""
+        if self.key_pool is not None:
+            self.key_pool.shutdown(wait=False)
+            self.key_pool = None
+            self.key_manager.key_pool = None
+    
     def print_header(self):
         """Muestra el encabezado de la aplicación."""
         header = """
@@ -93,6 +123,8 @@ class DigitalSignatureApp:
         print("GENERAR NUEVO PAR DE CLAVES")
         print("="*60)
         
+        self.start_key_pool()
+        
         # Solicitar información del propietario
         print("\nIngrese la información del propietario del certificado:")
         owner_info = {
@@ -256,7 +288,7 @@ class DigitalSignatureApp:
         
         # Solicitar rutas
         doc_path = input("\nIngrese la ruta del documento: ").strip()
-        sig_path = input("Ingrese la ruta del archivo de firma (.json): ").strip()
+        sig_path = input("Ingrese la ruta del archivo de firma (.json o .sig): ").strip()
         
         # Verificar que los archivos existen
         if not os.path.exists(doc_path):
@@ -269,10 +301,11 @@ class DigitalSignatureApp:
             input("\nPresione Enter para continuar...")
             return
         
-        # Solicitar la clave pública
-        pub_key_path = input("Ingrese la ruta de la clave pública (.pem): ").strip()
+        # Solicitar la clave pública (sin ella, se busca por la huella de la firma)
+        pub_key_path = input("Ingrese la ruta de la clave pública (.pem) "
+                             "o Enter para buscarla en keys/: ").strip()
         
-        if not os.path.exists(pub_key_path):
+        if pub_key_path and not os.path.exists(pub_key_path):
             print(f"\n❌ Error: La clave pública '{pub_key_path}' no existe")
             input("\nPresione Enter para continuar...")
             return
@@ -280,8 +313,19 @@ class DigitalSignatureApp:
         print("\n" + "-"*60)
         
         try:
-            # Cargar la clave pública
-            public_key = self.key_manager.load_public_key(pub_key_path)
+            public_key = None
+            certificate = None
+            if pub_key_path:
+                # Cargar la clave pública
+                public_key = self.key_manager.load_public_key(pub_key_path)
+                
+                # Cargar certificado si existe
+                cert_path = pub_key_path.replace("_public.pem", "_cert.pem")
+                if os.path.exists(cert_path):
+                    certificate = self.key_manager.load_certificate(cert_path)
+            else:
+                # Solo se leen los archivos nuevos o modificados desde la última vez
+                self.trust_store.add_path(self.key_manager.keys_directory)
             
             # Cargar la firma
             signature_data = self.signature_manager.load_signature(sig_path)
@@ -289,12 +333,6 @@ class DigitalSignatureApp:
             # Mostrar información de la firma
             self.signature_manager.display_signature_info(signature_data)
             
-            # Cargar certificado si existe
-            cert_path = pub_key_path.replace("_public.pem", "_cert.pem")
-            certificate = None
-            if os.path.exists(cert_path):
-                certificate = self.key_manager.load_certificate(cert_path)
-            
             # Verificar
             results = self.verifier.full_verification(
                 doc_path,
@@ -421,7 +459,12 @@ class DigitalSignatureApp:
 
 
 def main():
-    """Función principal de entrada."""
+    """Función principal de entrada (con argumentos, línea de comandos no interactiva)."""
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
+    app = None
     try:
         app = DigitalSignatureApp()
         app.run()
@@ -431,6 +474,9 @@ def main():
         print(f"\n❌ Error fatal: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        if app is not None:
+            app.close()
 
 
 if __name__ == "__main__":
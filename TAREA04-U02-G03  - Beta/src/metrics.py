@@ -0,0 +1,380 @@
+"""
+Módulo de Métricas
+==================
+
+Contadores e histogramas de latencia de las operaciones de firma, para
+saber en qué se va el tiempo: hash, operación de clave privada/pública,
+carga de claves PEM o escritura de firmas.
+
+Las métricas se registran siempre (en REGISTRY, una por proceso) y son
+baratas: cada medición son dos lecturas de time.perf_counter() y una
+búsqueda binaria en los límites del histograma, bajo un lock.
+
+Métricas:
+    firma_hash_bytes_total              Bytes de documentos hasheados
+    firma_hash_seconds                  Tiempo de cálculo del hash de un documento
+    firma_sign_seconds                  Operación de firma con la clave privada
+    firma_verify_seconds                Verificación criptográfica de una firma
+    firma_verify_failures_total         Firmas que no superan la verificación criptográfica
+    firma_key_load_seconds              Lectura y parseo de claves/certificados PEM (sin caché)
+    firma_key_generation_seconds        Generación de pares de claves
+    firma_signature_write_seconds       Escritura de una firma (JSON, .sig o registro)
+
+Exportación:
+    REGISTRY.write_prometheus("/var/lib/node_exporter/firma.prom")
+    REGISTRY.write_json("metricas.json")
+
+El formato de Prometheus es el de exposición en texto (para el textfile
+collector de node_exporter o un endpoint /metrics). El JSON incluye los
+percentiles aproximados p50/p90/p99 de cada histograma y el rendimiento
+del hash en bytes/s.
+"""
+
+import os
+import time
+import bisect
+import threading
+# json, tempfile y datetime solo se importan al exportar (arranque rápido del CLI)
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Límites (segundos) de los histogramas de latencia: de 50 µs a 10 s
+DEFAULT_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Contador monótono."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1) -> None:
+        """Incrementa el contador."""
+        with self._lock:
+            self._value += amount
+    
+    @property
+    def value(self) -> float:
+        return self._value
+    
+    def _state(self) -> float:
+        return self._value
+    
+    def _merge(self, state: float) -> None:
+        self.inc(state)
+    
+    def _reset(self) -> None:
+        with self._lock:
+            self._value = 0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {"tipo": self.kind, "ayuda": self.help, "valor": self._value}
+    
+    def prometheus_lines(self) -> List[str]:
+        return [f"{self.name} {_format_number(self._value)}"]
+
+
+class _Span:
+    """Mide la duración de un bloque with y la registra en un histograma."""
+    
+    __slots__ = ("_histogram", "_start")
+    
+    def __init__(self, histogram: "Histogram"):
+        self._histogram = histogram
+    
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram:
+    """
+    Histograma de valores (latencias en segundos) con límites fijos.
+    
+    Como en Prometheus, cada valor cuenta en el primer bucket cuyo límite
+    es mayor o igual; los que superan el último van al bucket +Inf.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str,
+                 buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float) -> None:
+        """Registra un valor."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+    
+    def time(self) -> _Span:
+        """Context manager que registra la duración del bloque."""
+        return _Span(self)
+    
+    @property
+    def count(self) -> int:
+        return self._count
+    
+    @property
+    def sum(self) -> float:
+        return self._sum
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Percentil aproximado (límite superior del bucket que lo contiene).
+        
+        Returns:
+            El límite del bucket, el último límite si cae en +Inf, o None
+            si no hay valores
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+    
+    def _state(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+    
+    def _merge(self, state: Tuple[List[int], float, int]) -> None:
+        counts, total_sum, count = state
+        with self._lock:
+            for index, n in enumerate(counts):
+                self._counts[index] += n
+            self._sum += total_sum
+            self._count += count
+    
+    def _reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        counts, total_sum, count = self._state()
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            buckets[_format_number(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {
+            "tipo": self.kind,
+            "ayuda": self.help,
+            "cuenta": count,
+            "suma": total_sum,
+            "media": total_sum / count if count else None,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
+    
+    def prometheus_lines(self) -> List[str]:
+        counts, total_sum, count = self._state()
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{_format_number(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {_format_number(total_sum)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+def _format_number(value: float) -> str:
+    """Número en el formato de Prometheus (enteros sin decimales)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas con nombre, exportable a Prometheus o JSON.
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Devuelve el contador con ese nombre (lo crea si no existe)."""
+        return self._get_or_create(name, Counter, lambda: Counter(name, help_text))
+    
+    def histogram(self, name: str, help_text: str,
+                  buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        """Devuelve el histograma con ese nombre (lo crea si no existe)."""
+        return self._get_or_create(name, Histogram, lambda: Histogram(name, help_text, buckets))
+    
+    def _get_or_create(self, name: str, cls: type, factory) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            elif not isinstance(metric, cls):
+                raise ValueError(f"La métrica '{name}' ya existe con otro tipo")
+            return metric
+    
+    def get(self, name: str) -> Optional[Any]:
+        """Devuelve una métrica registrada, o None."""
+        return self._metrics.get(name)
+    
+    def reset(self) -> None:
+        """Pone a cero todas las métricas."""
+        for metric in list(self._metrics.values()):
+            metric._reset()
+    
+    # ------------------------------------------------------------------
+    # Procesos trabajadores
+    # ------------------------------------------------------------------
+    
+    def drain(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado de las métricas con valores y las pone a cero.
+        
+        Lo usan los procesos trabajadores de sign_many() para enviar sus
+        mediciones al proceso principal, que las suma con merge().
+        """
+        states = {}
+        for name, metric in list(self._metrics.items()):
+            state = metric._state()
+            if (state[2] if isinstance(metric, Histogram) else state):
+                states[name] = state
+                metric._reset()
+        return states
+    
+    def merge(self, states: Optional[Dict[str, Any]]) -> None:
+        """Suma el estado devuelto por drain() de otro proceso."""
+        for name, state in (states or {}).items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._merge(state)
+    
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Instantánea de todas las métricas.
+        
+        Returns:
+            Diccionario con la fecha, cada métrica por nombre y el
+            rendimiento del hash (bytes/s) si hay mediciones
+        """
+        from datetime import datetime
+        metrics = {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+        hashed = self._metrics.get(HASH_BYTES_TOTAL)
+        hash_time = self._metrics.get(HASH_SECONDS)
+        throughput = None
+        if hashed is not None and hash_time is not None and hash_time.sum > 0:
+            throughput = hashed.value / hash_time.sum
+        return {
+            "fecha": datetime.now().isoformat(),
+            "metricas": metrics,
+            "hash_bytes_por_segundo": throughput
+        }
+    
+    def to_prometheus(self) -> str:
+        """Métricas en el formato de exposición en texto de Prometheus."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, path: str) -> str:
+        """Escribe las métricas en un archivo .prom (de forma atómica)."""
+        _write_atomic(path, self.to_prometheus())
+        return path
+    
+    def write_json(self, path: str) -> str:
+        """Escribe la instantánea de las métricas en un archivo JSON (de forma atómica)."""
+        import json
+        _write_atomic(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+        return path
+    
+    def write(self, path: str) -> str:
+        """Escribe las métricas en JSON si la ruta termina en .json, si no en Prometheus."""
+        if path.lower().endswith(".json"):
+            return self.write_json(path)
+        return self.write_prometheus(path)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Escribe un archivo completo: los lectores nunca ven uno a medias."""
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metricas-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# Nombres de las métricas de las operaciones de firma
+HASH_BYTES_TOTAL = "firma_hash_bytes_total"
+HASH_SECONDS = "firma_hash_seconds"
+SIGN_SECONDS = "firma_sign_seconds"
+VERIFY_SECONDS = "firma_verify_seconds"
+VERIFY_FAILURES_TOTAL = "firma_verify_failures_total"
+KEY_LOAD_SECONDS = "firma_key_load_seconds"
+KEY_GENERATION_SECONDS = "firma_key_generation_seconds"
+SIGNATURE_WRITE_SECONDS = "firma_signature_write_seconds"
+
+# Registro del proceso, compartido por todos los módulos
+REGISTRY = MetricsRegistry()
+
+hash_bytes = REGISTRY.counter(HASH_BYTES_TOTAL, "Bytes de documentos hasheados")
+hash_seconds = REGISTRY.histogram(HASH_SECONDS, "Tiempo de cálculo del hash de un documento")
+sign_seconds = REGISTRY.histogram(SIGN_SECONDS, "Operación de firma con la clave privada")
+verify_seconds = REGISTRY.histogram(VERIFY_SECONDS, "Verificación criptográfica de una firma")
+verify_failures = REGISTRY.counter(VERIFY_FAILURES_TOTAL,
+                                   "Firmas que no superan la verificación criptográfica")
+key_load_seconds = REGISTRY.histogram(KEY_LOAD_SECONDS,
+                                      "Lectura y parseo de claves y certificados PEM")
+key_generation_seconds = REGISTRY.histogram(
+    KEY_GENERATION_SECONDS, "Generación de pares de claves",
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+signature_write_seconds = REGISTRY.histogram(SIGNATURE_WRITE_SECONDS,
+                                             "Escritura de una firma (JSON, .sig o registro)")
+
+
+def observe_hash(elapsed: float, size: int) -> None:
+    """Registra el cálculo del hash de un documento de `size` bytes."""
+    hash_seconds.observe(elapsed)
+    hash_bytes.inc(size)
@@ -0,0 +1,282 @@
+"""
+Módulo de Revocación de Certificados
+====================================
+
+Índice en memoria de los números de serie revocados en listas de
+revocación (CRL) locales.
+
+Buscar un número de serie recorriendo la CRL en cada verificación es
+O(n) y obliga a tenerla parseada. El índice se construye una vez por CRL:
+
+- Los números de serie de cada emisor se guardan ordenados en un único
+  bloque de bytes de ancho fijo (20 bytes por serie, el máximo de
+  RFC 5280): una CRL de un millón de entradas ocupa unos 20 MB, frente a
+  los cientos de MB de un millón de objetos de Python
+- Cada consulta es una búsqueda binaria: O(log n), ~20 comparaciones
+  para un millón de entradas
+- Los archivos se vuelven a leer solo cuando cambian (mtime/tamaño), como
+  mucho una comprobación cada check_interval segundos
+- Si una CRL modificada no se puede leer o no la firmó una CA
+  configurada, se sigue usando su última versión válida (el error se ve
+  en stats()): una CRL dañada no "desrevoca" ningún certificado
+
+Ejemplo:
+    index = RevocationIndex("crl/")
+    verifier = SignatureVerifier(revocation_index=index)
+"""
+
+import os
+import time
+import bisect
+import threading
+from datetime import datetime, timezone
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
+
+# Solo para anotaciones: cryptography.x509 se carga al leer la primera CRL
+if TYPE_CHECKING:
+    from cryptography import x509
+
+CRL_EXTENSIONS = (".crl", ".pem", ".der")
+
+DEFAULT_CHECK_INTERVAL = 5.0  # segundos
+
+# Ancho máximo de un número de serie según RFC 5280
+SERIAL_WIDTH = 20
+
+
+def _encode_serial(serial: int, width: int = SERIAL_WIDTH) -> Optional[bytes]:
+    """Número de serie en big-endian de ancho fijo (None si no cabe)."""
+    try:
+        return serial.to_bytes(width, "big")
+    except OverflowError:
+        return None
+
+
+class SortedSerials(Sequence):
+    """
+    Conjunto ordenado e inmutable de números de serie en un bloque de bytes.
+    
+    Con ancho fijo y big-endian, el orden de los bytes coincide con el de
+    los enteros, así que bisect funciona directamente sobre el bloque.
+    """
+    
+    def __init__(self, serials: Iterable[int]):
+        """
+        Construye el conjunto.
+        
+        Args:
+            serials: Números de serie (se ordenan y se eliminan duplicados)
+        """
+        encoded = {_encode_serial(serial) for serial in serials if serial >= 0}
+        encoded.discard(None)
+        self._data = b"".join(sorted(encoded))
+        self._count = len(encoded)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __getitem__(self, index: int) -> bytes:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = index * SERIAL_WIDTH
+        return self._data[start:start + SERIAL_WIDTH]
+    
+    def __contains__(self, serial: object) -> bool:
+        if not isinstance(serial, int) or serial < 0:
+            return False
+        key = _encode_serial(serial)
+        if key is None:
+            return False
+        position = bisect.bisect_left(self, key)
+        return position < self._count and self[position] == key
+    
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por los números de serie."""
+        return len(self._data)
+
+
+class _LoadedCRL:
+    """Índice de una CRL cargada."""
+    
+    def __init__(self, path: str, stamp: Tuple[int, int], crl: "x509.CertificateRevocationList"):
+        self.path = path
+        self.stamp = stamp
+        self.issuer = crl.issuer
+        # next_update_utc existe desde cryptography 42; antes, next_update es UTC sin zona
+        if hasattr(crl, "next_update_utc"):
+            self.next_update = crl.next_update_utc
+        elif crl.next_update is not None:
+            self.next_update = crl.next_update.replace(tzinfo=timezone.utc)
+        else:
+            self.next_update = None
+        self.serials = SortedSerials(revoked.serial_number for revoked in crl)
+
+
+def load_crl(path: str) -> "x509.CertificateRevocationList":
+    """Carga una CRL en formato PEM o DER."""
+    from cryptography import x509
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"-----BEGIN X509 CRL-----" in data:
+        return x509.load_pem_x509_crl(data)
+    return x509.load_der_x509_crl(data)
+
+
+class RevocationIndex:
+    """
+    Índice de números de serie revocados de un conjunto de CRL locales.
+    """
+    
+    def __init__(self, paths: Union[str, Iterable[str]],
+                 issuers: Iterable["x509.Certificate"] = (),
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        Carga las CRL y construye el índice.
+        
+        Args:
+            paths: Archivo(s) CRL o directorio(s) con archivos .crl/.pem/.der
+            issuers: Certificados de las CA emisoras. Si se indican, solo se
+                     aceptan CRL firmadas por una de ellas
+            check_interval: Segundos entre comprobaciones de cambios en disco
+                            (0: comprobar en cada consulta)
+        """
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.issuers = list(issuers)
+        self.check_interval = check_interval
+        
+        self._crls: Dict[str, _LoadedCRL] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self.reloads = 0
+        
+        self.refresh(force=True)
+    
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    
+    def is_revoked(self, certificate: "x509.Certificate") -> bool:
+        """Indica si un certificado aparece en la CRL de su emisor."""
+        return self.is_serial_revoked(certificate.serial_number, certificate.issuer)
+    
+    def is_serial_revoked(self, serial: Union[int, str],
+                          issuer: Optional["x509.Name"] = None) -> bool:
+        """
+        Indica si un número de serie está revocado.
+        
+        Args:
+            serial: Número de serie (entero o en texto, como "certificado_serie")
+            issuer: Emisor del certificado; si no se conoce, se consultan
+                    las CRL de todos los emisores
+        
+        Returns:
+            True si el número de serie está revocado
+        """
+        self._maybe_refresh()
+        serial = int(serial)
+        # Referencia local: una recarga concurrente sustituye el diccionario entero
+        crls = self._crls
+        return any(serial in loaded.serials for loaded in crls.values()
+                   if issuer is None or loaded.issuer == issuer)
+    
+    def stats(self) -> Dict[str, object]:
+        """
+        Devuelve el estado del índice.
+        
+        Returns:
+            Diccionario con CRL cargadas, series revocadas, memoria usada,
+            CRL caducadas (next_update pasado), errores y recargas
+        """
+        crls = list(self._crls.values())
+        now = datetime.now(timezone.utc)
+        return {
+            "crls": len(crls),
+            "revocados": sum(len(loaded.serials) for loaded in crls),
+            "bytes": sum(loaded.serials.nbytes for loaded in crls),
+            "caducadas": [loaded.path for loaded in crls
+                          if loaded.next_update is not None and loaded.next_update < now],
+            "errores": dict(self._errors),
+            "recargas": self.reloads
+        }
+    
+    # ------------------------------------------------------------------
+    # Carga y recarga
+    # ------------------------------------------------------------------
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Vuelve a leer las CRL nuevas o modificadas y descarta las eliminadas.
+        
+        Args:
+            force: Si es True, relee todas las CRL aunque no hayan cambiado
+        
+        Returns:
+            True si el índice cambió
+        
+        Note:
+            Una CRL que no se puede cargar conserva su versión anterior y
+            queda registrada en los errores hasta que se corrija.
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            files = self._list_files()
+            current = {path: loaded for path, loaded in self._crls.items() if path in files}
+            changed = len(current) != len(self._crls)
+            errors = {}
+            
+            for path, stamp in files.items():
+                loaded = current.get(path)
+                if loaded is not None and loaded.stamp == stamp and not force:
+                    continue
+                try:
+                    crl = load_crl(path)
+                    self._check_issuer(crl)
+                except (OSError, ValueError) as e:
+                    # Se conserva la última versión válida: una CRL a medio
+                    # escribir, corrupta o falsificada no debe "desrevocar"
+                    # certificados. Se reintenta en la siguiente comprobación
+                    errors[path] = str(e)
+                    continue
+                current[path] = _LoadedCRL(path, stamp, crl)
+                changed = True
+            
+            # Sustitución atómica: las consultas en curso siguen con el índice anterior
+            self._crls = current
+            self._errors = errors
+            if changed:
+                self.reloads += 1
+            return changed
+    
+    def _maybe_refresh(self) -> None:
+        """Comprueba cambios en disco si ha pasado check_interval."""
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+    
+    def _list_files(self) -> Dict[str, Tuple[int, int]]:
+        """Archivos CRL actuales con su (mtime_ns, tamaño)."""
+        files = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                candidates = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                              if name.lower().endswith(CRL_EXTENSIONS)]
+            else:
+                candidates = [path]
+            for candidate in candidates:
+                try:
+                    st = os.stat(candidate)
+                except OSError:
+                    continue
+                files[candidate] = (st.st_mtime_ns, st.st_size)
+        return files
+    
+    def _check_issuer(self, crl: "x509.CertificateRevocationList") -> None:
+        """Con emisores configurados, la CRL debe estar firmada por uno de ellos."""
+        if not self.issuers:
+            return
+        for issuer in self.issuers:
+            if issuer.subject == crl.issuer and crl.is_signature_valid(issuer.public_key()):
+                return
+        raise ValueError("La CRL no está firmada por ninguna CA configurada")
@@ -0,0 +1,269 @@
+"""
+Módulo de Catálogo de Firmas
+============================
+
+Índice local (SQLite) de las firmas guardadas en el directorio de firmas.
+
+Sin catálogo, saber qué firmas cubren un documento obliga a abrir todos
+los archivos JSON del directorio. El catálogo se actualiza en cada
+save_signature() y permite búsquedas indexadas (O(log n)) por:
+- Hash del documento
+- Nombre del documento
+- Firmante
+- Número de serie del certificado
+- Fecha de la firma
+
+Reconstruir el catálogo de un directorio existente:
+    python signature_catalog.py rebuild ../signatures
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional
+from signature_container import STORAGE_FORMATS, read_signature_file
+
+SIGNATURE_EXTENSIONS = tuple(STORAGE_FORMATS.values())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    document_name TEXT,
+    document_hash TEXT,
+    signer_name TEXT,
+    certificate_serial TEXT,
+    timestamp TEXT,
+    algorithm TEXT,
+    format_version INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_hash ON signatures (document_hash);
+CREATE INDEX IF NOT EXISTS idx_signatures_document ON signatures (document_name);
+CREATE INDEX IF NOT EXISTS idx_signatures_signer ON signatures (signer_name);
+CREATE INDEX IF NOT EXISTS idx_signatures_serial ON signatures (certificate_serial);
+CREATE INDEX IF NOT EXISTS idx_signatures_timestamp ON signatures (timestamp);
+"""
+
+_COLUMNS = ("path", "document_name", "document_hash", "signer_name",
+            "certificate_serial", "timestamp", "algorithm", "format_version")
+
+
+class SignatureCatalog:
+    """
+    Catálogo indexado de firmas digitales respaldado por SQLite.
+    
+    Cada fila apunta al archivo de firma (columna `path`) y guarda los
+    metadatos necesarios para buscarlo sin abrirlo.
+    """
+    
+    def __init__(self, db_path: str = os.path.join("signatures", "catalog.db")):
+        """
+        Abre (o crea) el catálogo.
+        
+        Args:
+            db_path: Ruta de la base de datos SQLite
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # La conexión se comparte entre hilos (p. ej. verify_many), protegida por un lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+    
+    def add(self, signature_path: str, signature_data: Dict) -> None:
+        """
+        Registra (o actualiza) una firma en el catálogo.
+        
+        Args:
+            signature_path: Ruta del archivo de firma
+            signature_data: Datos de la firma
+        """
+        self.add_many([(signature_path, signature_data)])
+    
+    def add_many(self, entries: Iterable[tuple]) -> int:
+        """
+        Registra varias firmas en una sola transacción.
+        
+        Args:
+            entries: Pares (ruta_firma, datos_firma)
+        
+        Returns:
+            Número de firmas registradas
+        """
+        rows = [self._to_row(path, data) for path, data in entries]
+        with self._lock, self._conn:
+            self._insert(rows)
+        return len(rows)
+    
+    def remove(self, signature_path: str) -> None:
+        """
+        Elimina una firma del catálogo.
+        
+        Args:
+            signature_path: Ruta del archivo de firma
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM signatures WHERE path = ?",
+                               (os.path.abspath(signature_path),))
+    
+    def find_by_hash(self, document_hash: str) -> List[Dict]:
+        """Devuelve las firmas de un documento según su hash."""
+        return self._query("document_hash = ?", (document_hash,))
+    
+    def find_by_document(self, document_name: str) -> List[Dict]:
+        """Devuelve las firmas de un documento según su nombre."""
+        return self._query("document_name = ?", (document_name,))
+    
+    def find_by_signer(self, signer_name: str) -> List[Dict]:
+        """Devuelve las firmas realizadas por un firmante."""
+        return self._query("signer_name = ?", (signer_name,))
+    
+    def find_by_serial(self, certificate_serial: str) -> List[Dict]:
+        """Devuelve las firmas realizadas con un certificado."""
+        return self._query("certificate_serial = ?", (str(certificate_serial),))
+    
+    def find_by_paths(self, signature_paths: Iterable[str]) -> List[Dict]:
+        """Devuelve las entradas de los archivos de firma indicados."""
+        paths = [os.path.abspath(path) for path in signature_paths]
+        results = []
+        # SQLite limita el número de parámetros por consulta
+        for i in range(0, len(paths), 500):
+            batch = paths[i:i + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            results.extend(self._query(f"path IN ({placeholders})", tuple(batch)))
+        return results
+    
+    def find_between(self, start: str, end: str) -> List[Dict]:
+        """
+        Devuelve las firmas realizadas en un intervalo de fechas.
+        
+        Args:
+            start: Fecha inicial en formato ISO (incluida)
+            end: Fecha final en formato ISO (incluida)
+        """
+        return self._query("timestamp BETWEEN ? AND ?", (start, end))
+    
+    def count(self) -> int:
+        """Devuelve el número de firmas del catálogo."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+    
+    def rebuild(self, signatures_directory: str) -> Dict[str, int]:
+        """
+        Reconstruye el catálogo a partir de los archivos de firma de un directorio.
+        
+        Args:
+            signatures_directory: Directorio con archivos de firma
+        
+        Returns:
+            Diccionario con las firmas indexadas y los archivos con errores
+        """
+        entries = []
+        errors = 0
+        for filename in sorted(os.listdir(signatures_directory)):
+            if os.path.splitext(filename)[1] not in SIGNATURE_EXTENSIONS:
+                continue
+            path = os.path.join(signatures_directory, filename)
+            try:
+                entries.append((path, read_signature_file(path)))
+            except (OSError, ValueError):
+                errors += 1
+        
+        # Entradas antiguas de los archivos que este recorrido indexa (incluidas las
+        # de archivos borrados). Las de subdirectorios, como las firmas del
+        # registro en log/, se conservan: rebuild() no las vuelve a leer
+        directory = os.path.abspath(signatures_directory)
+        pattern = ((directory + os.sep).replace("\\", "\\\\").replace("%", "\\%")
+                   .replace("_", "\\_") + "%")
+        rows = [self._to_row(path, data) for path, data in entries]
+        
+        # Una sola transacción: el catálogo nunca queda a medio reconstruir
+        with self._lock, self._conn:
+            stale = [(path,) for (path,) in self._conn.execute(
+                         "SELECT path FROM signatures WHERE path LIKE ? ESCAPE '\\'", (pattern,))
+                     if os.path.dirname(path) == directory
+                     and os.path.splitext(path)[1] in SIGNATURE_EXTENSIONS]
+            self._conn.executemany("DELETE FROM signatures WHERE path = ?", stale)
+            self._insert(rows)
+        return {"indexadas": len(rows), "errores": errors}
+    
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self) -> "SignatureCatalog":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _insert(self, rows: List[tuple]) -> None:
+        """Inserta filas (el llamador debe tener el lock y la transacción)."""
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO signatures ({', '.join(_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows
+        )
+    
+    def _query(self, where: str, params: tuple) -> List[Dict]:
+        """Ejecuta una búsqueda y devuelve las filas como diccionarios."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM signatures WHERE {where} "
+                f"ORDER BY timestamp",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _to_row(signature_path: str, signature_data: Dict) -> tuple:
+        """Convierte los datos de una firma en una fila del catálogo."""
+        signer = signature_data.get("signer") or {}
+        serial = signer.get("certificado_serie")
+        return (
+            os.path.abspath(signature_path),
+            signature_data.get("document_name"),
+            signature_data.get("document_hash"),
+            signer.get("nombre"),
+            str(serial) if serial is not None else None,
+            signature_data.get("timestamp"),
+            signature_data.get("algorithm"),
+            signature_data.get("format_version", 1)
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos del catálogo."""
+    parser = argparse.ArgumentParser(description="Catálogo indexado de firmas digitales")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild_parser = subparsers.add_parser("rebuild", help="Reconstruir el catálogo de un directorio")
+    rebuild_parser.add_argument("directory", help="Directorio de firmas")
+    rebuild_parser.add_argument("--db", help="Base de datos (por defecto, <directorio>/catalog.db)")
+    
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.directory):
+        print(f"✗ El directorio '{args.directory}' no existe")
+        return 1
+    
+    db_path = args.db or os.path.join(args.directory, "catalog.db")
+    with SignatureCatalog(db_path) as catalog:
+        result = catalog.rebuild(args.directory)
+    
+    print(f"✓ Catálogo reconstruido: {result['indexadas']} firmas indexadas "
+          f"({result['errores']} archivos con errores)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Módulo de Contenedor Binario de Firmas
+======================================
+
+Formato binario compacto para guardar firmas, alternativo al JSON:
+- La firma y el hash se guardan como bytes crudos (no hexadecimal/base64)
+- La fecha se guarda como un entero de 64 bits
+- El resto de metadatos (firmante, etc.) se guarda como JSON compacto
+
+El cargador detecta el formato automáticamente por los primeros bytes,
+por lo que ambos formatos pueden convivir en el mismo directorio.
+
+Estructura (big-endian):
+------------------------
+    magic           4 bytes   b"SIGB"
+    versión         1 byte    versión del contenedor
+    flags           1 byte    campos presentes
+    format_version  1 byte    versión del formato de firma (v1/v2)
+    key_size        2 bytes
+    timestamp       8 bytes   microsegundos desde 1970-01-01 (hora local)
+    document_hash   1 byte de longitud + digest binario
+    signature       2 bytes de longitud + firma binaria
+    document_name   2 bytes de longitud + UTF-8
+    algorithm       1 byte de longitud + UTF-8
+    extra           4 bytes de longitud + JSON compacto (campos restantes)
+
+Convertir un directorio existente:
+    python signature_container.py convert ../signatures --to binary
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from signature_format import SIGNATURE_FORMAT_V1, encode_signature, decode_signature
+
+MAGIC = b"SIGB"
+CONTAINER_VERSION = 1
+
+JSON_EXTENSION = ".json"
+BINARY_EXTENSION = ".sig"
+STORAGE_FORMATS = {"json": JSON_EXTENSION, "binary": BINARY_EXTENSION}
+
+_HEADER = struct.Struct(">4sBBBHq")
+
+# Prefijos de longitud de los campos variables, en orden:
+# document_hash, signature, document_name, algorithm, extra
+_LENGTHS = tuple(struct.Struct(fmt) for fmt in (">B", ">H", ">H", ">B", ">I"))
+
+# Flags: qué campos fijos están presentes en el contenedor
+_HAS_HASH = 0x01
+_HAS_SIGNATURE = 0x02
+_HAS_TIMESTAMP = 0x04
+_HAS_KEY_SIZE = 0x08
+_HAS_NAME = 0x10
+_HAS_ALGORITHM = 0x20
+_HAS_FORMAT_VERSION = 0x40
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _encode_timestamp(value) -> Optional[int]:
+    """Convierte una fecha ISO (sin zona horaria) en microsegundos, si es exacta."""
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        # No se podría reconstruir el texto original: se guarda como extra
+        return None
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def encode_signature_record(signature_data: Dict) -> bytes:
+    """
+    Serializa los datos de una firma en el contenedor binario.
+    
+    Los campos que no pueden representarse de forma compacta se guardan
+    sin cambios en la sección JSON "extra", de modo que la conversión
+    JSON → binario → JSON no pierde información.
+    
+    Args:
+        signature_data: Datos de la firma
+    
+    Returns:
+        Bytes del contenedor
+    """
+    extra = dict(signature_data)
+    flags = 0
+    
+    format_version = extra.get("format_version", SIGNATURE_FORMAT_V1)
+    if "format_version" in extra and isinstance(format_version, int) and 0 < format_version < 256:
+        flags |= _HAS_FORMAT_VERSION
+        del extra["format_version"]
+    
+    digest = b""
+    try:
+        digest = bytes.fromhex(extra["document_hash"])
+        if len(digest) < 256 and digest.hex() == extra["document_hash"]:
+            flags |= _HAS_HASH
+            del extra["document_hash"]
+    except (KeyError, TypeError, ValueError):
+        pass
+    if not flags & _HAS_HASH:
+        digest = b""
+    
+    signature_bytes = b""
+    try:
+        signature_bytes = decode_signature(signature_data)
+        if (len(signature_bytes) < 65536 and
+                encode_signature(signature_bytes, format_version) == extra["signature"]):
+            flags |= _HAS_SIGNATURE
+            del extra["signature"]
+    except (KeyError, TypeError, ValueError):
+        pass
+    if not flags & _HAS_SIGNATURE:
+        signature_bytes = b""
+    
+    timestamp = _encode_timestamp(extra.get("timestamp"))
+    if timestamp is not None:
+        flags |= _HAS_TIMESTAMP
+        del extra["timestamp"]
+    
+    key_size = extra.get("key_size")
+    if isinstance(key_size, int) and not isinstance(key_size, bool) and 0 <= key_size < 65536:
+        flags |= _HAS_KEY_SIZE
+        del extra["key_size"]
+    else:
+        key_size = 0
+    
+    name = b""
+    if isinstance(extra.get("document_name"), str):
+        name = extra.pop("document_name").encode("utf-8")
+        flags |= _HAS_NAME
+    
+    algorithm = b""
+    if isinstance(extra.get("algorithm"), str) and len(extra["algorithm"].encode("utf-8")) < 256:
+        algorithm = extra.pop("algorithm").encode("utf-8")
+        flags |= _HAS_ALGORITHM
+    
+    extra_bytes = json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    return b"".join([
+        _HEADER.pack(MAGIC, CONTAINER_VERSION, flags,
+                     format_version if flags & _HAS_FORMAT_VERSION else 0,
+                     key_size, timestamp or 0),
+        _LENGTHS[0].pack(len(digest)), digest,
+        _LENGTHS[1].pack(len(signature_bytes)), signature_bytes,
+        _LENGTHS[2].pack(len(name)), name,
+        _LENGTHS[3].pack(len(algorithm)), algorithm,
+        _LENGTHS[4].pack(len(extra_bytes)), extra_bytes,
+    ])
+
+
+def decode_signature_record(data: bytes) -> Dict:
+    """
+    Reconstruye los datos de una firma desde el contenedor binario.
+    
+    Args:
+        data: Bytes del contenedor
+    
+    Returns:
+        Diccionario con los datos de la firma (mismas claves que el JSON)
+    
+    Raises:
+        ValueError: Si los datos no son un contenedor válido
+    """
+    if not is_binary_signature(data):
+        raise ValueError("Los datos no son un contenedor binario de firma")
+    
+    try:
+        magic, version, flags, format_version, key_size, timestamp = _HEADER.unpack_from(data, 0)
+        if version != CONTAINER_VERSION:
+            raise ValueError(f"Versión de contenedor no soportada: {version}")
+        
+        offset = _HEADER.size
+        fields = []
+        for length_struct in _LENGTHS:
+            (length,) = length_struct.unpack_from(data, offset)
+            offset += length_struct.size
+            fields.append(data[offset:offset + length])
+            offset += length
+            if len(fields[-1]) != length:
+                raise ValueError("Contenedor de firma truncado")
+    except struct.error as e:
+        raise ValueError(f"Contenedor de firma corrupto: {e}")
+    
+    digest, signature_bytes, name, algorithm, extra_bytes = fields
+    
+    # Se respeta el orden de claves del JSON original
+    signature_data = {}
+    if flags & _HAS_NAME:
+        signature_data["document_name"] = name.decode("utf-8")
+    if flags & _HAS_HASH:
+        signature_data["document_hash"] = digest.hex()
+    if flags & _HAS_SIGNATURE:
+        version_for_encoding = format_version if flags & _HAS_FORMAT_VERSION else SIGNATURE_FORMAT_V1
+        signature_data["signature"] = encode_signature(signature_bytes, version_for_encoding)
+    if flags & _HAS_TIMESTAMP:
+        signature_data["timestamp"] = (_EPOCH + timedelta(microseconds=timestamp)).isoformat()
+    if flags & _HAS_ALGORITHM:
+        signature_data["algorithm"] = algorithm.decode("utf-8")
+    if flags & _HAS_KEY_SIZE:
+        signature_data["key_size"] = key_size
+    if flags & _HAS_FORMAT_VERSION:
+        signature_data["format_version"] = format_version
+    
+    signature_data.update(json.loads(extra_bytes.decode("utf-8")))
+    return signature_data
+
+
+def is_binary_signature(data: bytes) -> bool:
+    """Indica si unos bytes comienzan con la firma del contenedor binario."""
+    return data[:len(MAGIC)] == MAGIC
+
+
+def read_signature_file(filepath: str) -> Dict:
+    """
+    Lee un archivo de firma detectando su formato (JSON o binario).
+    
+    Args:
+        filepath: Ruta del archivo de firma
+    
+    Returns:
+        Diccionario con los datos de la firma
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    
+    if is_binary_signature(data):
+        return decode_signature_record(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def write_signature_file(signature_data: Dict, filepath: str) -> None:
+    """
+    Escribe un archivo de firma; el formato se elige por la extensión.
+    
+    Args:
+        signature_data: Datos de la firma
+        filepath: Ruta de salida (.sig: binario, cualquier otra: JSON)
+    """
+    if filepath.endswith(BINARY_EXTENSION):
+        with open(filepath, 'wb') as f:
+            f.write(encode_signature_record(signature_data))
+    else:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(signature_data, f, indent=4, ensure_ascii=False)
+
+
+def convert_directory(directory: str, to_format: str = "binary",
+                      remove_original: bool = False) -> Dict[str, int]:
+    """
+    Convierte todos los archivos de firma de un directorio a otro formato.
+    
+    Args:
+        directory: Directorio de firmas
+        to_format: "binary" o "json"
+        remove_original: Si es True, elimina el archivo original tras convertirlo
+    
+    Returns:
+        Diccionario con los archivos convertidos, omitidos y con errores
+    """
+    if to_format not in STORAGE_FORMATS:
+        raise ValueError(f"Formato de almacenamiento desconocido: {to_format}")
+    
+    target_extension = STORAGE_FORMATS[to_format]
+    source_extensions = [ext for ext in STORAGE_FORMATS.values() if ext != target_extension]
+    result = {"convertidas": 0, "omitidas": 0, "errores": 0}
+    
+    for filename in sorted(os.listdir(directory)):
+        base, extension = os.path.splitext(filename)
+        if extension not in source_extensions:
+            continue
+        
+        source = os.path.join(directory, filename)
+        target = os.path.join(directory, base + target_extension)
+        if os.path.exists(target):
+            result["omitidas"] += 1
+            continue
+        
+        try:
+            write_signature_file(read_signature_file(source), target)
+        except (OSError, ValueError) as e:
+            print(f"✗ Error convirtiendo {filename}: {e}")
+            result["errores"] += 1
+            continue
+        
+        if remove_original:
+            os.remove(source)
+        result["convertidas"] += 1
+    
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos del conversor."""
+    parser = argparse.ArgumentParser(description="Conversor de formato de archivos de firma")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    convert_parser = subparsers.add_parser("convert", help="Convertir un directorio de firmas")
+    convert_parser.add_argument("directory", help="Directorio de firmas")
+    convert_parser.add_argument("--to", choices=sorted(STORAGE_FORMATS), default="binary",
+                                help="Formato de destino")
+    convert_parser.add_argument("--remove-original", action="store_true",
+                                help="Eliminar los archivos originales")
+    
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.directory):
+        print(f"✗ El directorio '{args.directory}' no existe")
+        return 1
+    
+    result = convert_directory(args.directory, args.to, args.remove_original)
+    print(f"✓ {result['convertidas']} firmas convertidas, {result['omitidas']} omitidas, "
+          f"{result['errores']} con errores")
+    return 0 if result["errores"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Módulo de Formato de Firmas
+===========================
+
+Define las versiones del formato de firma compartidas por el firmante
+(DigitalSignature) y el verificador (SignatureVerifier).
+
+Versiones:
+----------
+- v1: Se firma el hash HEXADECIMAL (64 caracteres ASCII). RSA-PSS vuelve a
+      aplicar SHA-256 sobre ese texto. La firma se guarda en hexadecimal.
+      Los archivos v1 no incluyen el campo "format_version".
+- v2: Se firma el digest BINARIO precedido de la versión y del algoritmo:
+      "firma-digital:v2:sha256-256:" + digest. El documento se hashea una
+      sola vez; RSA solo vuelve a hashear ese mensaje de unos 60 bytes.
+      La firma se guarda en base64 (un tercio más pequeña que en
+      hexadecimal).
+
+Ni "format_version" ni "hash_algorithm" están firmados como campos, pero
+el mensaje de cada combinación es distinto: una firma v1 (64 caracteres
+hexadecimales) no se puede presentar como v2, ni una v2 como v1 o con
+otro algoritmo. Si v2 firmase solo el digest, la firma v1 del texto h
+sería también la firma v2 de un documento cuyo contenido fuese h.
+
+El algoritmo de resumen (SHA-256 por defecto, ver digest_registry) se
+guarda en el campo "hash_algorithm" cuando no es SHA-256.
+"""
+
+import base64
+from typing import TYPE_CHECKING, Dict, Tuple
+from digest_registry import DEFAULT_DIGEST, get_digest
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+SIGNATURE_FORMAT_V1 = 1
+SIGNATURE_FORMAT_V2 = 2
+
+# Versión usada por defecto para las firmas nuevas
+CURRENT_FORMAT_VERSION = SIGNATURE_FORMAT_V2
+
+SUPPORTED_FORMAT_VERSIONS = (SIGNATURE_FORMAT_V1, SIGNATURE_FORMAT_V2)
+
+# Prefijo del mensaje firmado en v2 (separa los dominios de v1 y v2)
+V2_MESSAGE_PREFIX = b"firma-digital:v2:"
+
+
+def pss_padding() -> "padding.PSS":
+    """Devuelve el padding PSS usado en todas las versiones del formato."""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    return padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()),  # Función de generación de máscara
+        salt_length=padding.PSS.MAX_LENGTH  # Longitud máxima de sal
+    )
+
+
+def get_format_version(signature_data: Dict) -> int:
+    """
+    Detecta la versión de formato de unos datos de firma.
+    
+    Args:
+        signature_data: Datos de la firma
+    
+    Returns:
+        Número de versión (1 si el campo no existe)
+    
+    Raises:
+        ValueError: Si la versión no está soportada
+    """
+    version = signature_data.get("format_version", SIGNATURE_FORMAT_V1)
+    if version not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Versión de formato de firma no soportada: {version}")
+    return version
+
+
+def get_hash_algorithm(signature_data: Dict) -> str:
+    """
+    Devuelve el algoritmo de resumen de unos datos de firma.
+    
+    Args:
+        signature_data: Datos de la firma
+    
+    Returns:
+        Nombre del algoritmo ("sha256" si el campo no existe)
+    
+    Raises:
+        ValueError: Si el algoritmo no está registrado
+    """
+    name = signature_data.get("hash_algorithm", DEFAULT_DIGEST)
+    get_digest(name)
+    return name
+
+
+def message_to_sign(document_hash: str, version: int,
+                    digest: str = DEFAULT_DIGEST) -> Tuple[bytes, "hashes.HashAlgorithm"]:
+    """
+    Devuelve los datos a firmar/verificar y el algoritmo a pasar a RSA.
+    
+    Args:
+        document_hash: Hash hexadecimal del documento
+        version: Versión del formato
+        digest: Algoritmo de resumen con el que se calculó el hash
+    
+    Returns:
+        Tupla (datos, algoritmo) para private_key.sign / public_key.verify
+    """
+    if version == SIGNATURE_FORMAT_V1:
+        from cryptography.hazmat.primitives import hashes
+        return document_hash.encode(), hashes.SHA256()
+    
+    # v2: la versión y el algoritmo forman parte del mensaje firmado
+    data, algorithm = get_digest(digest).message_to_sign(bytes.fromhex(document_hash))
+    return V2_MESSAGE_PREFIX + data, algorithm
+
+
+def encode_signature(signature_bytes: bytes, version: int) -> str:
+    """
+    Codifica los bytes de la firma para guardarlos en texto.
+    
+    Args:
+        signature_bytes: Bytes de la firma RSA
+        version: Versión del formato
+    
+    Returns:
+        Firma en hexadecimal (v1) o base64 (v2)
+    """
+    if version == SIGNATURE_FORMAT_V1:
+        return signature_bytes.hex()
+    return base64.b64encode(signature_bytes).decode("ascii")
+
+
+def decode_signature(signature_data: Dict) -> bytes:
+    """
+    Decodifica la firma guardada según la versión del formato.
+    
+    Args:
+        signature_data: Datos de la firma
+    
+    Returns:
+        Bytes de la firma RSA
+    """
+    if get_format_version(signature_data) == SIGNATURE_FORMAT_V1:
+        return bytes.fromhex(signature_data["signature"])
+    return base64.b64decode(signature_data["signature"], validate=True)
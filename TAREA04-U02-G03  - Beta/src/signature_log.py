@@ -0,0 +1,422 @@
+"""
+Módulo de Registro de Firmas de Solo Anexado
+============================================
+
+Backend de almacenamiento para volúmenes altos de firmas. En lugar de
+escribir un archivo pequeño por firma (millones de inodos, listados de
+directorio lentos), las firmas se anexan de forma secuencial a archivos
+de segmento.
+
+Estructura:
+-----------
+- segment_000001.log, segment_000002.log, ...: registros anexados
+- segment_000001.idx, ...: índice de un segmento ya cerrado
+- Índice en memoria: id → (segmento, posición, longitud)
+
+Cada registro:
+    longitud   4 bytes   longitud del contenido
+    crc32      4 bytes   suma de control del id y el contenido
+    id_len     2 bytes
+    id         UTF-8
+    contenido  contenedor binario de firma (vacío = firma eliminada)
+
+Cuando un segmento supera `segment_max_bytes` se cierra y se abre uno
+nuevo. La compactación reescribe los segmentos cerrados conservando solo
+la última versión de cada firma.
+"""
+
+import os
+import struct
+import zlib
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from signature_container import decode_signature_record, encode_signature_record
+
+_RECORD_HEADER = struct.Struct(">IIH")
+_INDEX_ENTRY = struct.Struct(">QIH")
+_INDEX_HEADER = struct.Struct(">4sQ")
+_INDEX_MAGIC = b"SIDX"
+
+
+class SignatureLog:
+    """
+    Almacén de firmas en segmentos de solo anexado con índice de posiciones.
+
+    Ejemplo:
+        log = SignatureLog("signatures/log")
+        log.append("contrato_signature", signature_data)
+        signature_data = log.get("contrato_signature")
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 compaction_threshold: float = 0.5, fsync: bool = False):
+        """
+        Abre (o crea) el registro de firmas.
+
+        Args:
+            directory: Directorio de los segmentos
+            segment_max_bytes: Tamaño a partir del cual se cierra un segmento
+            compaction_threshold: Fracción de registros obsoletos en los segmentos
+                                  cerrados a partir de la cual se compacta al rotar
+            fsync: Si es True, fuerza la escritura a disco tras cada anexado
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compaction_threshold = compaction_threshold
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        # id → (número de segmento, posición del registro, longitud del contenido)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        # Registros obsoletos (reemplazados o eliminados) por segmento
+        self._stale: Dict[int, int] = {}
+        self._records: Dict[int, int] = {}
+
+        segments = self._segment_numbers()
+        for number in segments:
+            self._load_segment_index(number)
+
+        self._active = segments[-1] if segments else 1
+        if segments:
+            self._truncate_torn_tail(self._active)
+        self._file = open(self._segment_path(self._active), "ab")
+
+    def append(self, record_id: str, signature_data: Dict) -> str:
+        """
+        Anexa una firma al registro.
+
+        Args:
+            record_id: Identificador de la firma (p. ej. el nombre del archivo de firma)
+            signature_data: Datos de la firma
+
+        Returns:
+            El identificador de la firma
+        """
+        self.append_many([(record_id, signature_data)])
+        return record_id
+
+    def append_many(self, records: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Anexa varias firmas con una sola escritura secuencial.
+
+        Args:
+            records: Pares (id, datos_firma)
+
+        Returns:
+            Número de firmas anexadas
+        """
+        frames = [(record_id, self._frame(record_id, encode_signature_record(data)))
+                  for record_id, data in records]
+        with self._lock:
+            self._write_frames(frames)
+            self._maybe_rotate()
+        return len(frames)
+
+    def get(self, record_id: str) -> Dict:
+        """
+        Obtiene una firma por su identificador (acceso aleatorio).
+
+        Args:
+            record_id: Identificador de la firma
+
+        Returns:
+            Datos de la firma
+
+        Raises:
+            KeyError: Si la firma no existe
+            ValueError: Si el registro está corrupto
+
+        Note:
+            La lectura se hace sin el cerrojo. Si compact() mueve el registro
+            (o borra su segmento) mientras tanto, se vuelve a leer en su
+            nueva posición.
+        """
+        with self._lock:
+            location = self._index[record_id]
+            self._file.flush()
+
+        while True:
+            segment, offset, length = location
+            stored_id, payload = self._read_at(segment, offset)
+            if stored_id == record_id and payload is not None and len(payload) == length:
+                return decode_signature_record(payload)
+
+            with self._lock:
+                current = self._index.get(record_id)
+                if current is None:
+                    raise KeyError(record_id)
+                if current == location:
+                    raise ValueError(f"Registro de firma corrupto: {record_id}")
+                location = current
+                self._file.flush()
+
+    def delete(self, record_id: str) -> None:
+        """
+        Elimina una firma anexando una marca de borrado.
+
+        Args:
+            record_id: Identificador de la firma
+        """
+        with self._lock:
+            if record_id not in self._index:
+                raise KeyError(record_id)
+            self._write_frames([(record_id, self._frame(record_id, b""))])
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def ids(self) -> List[str]:
+        """Devuelve los identificadores de todas las firmas vigentes."""
+        with self._lock:
+            return list(self._index)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """
+        Recorre todas las firmas vigentes como pares (id, datos).
+
+        Las firmas borradas durante el recorrido se omiten; un registro
+        corrupto lanza ValueError como en get().
+        """
+        for record_id in self.ids():
+            try:
+                yield record_id, self.get(record_id)
+            except KeyError:
+                continue
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Reescribe los segmentos cerrados conservando solo las firmas vigentes.
+
+        Returns:
+            Diccionario con los segmentos eliminados y los registros descartados
+        """
+        with self._lock:
+            sealed = [n for n in self._segment_numbers() if n != self._active]
+            if not sealed:
+                return {"segmentos_eliminados": 0, "registros_descartados": 0}
+
+            discarded = sum(self._stale.get(n, 0) for n in sealed)
+            live = [(record_id, location) for record_id, location in self._index.items()
+                    if location[0] in sealed]
+
+            # Las firmas vigentes se copian al segmento activo
+            frames = []
+            for record_id, (segment, offset, length) in live:
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(offset)
+                    _, payload = self._read_record(f)
+                frames.append((record_id, self._frame(record_id, payload)))
+            self._write_frames(frames, count_stale=False)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            for number in sealed:
+                os.remove(self._segment_path(number))
+                index_path = self._index_path(number)
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                self._stale.pop(number, None)
+                self._records.pop(number, None)
+
+            self._maybe_rotate()
+            return {"segmentos_eliminados": len(sealed), "registros_descartados": discarded}
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve el número de firmas, registros obsoletos y segmentos."""
+        with self._lock:
+            return {
+                "firmas": len(self._index),
+                "registros": sum(self._records.values()),
+                "obsoletos": sum(self._stale.values()),
+                "segmentos": len(self._segment_numbers())
+            }
+
+    def close(self) -> None:
+        """Cierra el segmento activo."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "SignatureLog":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Detalles internos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _frame(record_id: str, payload: bytes) -> bytes:
+        """Construye los bytes de un registro."""
+        id_bytes = record_id.encode("utf-8")
+        crc = zlib.crc32(payload, zlib.crc32(id_bytes))
+        return _RECORD_HEADER.pack(len(payload), crc, len(id_bytes)) + id_bytes + payload
+
+    def _read_at(self, segment: int, offset: int) -> Tuple[Optional[str], Optional[bytes]]:
+        """Lee el registro de una posición; (None, None) si el segmento ya no existe."""
+        try:
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                return self._read_record(f)
+        except FileNotFoundError:
+            return None, None
+
+    @staticmethod
+    def _read_record(f) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Lee un registro completo en la posición actual del archivo.
+
+        Returns:
+            Tupla (id, contenido); (None, None) al final o si el registro está
+            incompleto o corrupto (p. ej. una escritura interrumpida)
+        """
+        header = f.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return None, None
+        length, crc, id_len = _RECORD_HEADER.unpack(header)
+        id_bytes = f.read(id_len)
+        payload = f.read(length)
+        if len(id_bytes) < id_len or len(payload) < length:
+            return None, None
+        if zlib.crc32(payload, zlib.crc32(id_bytes)) != crc:
+            return None, None
+        return id_bytes.decode("utf-8"), payload
+
+    def _write_frames(self, frames: List[Tuple[str, bytes]], count_stale: bool = True) -> None:
+        """Escribe registros en el segmento activo y actualiza el índice."""
+        offset = self._file.tell()
+        for record_id, frame in frames:
+            payload_length = len(frame) - _RECORD_HEADER.size - len(record_id.encode("utf-8"))
+            previous = self._index.get(record_id)
+            if previous is not None and count_stale:
+                self._stale[previous[0]] = self._stale.get(previous[0], 0) + 1
+
+            self._records[self._active] = self._records.get(self._active, 0) + 1
+            if payload_length == 0:
+                # Marca de borrado: también es un registro obsoleto
+                self._index.pop(record_id, None)
+                self._stale[self._active] = self._stale.get(self._active, 0) + 1
+            else:
+                self._index[record_id] = (self._active, offset, payload_length)
+            offset += len(frame)
+
+        self._file.write(b"".join(frame for _, frame in frames))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _maybe_rotate(self) -> None:
+        """Cierra el segmento activo si es demasiado grande y compacta si conviene."""
+        if self._file.tell() < self.segment_max_bytes:
+            return
+
+        self._file.close()
+        self._write_segment_index(self._active)
+        self._active += 1
+        self._file = open(self._segment_path(self._active), "ab")
+
+        sealed_records = sum(count for n, count in self._records.items() if n != self._active)
+        sealed_stale = sum(count for n, count in self._stale.items() if n != self._active)
+        if sealed_records and sealed_stale / sealed_records >= self.compaction_threshold:
+            self.compact()
+
+    def _segment_numbers(self) -> List[int]:
+        """Devuelve los números de segmento existentes, ordenados."""
+        numbers = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith("segment_") and filename.endswith(".log"):
+                try:
+                    numbers.append(int(filename[len("segment_"):-len(".log")]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment_{number:06d}.log")
+
+    def _index_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment_{number:06d}.idx")
+
+    def _write_segment_index(self, number: int) -> None:
+        """Guarda el índice de un segmento cerrado para no tener que recorrerlo al abrir."""
+        entries = [(record_id, offset, length)
+                   for record_id, (segment, offset, length) in self._scan_segment(number)]
+        parts = [_INDEX_HEADER.pack(_INDEX_MAGIC, os.path.getsize(self._segment_path(number)))]
+        for record_id, offset, length in entries:
+            id_bytes = record_id.encode("utf-8")
+            parts.append(_INDEX_ENTRY.pack(offset, length, len(id_bytes)) + id_bytes)
+
+        tmp_path = self._index_path(number) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self._index_path(number))
+
+    def _read_segment_index(self, number: int) -> Optional[List[Tuple[str, Tuple[int, int, int]]]]:
+        """Lee el índice de un segmento; None si no existe o no corresponde al segmento."""
+        try:
+            with open(self._index_path(number), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < _INDEX_HEADER.size:
+            return None
+        magic, segment_size = _INDEX_HEADER.unpack_from(data, 0)
+        if magic != _INDEX_MAGIC or segment_size != os.path.getsize(self._segment_path(number)):
+            return None
+
+        entries = []
+        position = _INDEX_HEADER.size
+        while position < len(data):
+            offset, length, id_len = _INDEX_ENTRY.unpack_from(data, position)
+            position += _INDEX_ENTRY.size
+            record_id = data[position:position + id_len].decode("utf-8")
+            position += id_len
+            entries.append((record_id, (number, offset, length)))
+        return entries
+
+    def _scan_segment(self, number: int) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """Recorre un segmento y devuelve sus registros en orden (incluidas las marcas de borrado)."""
+        entries = []
+        with open(self._segment_path(number), "rb") as f:
+            while True:
+                offset = f.tell()
+                record_id, payload = self._read_record(f)
+                if record_id is None:
+                    break
+                entries.append((record_id, (number, offset, len(payload))))
+        return entries
+
+    def _truncate_torn_tail(self, number: int) -> None:
+        """Descarta un registro incompleto al final del segmento (escritura interrumpida)."""
+        path = self._segment_path(number)
+        valid_end = 0
+        with open(path, "rb") as f:
+            while self._read_record(f)[0] is not None:
+                valid_end = f.tell()
+        if valid_end < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _load_segment_index(self, number: int) -> None:
+        """Incorpora los registros de un segmento al índice en memoria."""
+        entries = self._read_segment_index(number)
+        if entries is None:
+            entries = self._scan_segment(number)
+
+        for record_id, location in entries:
+            previous = self._index.get(record_id)
+            if previous is not None:
+                self._stale[previous[0]] = self._stale.get(previous[0], 0) + 1
+            self._records[number] = self._records.get(number, 0) + 1
+            if location[2] == 0:
+                self._index.pop(record_id, None)
+                self._stale[number] = self._stale.get(number, 0) + 1
+            else:
+                self._index[record_id] = location
@@ -0,0 +1,236 @@
+"""
+Módulo de Esquemas de Firma
+===========================
+
+Abstracción de los algoritmos de firma asimétrica que usan KeyManager,
+DigitalSignature y SignatureVerifier:
+
+- rsa-pss:    RSA con padding PSS (por defecto, el esquema original)
+- ed25519:    EdDSA sobre Curve25519. Firma en microsegundos y genera
+              claves casi al instante; claves y firmas muy pequeñas
+- ecdsa-p256: ECDSA sobre la curva NIST P-256 (secp256r1)
+
+El esquema se deduce del tipo de la clave, y se guarda en el campo
+"signature_scheme" de la firma cuando no es RSA-PSS (las firmas RSA
+conservan el formato anterior).
+
+Qué se firma:
+-------------
+El mensaje de signature_format.message_to_sign: en v2, la versión, el
+algoritmo de resumen y el digest del documento. RSA-PSS y ECDSA lo
+hashean con el algoritmo de digest_registry; Ed25519 lo firma tal cual.
+
+Los módulos de cryptography de cada esquema se importan la primera vez que
+se usa una clave, no al importar este módulo: los comandos que solo leen
+metadatos de firmas arrancan sin cargar cryptography.
+"""
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+from digest_registry import DEFAULT_DIGEST
+from signature_format import message_to_sign, pss_padding
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+DEFAULT_SCHEME = "rsa-pss"
+
+# Referencias diferidas: no obligan a importar cryptography
+PrivateKey = Union["rsa.RSAPrivateKey", "ed25519.Ed25519PrivateKey", "ec.EllipticCurvePrivateKey"]
+PublicKey = Union["rsa.RSAPublicKey", "ed25519.Ed25519PublicKey", "ec.EllipticCurvePublicKey"]
+
+
+class SignatureScheme(ABC):
+    """
+    Esquema de firma asimétrica.
+    
+    Las subclases implementan los métodos abstractos: tipos de clave,
+    generación de claves y firma y verificación del hash de un documento.
+    """
+    
+    name = ""
+    label = ""
+    
+    @abstractmethod
+    def key_types(self) -> Tuple[type, type]:
+        """Clases (privada, pública) de las claves de este esquema."""
+    
+    @abstractmethod
+    def generate_private_key(self, key_size: Optional[int] = None) -> PrivateKey:
+        """Genera una clave privada nueva."""
+    
+    @abstractmethod
+    def sign(self, private_key: PrivateKey, document_hash: str, format_version: int,
+             digest: str = DEFAULT_DIGEST) -> bytes:
+        """
+        Firma el hash hexadecimal de un documento.
+        
+        Args:
+            private_key: Clave privada del firmante
+            document_hash: Hash hexadecimal del documento
+            format_version: Versión del formato de firma
+            digest: Algoritmo con el que se calculó el hash
+        
+        Returns:
+            Bytes de la firma
+        """
+    
+    @abstractmethod
+    def verify(self, public_key: PublicKey, signature: bytes, document_hash: str,
+               format_version: int, digest: str = DEFAULT_DIGEST) -> None:
+        """
+        Verifica una firma sobre el hash de un documento.
+        
+        Raises:
+            InvalidSignature: Si la firma no es válida
+            TypeError: Si la clave no corresponde a este esquema
+        """
+    
+    def certificate_hash(self) -> Optional["hashes.HashAlgorithm"]:
+        """Algoritmo de hash para firmar certificados X.509 con este esquema."""
+        from cryptography.hazmat.primitives import hashes
+        return hashes.SHA256()
+    
+    def key_size(self, key: Union[PrivateKey, PublicKey]) -> int:
+        """Tamaño de la clave en bits."""
+        return key.key_size
+    
+    def _check_key(self, key, private: bool) -> None:
+        """Comprueba que una clave (privada o pública) pertenece a este esquema."""
+        if not isinstance(key, self.key_types()[0 if private else 1]):
+            raise TypeError(f"La clave no es de tipo {self.label}")
+
+
+class RSAPSSScheme(SignatureScheme):
+    """RSA con padding PSS."""
+    
+    name = "rsa-pss"
+    label = "RSA-PSS"
+    
+    def key_types(self):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        return rsa.RSAPrivateKey, rsa.RSAPublicKey
+    
+    def generate_private_key(self, key_size: Optional[int] = None) -> PrivateKey:
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        return rsa.generate_private_key(public_exponent=65537, key_size=key_size or 2048)
+    
+    def sign(self, private_key, document_hash, format_version, digest=DEFAULT_DIGEST):
+        self._check_key(private_key, private=True)
+        data, algorithm = message_to_sign(document_hash, format_version, digest)
+        # PSS (Probabilistic Signature Scheme) es más seguro que PKCS1v15
+        return private_key.sign(data, pss_padding(), algorithm)
+    
+    def verify(self, public_key, signature, document_hash, format_version,
+               digest=DEFAULT_DIGEST):
+        self._check_key(public_key, private=False)
+        data, algorithm = message_to_sign(document_hash, format_version, digest)
+        public_key.verify(signature, data, pss_padding(), algorithm)
+
+
+class Ed25519Scheme(SignatureScheme):
+    """EdDSA sobre Curve25519."""
+    
+    name = "ed25519"
+    label = "Ed25519"
+    
+    def key_types(self):
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+        return ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey
+    
+    def generate_private_key(self, key_size: Optional[int] = None) -> PrivateKey:
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+        return ed25519.Ed25519PrivateKey.generate()
+    
+    def sign(self, private_key, document_hash, format_version, digest=DEFAULT_DIGEST):
+        self._check_key(private_key, private=True)
+        data, _ = message_to_sign(document_hash, format_version, digest)
+        return private_key.sign(data)
+    
+    def verify(self, public_key, signature, document_hash, format_version,
+               digest=DEFAULT_DIGEST):
+        self._check_key(public_key, private=False)
+        data, _ = message_to_sign(document_hash, format_version, digest)
+        public_key.verify(signature, data)
+    
+    def certificate_hash(self) -> Optional["hashes.HashAlgorithm"]:
+        # Ed25519 lleva su propio hash: los certificados se firman sin algoritmo
+        return None
+    
+    def key_size(self, key) -> int:
+        return 256
+
+
+class ECDSAP256Scheme(SignatureScheme):
+    """ECDSA sobre la curva NIST P-256."""
+    
+    name = "ecdsa-p256"
+    label = "ECDSA P-256"
+    
+    def key_types(self):
+        from cryptography.hazmat.primitives.asymmetric import ec
+        return ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey
+    
+    def generate_private_key(self, key_size: Optional[int] = None) -> PrivateKey:
+        from cryptography.hazmat.primitives.asymmetric import ec
+        return ec.generate_private_key(ec.SECP256R1())
+    
+    def sign(self, private_key, document_hash, format_version, digest=DEFAULT_DIGEST):
+        from cryptography.hazmat.primitives.asymmetric import ec
+        self._check_key(private_key, private=True)
+        data, algorithm = message_to_sign(document_hash, format_version, digest)
+        return private_key.sign(data, ec.ECDSA(algorithm))
+    
+    def verify(self, public_key, signature, document_hash, format_version,
+               digest=DEFAULT_DIGEST):
+        from cryptography.hazmat.primitives.asymmetric import ec
+        self._check_key(public_key, private=False)
+        data, algorithm = message_to_sign(document_hash, format_version, digest)
+        public_key.verify(signature, data, ec.ECDSA(algorithm))
+    
+    def _check_key(self, key, private: bool) -> None:
+        from cryptography.hazmat.primitives.asymmetric import ec
+        super()._check_key(key, private)
+        if not isinstance(key.curve, ec.SECP256R1):
+            raise TypeError(f"La clave no es de tipo {self.label}")
+
+
+SIGNATURE_SCHEMES: Dict[str, SignatureScheme] = {
+    scheme.name: scheme for scheme in (RSAPSSScheme(), Ed25519Scheme(), ECDSAP256Scheme())
+}
+
+
+def get_scheme(name: str) -> SignatureScheme:
+    """
+    Devuelve un esquema de firma por su nombre.
+    
+    Raises:
+        ValueError: Si el esquema no existe
+    """
+    try:
+        return SIGNATURE_SCHEMES[name]
+    except KeyError:
+        raise ValueError(f"Esquema de firma no soportado: {name}")
+
+
+def scheme_for_key(key: Union[PrivateKey, PublicKey]) -> SignatureScheme:
+    """
+    Deduce el esquema de firma a partir del tipo de una clave.
+    
+    Raises:
+        ValueError: Si el tipo de clave no corresponde a ningún esquema
+    """
+    from cryptography.hazmat.primitives.asymmetric import ec
+    for scheme in SIGNATURE_SCHEMES.values():
+        if isinstance(key, scheme.key_types()):
+            if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) \
+                    and not isinstance(key.curve, ec.SECP256R1):
+                continue
+            return scheme
+    raise ValueError(f"Tipo de clave no soportado: {type(key).__name__}")
+
+
+def get_signature_scheme(signature_data: Dict) -> SignatureScheme:
+    """Devuelve el esquema registrado en unos datos de firma (RSA-PSS si no hay campo)."""
+    return get_scheme(signature_data.get("signature_scheme", DEFAULT_SCHEME))
@@ -0,0 +1,208 @@
+"""
+Módulo Cliente del Demonio de Firma
+===================================
+
+Cliente mínimo (solo biblioteca estándar) del protocolo JSON por líneas de
+signing_daemon. No importa cryptography, por lo que arranca al instante.
+
+Ejemplo:
+    with SigningClient() as client:             # socket Unix por defecto
+        signature = client.sign(data=contenido, key="juan")
+        result = client.verify(signature, data=contenido, key="juan")
+    
+    with SigningClient(port=8765, token=token) as client:   # demonio en TCP
+        ...
+"""
+
+import os
+import json
+import base64
+import socket
+import itertools
+from typing import Any, Dict, Iterable, List, Optional
+
+# Puerto sugerido para el demonio en TCP (signing_daemon.py --port)
+DEFAULT_DAEMON_PORT = 8765
+
+# Variable de entorno con el token de acceso del demonio
+TOKEN_ENVIRONMENT_VARIABLE = "FIRMA_DAEMON_TOKEN"
+
+
+def default_socket_path() -> str:
+    """
+    Ruta por defecto del socket Unix del demonio.
+    
+    Se usa el directorio privado del usuario ($XDG_RUNTIME_DIR) y, si no
+    existe, el directorio temporal con el uid en el nombre.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "firma-demonio.sock")
+    import tempfile
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "")
+    return os.path.join(tempfile.gettempdir(), f"firma-demonio-{user}.sock")
+
+
+class DaemonError(RuntimeError):
+    """El demonio respondió con un error."""
+
+
+class SigningClient:
+    """
+    Cliente síncrono de una conexión al demonio de firma.
+    
+    No es seguro compartir un cliente entre hilos: usar uno por hilo.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None,
+                 unix_socket: Optional[str] = None, timeout: Optional[float] = 30.0,
+                 token: Optional[str] = None):
+        """
+        Abre la conexión con el demonio.
+        
+        Args:
+            host: Dirección TCP del demonio
+            port: Puerto TCP del demonio; sin puerto se usa el socket Unix
+            unix_socket: Ruta del socket Unix (por defecto, default_socket_path())
+            timeout: Segundos máximos de espera por respuesta
+            token: Token de acceso del demonio (por defecto, el de la
+                   variable de entorno FIRMA_DAEMON_TOKEN)
+        """
+        if port is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            try:
+                self._socket.connect(unix_socket or default_socket_path())
+            except OSError:
+                self._socket.close()
+                raise
+        else:
+            self._socket = socket.create_connection((host, port), timeout=timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._socket.makefile("rwb")
+        self._ids = itertools.count(1)
+        self._token = token or os.environ.get(TOKEN_ENVIRONMENT_VARIABLE)
+    
+    def request(self, op: str, **params) -> Any:
+        """
+        Envía una petición y espera su respuesta.
+        
+        Raises:
+            DaemonError: Si el demonio responde con un error
+        """
+        return self.request_many([dict(params, op=op)])[0]
+    
+    def request_many(self, requests: Iterable[Dict], raise_errors: bool = True) -> List[Any]:
+        """
+        Envía varias peticiones seguidas y espera todas las respuestas.
+        
+        Las peticiones viajan juntas, por lo que el demonio puede agruparlas
+        en un mismo lote.
+        
+        Args:
+            requests: Peticiones (diccionarios con "op" y sus parámetros)
+            raise_errors: Si es False, los errores se devuelven como DaemonError
+                          en la lista en lugar de lanzarse
+        
+        Returns:
+            Resultados en el mismo orden que las peticiones
+        """
+        order = {}
+        for request in requests:
+            request = dict(request, id=next(self._ids))
+            if self._token:
+                request["token"] = self._token
+            order[request["id"]] = len(order)
+            self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+        
+        results: List[Any] = [None] * len(order)
+        for _ in range(len(order)):
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("El demonio cerró la conexión")
+            response = json.loads(line)
+            index = order[response["id"]]
+            if response["ok"]:
+                results[index] = response["result"]
+            else:
+                results[index] = DaemonError(response["error"])
+        
+        if raise_errors:
+            for result in results:
+                if isinstance(result, DaemonError):
+                    raise result
+        return results
+    
+    def sign(self, data: Optional[bytes] = None, path: Optional[str] = None,
+             key: Optional[str] = None, **options) -> Dict:
+        """
+        Firma un documento en el demonio.
+        
+        Args:
+            data: Contenido del documento (se envía en la petición)
+            path: Ruta del documento (la lee el demonio)
+            key: Nombre de la clave (opcional si el demonio solo tiene una)
+            **options: document_name, digest, format_version, signer_info (solo
+                       si la clave del demonio no tiene certificado)
+        
+        Returns:
+            Diccionario con los datos de la firma
+        """
+        return self.request("sign", **self._document(data, path, key), **options)
+    
+    def verify(self, signature_data: Dict, data: Optional[bytes] = None,
+               path: Optional[str] = None, key: Optional[str] = None,
+               **options) -> Dict:
+        """
+        Verifica una firma en el demonio.
+        
+        Args:
+            signature_data: Datos de la firma
+            data: Contenido del documento
+            path: Ruta del documento (la lee el demonio)
+            key: Nombre de la clave cargada cuya clave pública se usa
+            **options: mode (solo con path) o public_key (PEM) en lugar de key
+        
+        Returns:
+            Diccionario con "valida" y "mensaje"
+        """
+        return self.request("verify", signature=signature_data,
+                            **self._document(data, path, key), **options)
+    
+    def ping(self) -> bool:
+        """Comprueba que el demonio responde."""
+        return self.request("ping")["pong"]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve las métricas del demonio."""
+        return self.request("stats")
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Devuelve la instantánea de las métricas de tiempo del demonio (ver metrics.py)."""
+        return self.request("metrics")
+    
+    def close(self) -> None:
+        """Cierra la conexión."""
+        try:
+            self._file.close()
+        finally:
+            self._socket.close()
+    
+    def __enter__(self) -> "SigningClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    @staticmethod
+    def _document(data: Optional[bytes], path: Optional[str],
+                  key: Optional[str]) -> Dict[str, str]:
+        """Parámetros comunes de una petición sobre un documento."""
+        if (data is None) == (path is None):
+            raise ValueError("Indicar exactamente uno de data o path")
+        params = {"data": base64.b64encode(data).decode("ascii")} if data is not None \
+            else {"path": path}
+        if key is not None:
+            params["key"] = key
+        return params
@@ -0,0 +1,697 @@
+"""
+Módulo del Demonio de Firma
+===========================
+
+Servicio local de larga duración para firmar y verificar a alto ritmo.
+Cada ejecución de main.py vuelve a importar cryptography, a cargar las
+claves y a pedir la contraseña; el demonio lo hace una sola vez y mantiene
+las claves desbloqueadas en memoria.
+
+Protocolo (JSON por líneas):
+----------------------------
+El demonio escucha en un socket Unix (por defecto, el de
+signing_client.default_socket_path()) o, con --port, en 127.0.0.1. Cada
+petición es un objeto JSON en una línea; cada respuesta también, con el
+mismo "id". Una conexión puede enviar varias peticiones sin esperar las
+respuestas, que llegan en el orden en que terminan.
+
+    {"id": 1, "op": "sign", "key": "juan", "data": "<base64>", "document_name": "a.txt"}
+    {"id": 1, "ok": true, "result": {...datos de la firma...}}
+    
+    {"id": 2, "op": "verify", "key": "juan", "path": "/ruta/a.txt", "signature": {...}}
+    {"id": 2, "ok": true, "result": {"valida": true, "mensaje": "ÉXITO: ..."}}
+
+Operaciones: sign, verify, keys, stats, metrics y ping. Los documentos se envían en
+línea ("data", base64) o, si el demonio se arrancó con --allow-path, por
+ruta ("path", leída por el demonio y dentro de ese directorio). Con un
+almacén de confianza (--trust-store), verify sin "key" ni "public_key"
+busca la clave del firmante por la huella guardada en la firma.
+
+Agrupación de peticiones:
+-------------------------
+Las peticiones sign y verify concurrentes se agrupan en lotes: mientras
+todos los hilos del pool están ocupados, las peticiones que llegan se
+acumulan y el siguiente hilo libre las procesa de una vez (hasta
+max_batch). Con poca carga cada petición sale sola, sin esperar.
+
+Seguridad:
+----------
+Cualquiera que pueda conectarse al demonio puede firmar con sus claves:
+
+- El socket Unix se crea con permisos 0600 (umask restrictiva antes de
+  bind, sin ventana en la que otro usuario pueda conectarse)
+- En TCP, que cualquier usuario local alcanza, cada petición debe llevar
+  el "token" del demonio (FIRMA_DAEMON_TOKEN o el generado en --token-file)
+- Las peticiones por ruta están desactivadas salvo con --allow-path, y
+  solo se leen archivos dentro de ese directorio
+- Con una clave que tiene certificado, el firmante de las firmas es el del
+  certificado: se rechaza el "signer_info" del cliente
+- La cola de peticiones de firma y verificación tiene un tamaño máximo
+  (--max-queue); con la cola llena se responde "Demonio ocupado"
+
+Ejecutar:
+    python signing_daemon.py --key juan --key ana
+    python signing_daemon.py --key juan --unix-socket /run/user/1000/firma.sock
+    python signing_daemon.py --key juan --port 8765 --token-file keys/daemon.token
+    python signing_daemon.py --key juan --trust-store keys --allow-path documentos
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import base64
+import socket
+import asyncio
+import getpass
+import secrets
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from digest_registry import DEFAULT_DIGEST, get_digest
+from digital_signature import create_signature, signer_from_certificate
+from hashing import hash_file, hash_stream
+from metrics import REGISTRY
+from signature_format import CURRENT_FORMAT_VERSION, SUPPORTED_FORMAT_VERSIONS
+from signature_schemes import PrivateKey, PublicKey, scheme_for_key
+from signing_client import TOKEN_ENVIRONMENT_VARIABLE, default_socket_path
+from trust_store import TrustStore, key_fingerprint
+from verification import VERIFICATION_MODES, SignatureVerifier
+
+# Tamaño máximo de una línea de petición (documentos en línea incluidos)
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+# Operaciones que se agrupan en lotes y se ejecutan en el pool de hilos
+BATCHED_OPERATIONS = ("sign", "verify")
+
+# Peticiones sign/verify en espera como máximo (documentos en línea incluidos)
+DEFAULT_MAX_QUEUE = 1024
+
+
+class DaemonRequestError(ValueError):
+    """Petición mal formada o que hace referencia a una clave desconocida."""
+
+
+class DaemonBusyError(RuntimeError):
+    """La cola de peticiones del demonio está llena."""
+
+
+class SigningDaemon:
+    """
+    Demonio de firma con claves en memoria y agrupación de peticiones.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None,
+                 unix_socket: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_batch: int = 64, batch_window: float = 0.0,
+                 verifier: Optional[SignatureVerifier] = None,
+                 token: Optional[str] = None, allowed_root: Optional[str] = None,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Inicializa el demonio (no empieza a escuchar hasta start()).
+        
+        Args:
+            host: Dirección TCP (solo localhost por seguridad)
+            port: Puerto TCP (0 elige uno libre). Sin puerto se usa un socket Unix
+            unix_socket: Ruta del socket Unix (por defecto, default_socket_path())
+            max_workers: Hilos del pool (por defecto, uno por núcleo)
+            max_batch: Peticiones máximas por lote
+            batch_window: Segundos que se espera a más peticiones antes de
+                          despachar un lote. Con 0, el lote se forma solo con
+                          lo que se acumuló mientras los hilos estaban ocupados
+            verifier: Verificador de firmas (por defecto, uno nuevo)
+            token: Secreto que cada petición debe incluir en "token";
+                   obligatorio en TCP
+            allowed_root: Directorio cuyos archivos se pueden pedir por ruta;
+                          sin él, solo se aceptan documentos en línea
+            max_queue: Peticiones sign/verify en espera como máximo; las que
+                       llegan con la cola llena se rechazan (DaemonBusyError)
+        
+        Raises:
+            ValueError: Si se indican puerto y socket Unix, o TCP sin token
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch debe ser al menos 1")
+        if max_queue < 1:
+            raise ValueError("max_queue debe ser al menos 1")
+        if port is not None and unix_socket:
+            raise ValueError("Indicar un puerto TCP o un socket Unix, no ambos")
+        if port is not None and not token:
+            raise ValueError("El demonio en TCP necesita un token de acceso")
+        
+        self.host = host
+        self.port = port
+        self.unix_socket = None if port is not None else (unix_socket or default_socket_path())
+        self.token = token
+        self.allowed_root = os.path.realpath(allowed_root) if allowed_root else None
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.verifier = verifier or SignatureVerifier()
+        
+        # nombre -> (clave privada, firmante, huella de la clave)
+        self._keys: Dict[str, Tuple[PrivateKey, Optional[Dict[str, str]], str]] = {}
+        self._token = token.encode("utf-8") if token else None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="firma-demonio")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._started_at = time.time()
+        
+        # Hilo propio con su bucle de eventos (start_background)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        
+        # Métricas
+        self._requests = 0
+        self._errors = 0
+        self._batches = 0
+        self._batched_requests = 0
+    
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+    
+    def add_key(self, name: str, private_key: PrivateKey,
+                certificate: Optional[x509.Certificate] = None) -> None:
+        """
+        Registra una clave desbloqueada con la que el demonio puede firmar.
+        
+        Args:
+            name: Nombre con el que los clientes eligen la clave
+            private_key: Clave privada (RSA, Ed25519 o ECDSA P-256)
+            certificate: Certificado opcional; sus datos se añaden a las firmas
+        """
+        scheme_for_key(private_key)
+        signer = signer_from_certificate(certificate) if certificate else None
+        self._keys[name] = (private_key, signer, key_fingerprint(private_key))
+    
+    def key_names(self) -> List[str]:
+        """Devuelve los nombres de las claves cargadas."""
+        return list(self._keys)
+    
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    
+    async def start(self) -> None:
+        """Empieza a escuchar conexiones y a despachar lotes."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._dispatcher = asyncio.create_task(self._dispatch_batches())
+        
+        if self.unix_socket:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, sock=self._bind_unix_socket(), limit=MAX_REQUEST_BYTES
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port, limit=MAX_REQUEST_BYTES
+            )
+            # Con port=0 el sistema elige el puerto
+            self.port = self._server.sockets[0].getsockname()[1]
+    
+    def _bind_unix_socket(self) -> socket.socket:
+        """
+        Crea el socket Unix con permisos 0600.
+        
+        La umask se restringe antes de bind(): el archivo nace ya privado,
+        sin el intervalo que deja un chmod() posterior.
+        """
+        if os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177)
+        try:
+            sock.bind(self.unix_socket)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(previous_umask)
+        return sock
+    
+    async def serve_forever(self) -> None:
+        """Atiende peticiones hasta que se cancele la tarea."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+    
+    async def close(self) -> None:
+        """Deja de aceptar conexiones y detiene el pool de hilos."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        self._executor.shutdown(wait=True)
+    
+    def start_background(self) -> "SigningDaemon":
+        """
+        Arranca el demonio en un hilo propio (para tests y benchmarks).
+        
+        Returns:
+            El propio demonio, ya escuchando
+        """
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+        
+        self._thread = threading.Thread(target=run, name="firma-demonio", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+    
+    def stop_background(self) -> None:
+        """Detiene un demonio arrancado con start_background()."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas del demonio.
+        
+        Returns:
+            Diccionario con peticiones, errores, lotes y tamaño medio de lote
+        """
+        return {
+            "peticiones": self._requests,
+            "errores": self._errors,
+            "lotes": self._batches,
+            "tamano_medio_lote": (self._batched_requests / self._batches
+                                  if self._batches else 0.0),
+            "en_cola": self._queue.qsize() if self._queue is not None else 0,
+            "hilos": self.max_workers,
+            "claves": len(self._keys),
+            "activo_segundos": time.time() - self._started_at
+        }
+    
+    # ------------------------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------------------------
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Lee peticiones de una conexión y responde a cada una al terminar."""
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    self._write(writer, {"ok": False, "error": "Petición demasiado grande"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+    
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        """Procesa una petición y escribe su respuesta."""
+        self._requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise DaemonRequestError("La petición debe ser un objeto JSON")
+            request_id = request.get("id")
+            self._check_token(request)
+            result = await self._execute(request)
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            self._errors += 1
+            response = {"id": request_id, "ok": False, "error": str(e)}
+        
+        self._write(writer, response)
+        await writer.drain()
+    
+    def _check_token(self, request: Dict) -> None:
+        """Comprueba el token de la petición (en tiempo constante)."""
+        if self._token is None:
+            return
+        token = request.get("token")
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode("utf-8"),
+                                                                  self._token):
+            raise DaemonRequestError("Token de acceso ausente o incorrecto")
+    
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, response: Dict) -> None:
+        """Escribe una respuesta como una línea JSON."""
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+    
+    async def _execute(self, request: Dict) -> Any:
+        """Ejecuta una petición: las de firma y verificación pasan por los lotes."""
+        op = request.get("op")
+        if op in BATCHED_OPERATIONS:
+            future = asyncio.get_running_loop().create_future()
+            try:
+                self._queue.put_nowait((request, future))
+            except asyncio.QueueFull:
+                raise DaemonBusyError(f"Demonio ocupado: {self.max_queue} peticiones en "
+                                      f"cola, reintentar más tarde")
+            return await future
+        if op == "ping":
+            return {"pong": True}
+        if op == "keys":
+            return {name: scheme_for_key(key).name for name, (key, _, _) in self._keys.items()}
+        if op == "stats":
+            return self.stats()
+        if op == "metrics":
+            return REGISTRY.snapshot()
+        raise DaemonRequestError(f"Operación desconocida: {op}")
+    
+    # ------------------------------------------------------------------
+    # Lotes
+    # ------------------------------------------------------------------
+    
+    async def _dispatch_batches(self) -> None:
+        """Forma lotes con las peticiones en cola y los envía al pool de hilos."""
+        loop = asyncio.get_running_loop()
+        # Un lote por hilo: mientras todos están ocupados, la cola crece
+        free_workers = asyncio.Semaphore(self.max_workers)
+        
+        while True:
+            await free_workers.acquire()
+            batch = [await self._queue.get()]
+            if self.batch_window > 0 and self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            # Las peticiones canceladas (cliente desconectado) no se procesan
+            batch = [(request, future) for request, future in batch if not future.done()]
+            if not batch:
+                free_workers.release()
+                continue
+            
+            self._batches += 1
+            self._batched_requests += len(batch)
+            
+            requests = [request for request, _ in batch]
+            futures = [future for _, future in batch]
+            done = loop.run_in_executor(self._executor, self._process_batch, requests)
+            done.add_done_callback(
+                lambda f, futures=futures: self._complete_batch(f, futures, free_workers)
+            )
+    
+    @staticmethod
+    def _complete_batch(done: asyncio.Future, futures: List[asyncio.Future],
+                        free_workers: asyncio.Semaphore) -> None:
+        """Entrega los resultados de un lote a las peticiones que esperan."""
+        free_workers.release()
+        if done.cancelled():
+            results = [asyncio.CancelledError()] * len(futures)
+        elif done.exception() is not None:
+            results = [done.exception()] * len(futures)
+        else:
+            results = done.result()
+        
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def _process_batch(self, requests: List[Dict]) -> List[Any]:
+        """Procesa un lote en un hilo del pool; los errores se devuelven por petición."""
+        results = []
+        for request in requests:
+            try:
+                if request["op"] == "sign":
+                    results.append(self._sign(request))
+                else:
+                    results.append(self._verify(request))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    # ------------------------------------------------------------------
+    # Operaciones
+    # ------------------------------------------------------------------
+    
+    def _sign(self, request: Dict) -> Dict:
+        """Firma el documento de una petición con una clave cargada."""
+        private_key, signer, fingerprint = self._get_key(request)
+        digest = request.get("digest", DEFAULT_DIGEST)
+        format_version = request.get("format_version", CURRENT_FORMAT_VERSION)
+        if format_version not in SUPPORTED_FORMAT_VERSIONS:
+            raise DaemonRequestError(f"Versión de formato de firma no soportada: {format_version}")
+        
+        get_digest(digest)
+        if "data" in request:
+            document_hash, _ = hash_stream([self._inline_data(request)], digest)
+        elif "path" in request:
+            document_hash = hash_file(self._allowed_path(request["path"]), digest)
+        else:
+            raise DaemonRequestError("La petición necesita 'data' (base64) o 'path'")
+        
+        # Con certificado, el firmante es siempre el del certificado de la clave
+        signer_info = request.get("signer_info")
+        if signer_info is not None:
+            if signer is not None:
+                raise DaemonRequestError("La clave tiene certificado: el firmante no se "
+                                         "puede indicar en la petición")
+            if not isinstance(signer_info, dict):
+                raise DaemonRequestError("El campo 'signer_info' debe ser un objeto")
+            signer = signer_info
+        
+        document_name = request.get("document_name") or request.get("path") or "documento"
+        return create_signature(document_name, document_hash, private_key, signer,
+                                format_version, digest, fingerprint)
+    
+    def _verify(self, request: Dict) -> Dict:
+        """Verifica la firma de una petición con la clave pública de una clave cargada."""
+        signature_data = request.get("signature")
+        if not isinstance(signature_data, dict):
+            raise DaemonRequestError("Falta el campo 'signature' con los datos de la firma")
+        public_key = self._get_public_key(request)
+        
+        if "data" in request:
+            # Documento en línea: primero la firma (barato), luego el hash
+            is_valid, message = self.verifier.verify_stream(
+                [self._inline_data(request)], signature_data, public_key
+            )
+        elif "path" in request:
+            mode = request.get("mode", "signature_first")
+            if mode not in VERIFICATION_MODES:
+                raise DaemonRequestError(f"Modo de verificación desconocido: {mode}")
+            is_valid, message = self.verifier.verify_signature(
+                self._allowed_path(request["path"]), signature_data, public_key, mode
+            )
+        else:
+            raise DaemonRequestError("La petición necesita 'data' (base64) o 'path'")
+        return {"valida": is_valid, "mensaje": message}
+    
+    def _get_key(self, request: Dict) -> Tuple[PrivateKey, Optional[Dict[str, str]], str]:
+        """Devuelve la clave pedida (o la única cargada si no se indica)."""
+        name = request.get("key")
+        if name is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        try:
+            return self._keys[name]
+        except KeyError:
+            raise DaemonRequestError(f"Clave no cargada en el demonio: {name}")
+    
+    def _get_public_key(self, request: Dict) -> Optional[PublicKey]:
+        """
+        Clave pública de la petición: en PEM ("public_key"), la de una clave
+        cargada o None para que el verificador la busque en su TrustStore.
+        """
+        if "public_key" in request:
+            return serialization.load_pem_public_key(request["public_key"].encode("ascii"))
+        if "key" not in request and self.verifier.trust_store is not None:
+            return None
+        private_key, _, _ = self._get_key(request)
+        return private_key.public_key()
+    
+    @staticmethod
+    def _inline_data(request: Dict) -> bytes:
+        """Contenido del documento enviado en la petición."""
+        return base64.b64decode(request["data"], validate=True)
+    
+    def _allowed_path(self, path: str) -> str:
+        """
+        Ruta real de un documento pedido por ruta.
+        
+        Raises:
+            DaemonRequestError: Si las rutas están desactivadas o el archivo
+                                (resueltos los enlaces) queda fuera de allowed_root
+        """
+        if self.allowed_root is None:
+            raise DaemonRequestError("Las peticiones por ruta están desactivadas "
+                                     "(arrancar el demonio con --allow-path)")
+        if not isinstance(path, str):
+            raise DaemonRequestError("El campo 'path' debe ser una ruta")
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([real_path, self.allowed_root]) != self.allowed_root:
+            raise DaemonRequestError(f"Ruta fuera del directorio permitido: {path}")
+        return real_path
+
+
+def _load_named_key(keys_directory: str, name: str, password: Optional[str]
+                    ) -> Tuple[PrivateKey, Optional[x509.Certificate]]:
+    """Carga <nombre>_private.pem (y <nombre>_cert.pem si existe), pidiendo la contraseña una vez."""
+    with open(os.path.join(keys_directory, f"{name}_private.pem"), "rb") as f:
+        pem = f.read()
+    try:
+        private_key = serialization.load_pem_private_key(
+            pem, password=password.encode() if password else None
+        )
+    except TypeError:
+        # Clave cifrada y sin contraseña: pedirla ahora, una sola vez
+        password = getpass.getpass(f"Contraseña de la clave '{name}': ")
+        private_key = serialization.load_pem_private_key(pem, password=password.encode())
+    
+    certificate = None
+    cert_path = os.path.join(keys_directory, f"{name}_cert.pem")
+    if os.path.exists(cert_path):
+        with open(cert_path, "rb") as f:
+            certificate = x509.load_pem_x509_certificate(f.read())
+    return private_key, certificate
+
+
+def _write_private_file(path: str, content: str) -> None:
+    """Escribe un archivo legible solo por su propietario (permisos 0600)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos del demonio de firma."""
+    parser = argparse.ArgumentParser(description="Demonio local de firma digital")
+    parser.add_argument("--key", action="append", required=True, dest="keys",
+                        help="Nombre de una clave de --keys-dir (<nombre>_private.pem); repetible")
+    parser.add_argument("--keys-dir", default="keys", help="Directorio de claves")
+    parser.add_argument("--trust-store", action="append", default=[],
+                        help="Archivo o directorio de certificados/claves públicas de "
+                             "confianza para verify sin clave; repetible")
+    parser.add_argument("--unix-socket",
+                        help="Ruta del socket Unix (por defecto, " + default_socket_path() + ")")
+    parser.add_argument("--port", type=int,
+                        help="Escuchar en 127.0.0.1:PUERTO en lugar del socket Unix "
+                             "(las peticiones deben llevar el token)")
+    parser.add_argument("--token-file",
+                        help="Con --port y sin " + TOKEN_ENVIRONMENT_VARIABLE + ": archivo "
+                             "(permisos 0600) donde se escribe el token generado; por "
+                             "defecto <keys-dir>/daemon.token")
+    parser.add_argument("--allow-path",
+                        help="Directorio cuyos documentos se pueden firmar/verificar por "
+                             "ruta (por defecto, solo documentos en línea)")
+    parser.add_argument("--workers", type=int, help="Hilos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--max-batch", type=int, default=64, help="Peticiones máximas por lote")
+    parser.add_argument("--batch-window", type=float, default=0.0,
+                        help="Segundos de espera para completar un lote")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Peticiones en espera como máximo; con la cola llena se "
+                             "responde 'Demonio ocupado'")
+    parser.add_argument("--metrics-file",
+                        help="Archivo donde escribir periódicamente las métricas de tiempo "
+                             "(.json o formato de Prometheus, p. ej. para node_exporter)")
+    parser.add_argument("--metrics-interval", type=float, default=15.0,
+                        help="Segundos entre escrituras de --metrics-file")
+    
+    args = parser.parse_args(argv)
+    if args.port is not None and args.unix_socket:
+        parser.error("--port y --unix-socket son incompatibles")
+    
+    token = os.environ.get(TOKEN_ENVIRONMENT_VARIABLE)
+    if args.port is not None and not token:
+        token = secrets.token_urlsafe(32)
+        token_file = args.token_file or os.path.join(args.keys_dir, "daemon.token")
+        _write_private_file(token_file, token + "\n")
+        print(f"✓ Token de acceso guardado en: {token_file}")
+    
+    verifier = None
+    if args.trust_store:
+        trust_store = TrustStore.from_directory(*args.trust_store)
+        verifier = SignatureVerifier(trust_store=trust_store)
+        print(f"✓ Almacén de confianza: {len(trust_store)} claves")
+    
+    daemon = SigningDaemon(port=args.port, unix_socket=args.unix_socket,
+                           max_workers=args.workers, max_batch=args.max_batch,
+                           batch_window=args.batch_window, verifier=verifier,
+                           token=token, allowed_root=args.allow_path,
+                           max_queue=args.max_queue)
+    # La contraseña se lee del entorno o se pide al arrancar, nunca por petición
+    password = os.environ.get("FIRMA_KEY_PASSWORD")
+    for name in args.keys:
+        try:
+            private_key, certificate = _load_named_key(args.keys_dir, name, password)
+        except (OSError, ValueError) as e:
+            print(f"✗ No se pudo cargar la clave '{name}': {e}")
+            return 1
+        daemon.add_key(name, private_key, certificate)
+        print(f"✓ Clave '{name}' cargada ({scheme_for_key(private_key).label})")
+    
+    async def export_metrics():
+        while True:
+            await asyncio.sleep(args.metrics_interval)
+            REGISTRY.write(args.metrics_file)
+    
+    async def run():
+        await daemon.start()
+        if args.metrics_file:
+            asyncio.get_running_loop().create_task(export_metrics())
+        where = daemon.unix_socket or f"{daemon.host}:{daemon.port}"
+        print(f"✓ Demonio de firma escuchando en {where} ({daemon.max_workers} hilos)")
+        await daemon.serve_forever()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n✓ Demonio detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Módulo de Almacén de Confianza
+==============================
+
+Almacén local de certificados y claves públicas de confianza, indexado
+en memoria por:
+
+- Huella de la clave: SHA-256 de la clave pública en DER
+  (SubjectPublicKeyInfo). Las firmas nuevas la guardan en el campo
+  "key_fingerprint", de modo que el verificador encuentra la clave del
+  firmante con una búsqueda en un diccionario
+- Número de serie del certificado ("certificado_serie" del firmante),
+  para las firmas anteriores a la huella
+
+Con un almacén, verificar un lote de firmas de distintos firmantes ya no
+necesita indicar (ni cargar desde disco) la clave de cada documento: las
+claves se cargan una vez al crear el almacén.
+
+Ejemplo:
+    store = TrustStore.from_directory("keys")
+    verifier = SignatureVerifier(trust_store=store)
+    verifier.verify_many([("contrato.pdf", "contrato_signature.json")])
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set, Tuple, Union
+from signature_schemes import PrivateKey, PublicKey
+
+if TYPE_CHECKING:
+    from cryptography import x509
+
+# Archivos que se cargan de un directorio (las claves privadas se ignoran)
+TRUST_STORE_EXTENSIONS = (".pem", ".crt", ".cer", ".der")
+
+# Huellas ya calculadas, por identidad del objeto clave. Las claves de
+# cryptography no admiten referencias débiles: cada entrada guarda la
+# clave (así su id() no se reutiliza mientras esté en la caché) y la caché
+# se limita a las últimas claves usadas
+_FINGERPRINT_CACHE_SIZE = 64
+_fingerprint_cache: "OrderedDict[int, Tuple[object, str]]" = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+
+def key_fingerprint(key: Union[PrivateKey, PublicKey]) -> str:
+    """
+    Huella SHA-256 (hexadecimal) de una clave pública.
+    
+    Args:
+        key: Clave pública, o clave privada (se usa su clave pública)
+    
+    Returns:
+        Hash hexadecimal de la clave pública en DER (SubjectPublicKeyInfo)
+    
+    Note:
+        La huella de un mismo objeto clave se calcula una sola vez (p. ej.
+        al firmar muchos documentos con la misma clave privada).
+    """
+    with _fingerprint_lock:
+        entry = _fingerprint_cache.get(id(key))
+        if entry is not None and entry[0] is key:
+            _fingerprint_cache.move_to_end(id(key))
+            return entry[1]
+    
+    from cryptography.hazmat.primitives import serialization
+    public_key = key.public_key() if hasattr(key, "private_bytes") else key
+    der = public_key.public_bytes(serialization.Encoding.DER,
+                                  serialization.PublicFormat.SubjectPublicKeyInfo)
+    fingerprint = hashlib.sha256(der).hexdigest()
+    
+    with _fingerprint_lock:
+        _fingerprint_cache[id(key)] = (key, fingerprint)
+        _fingerprint_cache.move_to_end(id(key))
+        while len(_fingerprint_cache) > _FINGERPRINT_CACHE_SIZE:
+            _fingerprint_cache.popitem(last=False)
+    return fingerprint
+
+
+class TrustedKey:
+    """Clave pública de confianza y, si se conoce, su certificado."""
+    
+    __slots__ = ("fingerprint", "public_key", "certificate", "source")
+    
+    def __init__(self, fingerprint: str, public_key: PublicKey,
+                 certificate: Optional["x509.Certificate"] = None,
+                 source: Optional[str] = None):
+        self.fingerprint = fingerprint
+        self.public_key = public_key
+        self.certificate = certificate
+        self.source = source
+
+
+class TrustStore:
+    """
+    Índice en memoria de claves públicas de confianza por huella y por serie.
+    """
+    
+    def __init__(self, certificates: Iterable["x509.Certificate"] = (),
+                 public_keys: Iterable[PublicKey] = ()):
+        """
+        Inicializa el almacén.
+        
+        Args:
+            certificates: Certificados de confianza
+            public_keys: Claves públicas de confianza sin certificado
+        """
+        self._by_fingerprint: Dict[str, TrustedKey] = {}
+        self._by_serial: Dict[int, Set[str]] = {}
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        
+        for certificate in certificates:
+            self.add_certificate(certificate)
+        for public_key in public_keys:
+            self.add_public_key(public_key)
+    
+    @classmethod
+    def from_directory(cls, *paths: str) -> "TrustStore":
+        """Crea un almacén con los certificados y claves públicas de archivos o directorios."""
+        store = cls()
+        for path in paths:
+            store.add_path(path)
+        return store
+    
+    # ------------------------------------------------------------------
+    # Altas
+    # ------------------------------------------------------------------
+    
+    def add_certificate(self, certificate: "x509.Certificate",
+                        source: Optional[str] = None) -> TrustedKey:
+        """
+        Añade un certificado de confianza (y su clave pública).
+        
+        Si la clave ya estaba en el almacén sin certificado, se le asocia este.
+        """
+        entry = self.add_public_key(certificate.public_key(), source)
+        with self._lock:
+            if entry.certificate is None:
+                entry.certificate = certificate
+            self._by_serial.setdefault(certificate.serial_number, set()).add(entry.fingerprint)
+        return entry
+    
+    def add_public_key(self, public_key: PublicKey,
+                       source: Optional[str] = None) -> TrustedKey:
+        """Añade una clave pública de confianza (sin duplicar las ya conocidas)."""
+        fingerprint = key_fingerprint(public_key)
+        with self._lock:
+            entry = self._by_fingerprint.get(fingerprint)
+            if entry is None:
+                entry = TrustedKey(fingerprint, public_key, source=source)
+                self._by_fingerprint[fingerprint] = entry
+            return entry
+    
+    def add_path(self, path: str) -> int:
+        """
+        Carga los certificados y claves públicas de un archivo o directorio.
+        
+        Los archivos ya cargados que no han cambiado (mtime/tamaño) se
+        omiten, por lo que llamar de nuevo solo lee los nuevos. Las claves
+        privadas y los archivos ilegibles se ignoran (ver stats()["errores"]).
+        
+        Args:
+            path: Archivo PEM/DER o directorio (p. ej. el de KeyManager)
+        
+        Returns:
+            Número de archivos leídos
+        """
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                          if name.lower().endswith(TRUST_STORE_EXTENSIONS)]
+        else:
+            candidates = [path]
+        
+        loaded = 0
+        for candidate in candidates:
+            try:
+                st = os.stat(candidate)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._files.get(candidate) == stamp:
+                continue
+            try:
+                self._load_file(candidate)
+                self._errors.pop(candidate, None)
+            except (OSError, ValueError) as e:
+                self._errors[candidate] = str(e)
+            self._files[candidate] = stamp
+            loaded += 1
+        return loaded
+    
+    def _load_file(self, path: str) -> None:
+        """Añade el contenido de un archivo PEM (uno o varios objetos) o DER."""
+        from cryptography import x509
+        from cryptography.hazmat.primitives import serialization
+        with open(path, "rb") as f:
+            data = f.read()
+        
+        if b"PRIVATE KEY-----" in data:
+            return
+        if b"-----BEGIN CERTIFICATE-----" in data:
+            for certificate in x509.load_pem_x509_certificates(data):
+                self.add_certificate(certificate, path)
+        elif b"-----BEGIN PUBLIC KEY-----" in data:
+            self.add_public_key(serialization.load_pem_public_key(data), path)
+        else:
+            try:
+                self.add_certificate(x509.load_der_x509_certificate(data), path)
+            except ValueError:
+                self.add_public_key(serialization.load_der_public_key(data), path)
+    
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    
+    def get(self, fingerprint: str) -> Optional[TrustedKey]:
+        """Devuelve la clave con esa huella, o None (también si no es un texto)."""
+        if not isinstance(fingerprint, str):
+            return None
+        return self._by_fingerprint.get(fingerprint.lower())
+    
+    def find_by_serial(self, serial: Union[int, str]) -> Optional[TrustedKey]:
+        """
+        Devuelve la clave del certificado con ese número de serie.
+        
+        Returns:
+            La clave, o None si no se conoce o si varias claves comparten
+            el número de serie (certificados de distintos emisores)
+        """
+        try:
+            fingerprints = self._by_serial.get(int(serial))
+        except (TypeError, ValueError):
+            return None
+        if not fingerprints or len(fingerprints) != 1:
+            return None
+        return self._by_fingerprint.get(next(iter(fingerprints)))
+    
+    def resolve(self, signature_data: Dict) -> Optional[TrustedKey]:
+        """
+        Busca la clave del firmante de una firma.
+        
+        Se usa el campo "key_fingerprint" y, si la firma no lo tiene, el
+        "certificado_serie" del firmante.
+        
+        Args:
+            signature_data: Datos de la firma
+        
+        Returns:
+            La clave de confianza del firmante, o None si no está en el almacén
+        """
+        fingerprint = signature_data.get("key_fingerprint")
+        if fingerprint:
+            return self.get(fingerprint)
+        signer = signature_data.get("signer")
+        serial = signer.get("certificado_serie") if isinstance(signer, dict) else None
+        return self.find_by_serial(serial) if serial else None
+    
+    def __len__(self) -> int:
+        return len(self._by_fingerprint)
+    
+    def __contains__(self, fingerprint: object) -> bool:
+        return isinstance(fingerprint, str) and fingerprint.lower() in self._by_fingerprint
+    
+    def stats(self) -> Dict[str, object]:
+        """Devuelve claves, certificados, archivos leídos y errores de carga."""
+        entries = list(self._by_fingerprint.values())
+        return {
+            "claves": len(entries),
+            "certificados": sum(1 for entry in entries if entry.certificate is not None),
+            "archivos": len(self._files),
+            "errores": dict(self._errors)
+        }
@@ -100,14 +100,23 @@ def print_table(headers: List[str], rows: List[List[str]]) -> None:
         print(" | ".join(str(cell).ljust(w) for cell, w in zip(row, col_widths)))
 
 
-def export_signature_summary(signature_files: List[str], output_file: str) -> None:
+def export_signature_summary(signature_files: List[str], output_file: str,
+                             catalog=None) -> None:
     """
     Exporta un resumen de múltiples firmas a un archivo JSON.
     
     Args:
         signature_files: Lista de rutas de archivos de firma
         output_file: Archivo de salida
+        catalog: SignatureCatalog opcional; las firmas indexadas en él
+                 se resumen sin abrir su archivo
     """
+    from signature_container import read_signature_file
+    
+    indexed = {}
+    if catalog is not None:
+        indexed = {row["path"]: row for row in catalog.find_by_paths(signature_files)}
+    
     summary = {
         "fecha_generacion": datetime.now().isoformat(),
         "total_firmas": len(signature_files),
@@ -115,10 +124,19 @@ def export_signature_summary(signature_files: List[str], output_file: str) -> No
     }
     
     for sig_file in signature_files:
+        row = indexed.get(os.path.abspath(sig_file))
+        if row is not None:
+            summary["firmas"].append({
+                "archivo": os.path.basename(sig_file),
+                "documento": row["document_name"],
+                "timestamp": row["timestamp"],
+                "firmante": row["signer_name"] or "Desconocido"
+            })
+            continue
+        
         try:
-            with open(sig_file, 'r', encoding='utf-8') as f:
-                sig_data = json.load(f)
-                
+            sig_data = read_signature_file(sig_file)
+            
             summary["firmas"].append({
                 "archivo": os.path.basename(sig_file),
                 "documento": sig_data.get("document_name"),
@@ -5,22 +5,47 @@ Módulo de Verificación de Firmas Digitales
 Este módulo proporciona funcionalidades para:
 - Verificar la autenticidad de firmas digitales
 - Validar la integridad de documentos firmados
-- Comprobar certificados digitales
+- Comprobar certificados digitales y su cadena hasta raíces locales
+- Rechazar firmas de certificados revocados (CRL locales, ver revocation)
+- Encontrar la clave del firmante en un almacén de confianza (ver trust_store)
+- Verificar lotes de documentos de forma concurrente
 
 Proceso de Verificación:
 ------------------------
 1. Recalcular el hash del documento original
 2. "Descifrar" la firma con la clave pública
 3. Comparar ambos valores: si coinciden, la firma es válida
+
+Se aceptan las firmas de formato v1 (hash hexadecimal) y v2 (digest
+binario con la versión y el algoritmo); la versión se detecta automáticamente.
+El algoritmo de resumen (SHA-256, SHA-512 o BLAKE2b) se toma del campo
+"hash_algorithm" de la firma. Las firmas por bloques (árbol de Merkle) se verifican en paralelo e
+indican qué rangos de bytes fueron modificados.
 """
 
 import os
-import hashlib
-from typing import Dict, Tuple
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from cryptography import x509
-from datetime import datetime
+import time
+from typing import TYPE_CHECKING, AsyncIterable, Dict, Iterable, Optional, Tuple, Union
+from datetime import datetime, timezone
+from hash_cache import HashCache
+from signature_container import read_signature_file
+from hashing import hash_async_stream, hash_file, hash_stream
+from merkle import chunk_hashes, is_merkle_signature, merkle_root, tampered_ranges
+from digest_registry import DEFAULT_DIGEST
+from signature_format import decode_signature, get_format_version, get_hash_algorithm
+from signature_schemes import PublicKey, get_signature_scheme
+from events import emit
+from metrics import verify_failures, verify_seconds
+
+# Solo para anotaciones: x509 y los validadores se cargan cuando se usan
+if TYPE_CHECKING:
+    from cryptography import x509
+    from certificate_chain import CertificateChainValidator
+    from revocation import RevocationIndex
+    from trust_store import TrustStore
+
+# Modos de verificación soportados por verify_signature()
+VERIFICATION_MODES = ("signature_first", "document_first", "metadata_only")
 
 
 class SignatureVerifier:
@@ -33,45 +58,76 @@ class SignatureVerifier:
     - El certificado es válido (si aplica)
     """
     
-    def __init__(self):
-        """Inicializa el verificador de firmas."""
-        pass
+    def __init__(self, hash_cache: Optional[HashCache] = None,
+                 chain_validator: Optional["CertificateChainValidator"] = None,
+                 revocation_index: Optional["RevocationIndex"] = None,
+                 trust_store: Optional["TrustStore"] = None):
+        """
+        Inicializa el verificador de firmas.
+        
+        Args:
+            hash_cache: Caché opcional de hashes compartida con DigitalSignature
+            chain_validator: Validador opcional de cadenas hasta raíces locales;
+                             sin él, los certificados solo se comprueban por fechas
+            revocation_index: Índice opcional de series revocadas; se rechazan las
+                              firmas cuya clave corresponde a un certificado
+                              revocado (el indicado al verificar o el del
+                              trust_store). La serie guardada en la firma no
+                              está firmada y no se usa
+            trust_store: Almacén opcional de claves de confianza; con él, la
+                         clave pública se puede omitir en las verificaciones y
+                         se busca por la huella guardada en la firma
+        """
+        self.hash_cache = hash_cache
+        self.chain_validator = chain_validator
+        self.revocation_index = revocation_index
+        self.trust_store = trust_store
     
-    def calculate_hash(self, file_path: str) -> str:
+    def calculate_hash(self, file_path: str, algorithm: str = DEFAULT_DIGEST) -> str:
         """
-        Calcula el hash SHA-256 de un archivo.
+        Calcula el hash SHA-256 (u otro algoritmo registrado) de un archivo.
         
         Este método debe producir el MISMO hash que se usó al firmar
         si el archivo no ha sido modificado.
         
         Args:
             file_path: Ruta del archivo
+            algorithm: Algoritmo de hash (el registrado en la firma)
         
         Returns:
             Hash hexadecimal del archivo
         """
-        sha256_hash = hashlib.sha256()
-        
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(65536), b""):
-                sha256_hash.update(byte_block)
-        
-        return sha256_hash.hexdigest()
+        if self.hash_cache is not None:
+            return self.hash_cache.get_or_compute(
+                file_path, lambda path: hash_file(path, algorithm), algorithm
+            )
+        return hash_file(file_path, algorithm)
     
     def verify_signature(self, document_path: str, signature_data: Dict,
-                        public_key: rsa.RSAPublicKey) -> Tuple[bool, str]:
+                        public_key: Optional[PublicKey] = None,
+                        mode: str = "signature_first",
+                        certificate: Optional["x509.Certificate"] = None) -> Tuple[bool, str]:
         """
         Verifica si una firma digital es válida para un documento.
         
-        Proceso:
-        1. Recalcula el hash del documento actual
-        2. Compara con el hash almacenado en la firma
-        3. Verifica criptográficamente la firma con la clave pública
+        Proceso (modo "signature_first", por defecto):
+        1. Verifica criptográficamente la firma sobre el hash almacenado
+           (microsegundos: rechaza firmas falsas SIN leer el documento)
+        2. Recalcula el hash del documento actual
+        3. Compara con el hash almacenado en la firma
+        
+        Otros modos:
+        - "document_first": orden original (primero el hash del documento)
+        - "metadata_only": solo el paso 1, sin leer el documento. Útil para
+          clasificar lotes grandes; NO garantiza la integridad del documento
         
         Args:
             document_path: Ruta del documento a verificar
             signature_data: Datos de la firma (diccionario)
-            public_key: Clave pública del firmante
+            public_key: Clave pública del firmante (None: se busca en el trust_store)
+            mode: Modo de verificación
+            certificate: Certificado de public_key, para comprobar su revocación
+                         (None: se usa el del trust_store, si lo hay)
         
         Returns:
             Tupla (es_válida: bool, mensaje: str)
@@ -81,93 +137,413 @@ class SignatureVerifier:
             - Si la firma fue alterada o es falsa, la verificación criptográfica fallará
             - Solo la clave pública correspondiente a la privada que firmó puede verificar
         """
-        print(f"\n🔍 Verificando firma del documento: {os.path.basename(document_path)}")
+        emit("verify.started", document=os.path.basename(document_path))
+        
+        is_valid, message, current_hash = self.verify_document(
+            document_path, signature_data, public_key, mode, certificate
+        )
+        
+        if current_hash is not None:
+            emit("verify.hashes", original=signature_data.get('document_hash', ''),
+                 current=current_hash)
+        
+        if is_valid:
+            if current_hash is not None:
+                emit("verify.integrity_ok")
+            emit("verify.signature_ok")
+        return is_valid, message
+    
+    def verify_document(self, document_path: str, signature_data: Dict,
+                        public_key: Optional[PublicKey] = None,
+                        mode: str = "signature_first",
+                        certificate: Optional["x509.Certificate"] = None
+                        ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Verifica una firma como verify_signature(), sin emitir eventos.
+        
+        Además del resultado devuelve el hash actual del documento, para
+        quien guarda qué se leyó (p. ej. incremental_verification).
+        
+        Args:
+            document_path: Ruta del documento a verificar
+            signature_data: Datos de la firma (diccionario)
+            public_key: Clave pública del firmante (None: se busca en el trust_store)
+            mode: "signature_first", "document_first" o "metadata_only"
+            certificate: Certificado de public_key (ver verify_signature)
         
-        # 1. Verificar que el archivo existe
+        Returns:
+            Tupla (es_válida, mensaje, hash actual o None si no se leyó el documento)
+        """
+        if mode not in VERIFICATION_MODES:
+            raise ValueError(f"Modo de verificación desconocido: {mode}")
+        
+        original_hash = signature_data.get('document_hash', '')
+        
+        if mode != "document_first":
+            # Paso barato primero: una firma falsa se rechaza sin leer el documento
+            is_valid, message = self._check_signature(original_hash, signature_data, public_key,
+                                                      certificate)
+            if not is_valid:
+                return False, message, None
+            
+            if mode == "metadata_only":
+                return True, ("ÉXITO (solo metadatos): La firma es válida para el hash "
+                              "registrado. El documento no fue leído."), None
+        
+        # Verificar que el archivo existe
         if not os.path.exists(document_path):
-            return False, "ERROR: El archivo no existe"
+            return False, "ERROR: El archivo no existe", None
+        
+        # Calcular el hash actual y compararlo (verificación de integridad)
+        if is_merkle_signature(signature_data):
+            current_hash, message = self._compare_chunks(document_path, signature_data)
+            if message is not None:
+                return False, message, current_hash
+        else:
+            try:
+                algorithm = get_hash_algorithm(signature_data)
+            except ValueError as e:
+                return False, f"ERROR: {str(e)}", None
+            current_hash = self.calculate_hash(document_path, algorithm)
+        if current_hash != original_hash:
+            return False, "FALLO: El documento ha sido modificado. Los hashes no coinciden.", current_hash
+        
+        if mode == "document_first":
+            is_valid, message = self._check_signature(current_hash, signature_data, public_key,
+                                                      certificate)
+            return is_valid, message, current_hash
+        
+        return True, "ÉXITO: La firma es válida y el documento es auténtico", current_hash
+    
+    def _compare_chunks(self, document_path: str,
+                        signature_data: Dict) -> Tuple[str, Optional[str]]:
+        """
+        Recalcula en paralelo los bloques de una firma por bloques.
+        
+        Args:
+            document_path: Ruta del documento
+            signature_data: Datos de una firma en modo por bloques
+        
+        Returns:
+            Tupla (raíz de Merkle actual, mensaje de fallo o None si no hay
+            cambios). Si el tamaño de bloque de la firma no es válido, la
+            raíz es None y no se lee el documento
+        """
+        stored_leaves = signature_data.get("chunk_hashes") or []
+        chunk_size = signature_data.get("chunk_size")
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size <= 0:
+            return None, (f"FALLO: Tamaño de bloque no válido en la firma por bloques: "
+                          f"{chunk_size!r}")
+        current_leaves, current_size = chunk_hashes(document_path, chunk_size)
+        current_root = merkle_root(current_leaves)
+        
+        if current_root == signature_data.get("document_hash"):
+            return current_root, None
+        
+        # Los hashes de bloque solo sirven para localizar cambios si son los firmados
+        if not stored_leaves or merkle_root(stored_leaves) != signature_data.get("document_hash"):
+            return current_root, ("FALLO: El documento ha sido modificado y los hashes de "
+                                  "bloque de la firma no corresponden a la raíz firmada.")
+        
+        ranges = tampered_ranges(stored_leaves, current_leaves, chunk_size,
+                                 signature_data.get("document_size", 0), current_size)
+        described = ", ".join(f"{start}-{end}" for start, end in ranges)
+        return current_root, (f"FALLO: El documento ha sido modificado. "
+                              f"Rangos de bytes alterados: {described}")
+    
+    def verify_stream(self, stream, signature_data: Dict,
+                      public_key: Optional[PublicKey] = None) -> Tuple[bool, str]:
+        """
+        Verifica una firma sobre datos que llegan por un flujo.
+        
+        Primero se verifica la firma sobre el hash almacenado: si es falsa,
+        el flujo ni siquiera se lee. Después se calcula el hash del flujo a
+        medida que llegan los datos, sin guardarlos en disco.
+        
+        Args:
+            stream: Objeto binario tipo archivo o iterable de bloques de bytes
+            signature_data: Datos de la firma (diccionario)
+            public_key: Clave pública del firmante
+        
+        Returns:
+            Tupla (es_válida: bool, mensaje: str)
+        """
+        emit("verify.stream_started", document=signature_data.get('document_name', ''))
+        
+        is_valid, message = self._check_signature(
+            signature_data.get('document_hash', ''), signature_data, public_key
+        )
+        if not is_valid:
+            return False, message
+        
+        current_hash, _ = hash_stream(stream, get_hash_algorithm(signature_data))
+        return self._compare_stream_hash(current_hash, signature_data)
+    
+    async def verify_async_stream(self, stream: AsyncIterable[bytes], signature_data: Dict,
+                                  public_key: Optional[PublicKey] = None) -> Tuple[bool, str]:
+        """
+        Versión asíncrona de verify_stream() para iteradores asíncronos de bytes.
+        
+        Args:
+            stream: Iterador asíncrono de bloques de bytes
+            signature_data: Datos de la firma (diccionario)
+            public_key: Clave pública del firmante
+        
+        Returns:
+            Tupla (es_válida: bool, mensaje: str)
+        """
+        emit("verify.stream_started", document=signature_data.get('document_name', ''))
+        
+        is_valid, message = self._check_signature(
+            signature_data.get('document_hash', ''), signature_data, public_key
+        )
+        if not is_valid:
+            return False, message
+        
+        current_hash, _ = await hash_async_stream(stream, get_hash_algorithm(signature_data))
+        return self._compare_stream_hash(current_hash, signature_data)
+    
+    def _compare_stream_hash(self, current_hash: str, signature_data: Dict) -> Tuple[bool, str]:
+        """Compara el hash de un flujo con el almacenado en una firma ya verificada."""
+        if is_merkle_signature(signature_data):
+            return False, "ERROR: Las firmas por bloques solo se verifican sobre archivos"
         
-        # 2. Calcular el hash actual del documento
-        current_hash = self.calculate_hash(document_path)
         original_hash = signature_data.get('document_hash', '')
         
-        print(f"Hash original: {original_hash[:32]}...")
-        print(f"Hash actual:   {current_hash[:32]}...")
+        emit("verify.hashes", original=original_hash, current=current_hash)
         
-        # 3. Comparar hashes (verificación de integridad)
         if current_hash != original_hash:
             return False, "FALLO: El documento ha sido modificado. Los hashes no coinciden."
         
-        print("✓ Integridad verificada: los hashes coinciden")
+        emit("verify.integrity_ok")
+        emit("verify.signature_ok")
+        return True, "ÉXITO: La firma es válida y el documento es auténtico"
+    
+    def _check_signature(self, document_hash: str, signature_data: Dict,
+                         public_key: Optional[PublicKey],
+                         certificate: Optional["x509.Certificate"] = None) -> Tuple[bool, str]:
+        """
+        Verifica criptográficamente la firma sobre un hash ya calculado.
         
-        # 4. Verificar la firma criptográficamente
+        La versión del formato (v1 o v2), el algoritmo de hash y el esquema de
+        firma (RSA-PSS, Ed25519 o ECDSA P-256) se detectan en los datos de la firma.
+        
+        Args:
+            document_hash: Hash hexadecimal del documento
+            signature_data: Datos de la firma (diccionario)
+            public_key: Clave pública del firmante (None: se busca en el trust_store)
+            certificate: Certificado de public_key (None: el del trust_store)
+        
+        Returns:
+            Tupla (es_válida: bool, mensaje: str)
+        """
         try:
-            signature_bytes = bytes.fromhex(signature_data['signature'])
+            if public_key is None:
+                public_key = self.resolve_public_key(signature_data)
+                if public_key is None:
+                    return False, ("FALLO: La clave del firmante no está en el almacén de "
+                                   "confianza")
+            
+            version = get_format_version(signature_data)
+            signature_bytes = decode_signature(signature_data)
+            scheme = get_signature_scheme(signature_data)
             
             # Intentar verificar la firma con la clave pública
             # Si falla, lanzará una excepción InvalidSignature
-            public_key.verify(
-                signature_bytes,
-                current_hash.encode(),
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            algorithm = get_hash_algorithm(signature_data)
+            with verify_seconds.time():
+                scheme.verify(public_key, signature_bytes, document_hash, version, algorithm)
+            
+            # Búsqueda binaria en el índice de revocación (sin releer la CRL),
+            # con el certificado de la clave que verificó la firma
+            if self.revocation_index is not None:
+                certificate = self._signer_certificate(public_key, certificate)
+                if certificate is not None and self.revocation_index.is_revoked(certificate):
+                    return False, (f"FALLO: El certificado del firmante (serie "
+                                   f"{certificate.serial_number}) está revocado")
             
-            print("✓ Firma criptográfica verificada")
             return True, "ÉXITO: La firma es válida y el documento es auténtico"
             
         except Exception as e:
+            verify_failures.inc()
             return False, f"FALLO: Firma inválida. Error: {str(e)}"
     
-    def verify_certificate(self, certificate: x509.Certificate) -> Tuple[bool, str]:
+    def _signer_certificate(self, public_key: PublicKey,
+                            certificate: Optional["x509.Certificate"]
+                            ) -> Optional["x509.Certificate"]:
+        """
+        Certificado ligado a la clave con la que se verificó una firma.
+        
+        Returns:
+            El certificado indicado o, si no hay, el que el trust_store asocia
+            a la clave; None si no se conoce ninguno
+        """
+        if certificate is not None or self.trust_store is None:
+            return certificate
+        from trust_store import key_fingerprint
+        entry = self.trust_store.get(key_fingerprint(public_key))
+        return entry.certificate if entry is not None else None
+    
+    def resolve_public_key(self, signature_data: Dict) -> Optional[PublicKey]:
+        """
+        Busca la clave pública del firmante en el trust_store.
+        
+        Args:
+            signature_data: Datos de la firma (con "key_fingerprint" o el
+                            "certificado_serie" del firmante)
+        
+        Returns:
+            La clave pública, o None si no hay almacén o no contiene la clave
+        """
+        if self.trust_store is None:
+            return None
+        entry = self.trust_store.resolve(signature_data)
+        return entry.public_key if entry is not None else None
+    
+    def _verify_one(self, document_path: str, signature: Union[str, Dict],
+                    public_key: Optional[PublicKey] = None,
+                    mode: str = "signature_first") -> Dict:
+        """
+        Verifica un documento sin imprimir en consola (usado por verify_many).
+        
+        Args:
+            document_path: Ruta del documento
+            signature: Datos de la firma o ruta de su archivo (JSON o binario)
+            public_key: Clave pública del firmante (None: se busca en el trust_store)
+            mode: Modo de verificación (ver verify_signature)
+        
+        Returns:
+            Diccionario con el resultado de la verificación del documento
+        """
+        start = time.perf_counter()
+        result = {"documento": document_path, "valida": False, "mensaje": "",
+                  "bytes": 0, "tiempo": 0.0}
+        
+        try:
+            if isinstance(signature, dict):
+                signature_data = signature
+            else:
+                signature_data = read_signature_file(signature)
+            
+            result["valida"], result["mensaje"], current_hash = self.verify_document(
+                document_path, signature_data, public_key, mode
+            )
+            if current_hash is not None:
+                result["bytes"] = os.path.getsize(document_path)
+        except Exception as e:
+            result["mensaje"] = f"ERROR: {str(e)}"
+        
+        result["tiempo"] = time.perf_counter() - start
+        return result
+    
+    def verify_many(self, items: Iterable[Tuple],
+                    max_workers: int = None,
+                    mode: str = "signature_first") -> Dict[str, any]:
         """
-        Verifica la validez temporal de un certificado.
+        Verifica un lote de documentos de forma concurrente.
+        
+        El hash de cada documento se calcula en un pool de hilos: hashlib
+        libera el GIL al procesar bloques grandes, por lo que la lectura y
+        el hash de varios archivos avanzan en paralelo.
+        
+        Args:
+            items: Tripletas (ruta_documento, firma, clave_pública). La firma
+                   puede ser el diccionario de datos o la ruta de su archivo.
+                   Con un trust_store basta con pares (ruta_documento, firma):
+                   la clave de cada firmante se busca en memoria.
+            max_workers: Número de hilos (por defecto, el de ThreadPoolExecutor)
+            mode: Modo de verificación (ver verify_signature). Con
+                  "metadata_only" no se lee ningún documento.
+        
+        Returns:
+            Diccionario con los resultados individuales (en el orden de
+            entrada) y estadísticas agregadas del lote
+        """
+        items = list(items)
+        emit("verify.batch_started", count=len(items))
+        
+        from concurrent.futures import ThreadPoolExecutor
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda item: self._verify_one(*item, mode=mode), items))
+        elapsed = time.perf_counter() - start
+        
+        valid = sum(1 for r in results if r["valida"])
+        total_bytes = sum(r["bytes"] for r in results)
+        
+        summary = {
+            "resultados": results,
+            "total": len(results),
+            "validas": valid,
+            "invalidas": len(results) - valid,
+            "bytes_procesados": total_bytes,
+            "tiempo_total": elapsed,
+            "documentos_por_segundo": len(results) / elapsed if elapsed > 0 else 0.0,
+            "bytes_por_segundo": total_bytes / elapsed if elapsed > 0 else 0.0
+        }
+        
+        emit("verify.batch_completed", valid=valid, total=len(results), elapsed=elapsed)
+        return summary
+    
+    def verify_certificate(self, certificate: "x509.Certificate",
+                           intermediates: Iterable["x509.Certificate"] = ()) -> Tuple[bool, str]:
+        """
+        Verifica la validez de un certificado.
+        
+        Con un chain_validator configurado se valida la cadena completa hasta
+        una raíz local (firmas, restricciones de CA y vigencia de cada eslabón);
+        si no, solo la validez temporal del certificado.
         
         Args:
             certificate: Certificado X.509 a verificar
+            intermediates: Certificados intermedios que acompañan al certificado
         
         Returns:
             Tupla (es_válido: bool, mensaje: str)
         
         Note:
-            En un sistema real, también se verificaría:
-            - La cadena de confianza (CA)
-            - El estado de revocación (CRL/OCSP)
-            - Las extensiones del certificado
+            Con un revocation_index configurado también se comprueba que el
+            certificado no esté revocado.
         """
-        print("\n🔐 Verificando certificado digital...")
+        emit("verify.certificate_started")
         
-        now = datetime.utcnow()
-        not_before = certificate.not_valid_before
-        not_after = certificate.not_valid_after
+        if self.revocation_index is not None and self.revocation_index.is_revoked(certificate):
+            return False, f"FALLO: El certificado (serie {certificate.serial_number}) está revocado"
         
-        print(f"Válido desde: {not_before}")
-        print(f"Válido hasta: {not_after}")
-        print(f"Fecha actual: {now}")
+        if self.chain_validator is not None:
+            is_valid, message = self.chain_validator.validate(certificate, intermediates)
+            if is_valid:
+                emit("verify.chain_ok")
+            return is_valid, message
         
-        if now < not_before:
-            return False, "FALLO: El certificado aún no es válido"
+        # Misma comprobación (fechas UTC con zona) que la de cada eslabón de una cadena
+        from certificate_chain import ChainValidationError, check_validity
+        now = datetime.now(timezone.utc)
+        emit("verify.certificate_dates", not_before=certificate.not_valid_before_utc,
+             not_after=certificate.not_valid_after_utc, now=now)
         
-        if now > not_after:
-            return False, "FALLO: El certificado ha expirado"
+        try:
+            check_validity(certificate, now)
+        except ChainValidationError as e:
+            return False, f"FALLO: {e}"
         
-        print("✓ Certificado válido temporalmente")
+        emit("verify.certificate_ok")
         return True, "ÉXITO: El certificado es válido"
     
     def full_verification(self, document_path: str, signature_data: Dict,
-                         public_key: rsa.RSAPublicKey,
-                         certificate: x509.Certificate = None) -> Dict[str, any]:
+                         public_key: Optional[PublicKey] = None,
+                         certificate: "x509.Certificate" = None,
+                         mode: str = "signature_first") -> Dict[str, any]:
         """
         Realiza una verificación completa de firma y certificado.
         
         Args:
             document_path: Ruta del documento
             signature_data: Datos de la firma
-            public_key: Clave pública
-            certificate: Certificado opcional
+            public_key: Clave pública (None: se busca en el trust_store)
+            certificate: Certificado opcional (sin él, se usa el del trust_store
+                         si la clave se resolvió allí y tiene certificado)
+            mode: Modo de verificación de la firma (ver verify_signature)
         
         Returns:
             Diccionario con resultados detallados de la verificación
@@ -178,8 +554,14 @@ class SignatureVerifier:
             "valida": False
         }
         
+        if public_key is None and certificate is None and self.trust_store is not None:
+            entry = self.trust_store.resolve(signature_data)
+            if entry is not None:
+                certificate = entry.certificate
+        
         # Verificar la firma
-        sig_valid, sig_msg = self.verify_signature(document_path, signature_data, public_key)
+        sig_valid, sig_msg = self.verify_signature(document_path, signature_data,
+                                                  public_key, mode, certificate)
         results["verificaciones"]["firma"] = {
             "valida": sig_valid,
             "mensaje": sig_msg
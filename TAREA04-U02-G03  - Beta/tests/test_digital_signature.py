@@ -11,17 +11,45 @@ Ejecutar tests:
 
 import os
 import sys
+import json
+import base64
+import asyncio
+import hashlib
+import threading
+import time
 import pytest
 import tempfile
 import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Añadir src al path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
 from key_manager import KeyManager
 from digital_signature import DigitalSignature
 from verification import SignatureVerifier
+from hash_cache import HashCache
+from key_pool import KeyPool
+from signature_catalog import SignatureCatalog
+from signature_container import (convert_directory, decode_signature_record,
+                                 encode_signature_record)
+from signature_log import SignatureLog
+from incremental_verification import IncrementalVerifier
+from async_service import AsyncSignatureService, ServiceOverloadedError
+from signing_daemon import SigningDaemon
+from signing_client import DaemonError, SigningClient
+import cli
+from certificate_chain import CertificateChainValidator
+from revocation import RevocationIndex, SortedSerials
+from trust_store import TrustStore, key_fingerprint
+from hashing import hash_file, choose_chunk_size
+from digest_registry import available_digests, fastest_digest
+from events import console_listener, listening
+from metrics import REGISTRY, MetricsRegistry
 
 
 class TestKeyManager:
@@ -69,6 +97,74 @@ class TestKeyManager:
         loaded_key = self.key_manager.load_public_key(filepath)
         assert loaded_key is not None
     
+    def test_key_cache(self):
+        """Test: Las claves cargadas se reutilizan desde la caché."""
+        private_key, _ = self.key_manager.generate_key_pair()
+        filepath = self.key_manager.save_private_key(private_key, "cache", "secreto")
+        
+        first = self.key_manager.load_private_key(filepath, "secreto")
+        second = KeyManager(keys_directory=self.temp_dir).load_private_key(filepath, "secreto")
+        assert first is second
+        
+        # Una contraseña incorrecta no debe obtener la clave de la caché
+        with pytest.raises(ValueError):
+            self.key_manager.load_private_key(filepath, "incorrecta")
+        
+        # La clave de caché no contiene un hash sin secreto de la contraseña
+        unsalted = hashlib.sha256(b"secreto").hexdigest()
+        assert not any(unsalted in key or hashlib.sha256(b"secreto").digest() in key
+                       for key in KeyManager.object_cache._entries)
+    
+    def test_key_cache_invalidated_on_change(self):
+        """Test: Un archivo sobrescrito se vuelve a cargar."""
+        _, public_key = self.key_manager.generate_key_pair()
+        filepath = self.key_manager.save_public_key(public_key, "cache")
+        first = self.key_manager.load_public_key(filepath)
+        
+        _, other_public = self.key_manager.generate_key_pair()
+        self.key_manager.save_public_key(other_public, "cache")
+        second = self.key_manager.load_public_key(filepath)
+        
+        assert first is not second
+        assert second.public_numbers() == other_public.public_numbers()
+    
+    def test_key_pool(self):
+        """Test: El pool entrega claves pregeneradas y registra métricas."""
+        with KeyPool(key_sizes=(1024,), target=2, low_watermark=1, max_workers=1) as pool:
+            assert pool.wait_until_ready(1024, count=1, timeout=30)
+            
+            key_manager = KeyManager(keys_directory=self.temp_dir, key_pool=pool)
+            private_key, public_key = key_manager.generate_key_pair(key_size=1024)
+            
+            assert private_key.key_size == 1024
+            assert public_key.public_numbers() == private_key.public_key().public_numbers()
+            
+            metrics = pool.metrics()
+            assert metrics["servidas_desde_pool"] == 1
+            assert metrics["generadas"][1024] >= 1
+            
+            # Un tamaño que el pool no mantiene se genera en el momento
+            private_key, _ = pool.get(1536)
+            assert private_key.key_size == 1536
+            assert pool.metrics()["generadas_en_linea"] == 1
+        
+        # Tras shutdown(), get() sigue funcionando sin encargar recargas
+        private_key, _ = pool.get(1024)
+        assert private_key.key_size == 1024
+    
+    def test_key_pool_retries_failed_generations(self):
+        """Test: Las generaciones fallidas se reponen hasta un límite de fallos seguidos."""
+        from key_pool import MAX_CONSECUTIVE_ERRORS
+        # cryptography no genera claves RSA de 512 bits
+        with KeyPool(key_sizes=(512,), target=1, low_watermark=1, max_workers=1) as pool:
+            deadline = time.monotonic() + 30
+            while pool.metrics()["errores"] < MAX_CONSECUTIVE_ERRORS and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.2)
+            metrics = pool.metrics()
+            assert metrics["errores"] == MAX_CONSECUTIVE_ERRORS
+            assert metrics["pendientes"][512] == 0
+    
     def test_create_certificate(self):
         """Test: Crear certificado digital."""
         private_key, _ = self.key_manager.generate_key_pair()
@@ -146,6 +242,308 @@ class TestDigitalSignature:
         # Cargar
         loaded_sig = self.signature_manager.load_signature(filepath)
         assert loaded_sig["document_hash"] == signature_data["document_hash"]
+    
+    def test_events_silent_by_default(self, capsys):
+        """Test: Sin oyentes no se imprime nada; con oyente se reciben los eventos."""
+        signature_data = self.signature_manager.sign_document(self.test_doc, self.private_key)
+        self.signature_manager.save_signature(signature_data, "silenciosa")
+        assert capsys.readouterr().out == ""
+        
+        received = []
+        with listening(lambda event, fields: received.append((event, fields))):
+            signature_data = self.signature_manager.sign_document(self.test_doc, self.private_key)
+            filepath = self.signature_manager.save_signature(signature_data, "con_eventos")
+        assert [event for event, _ in received] == [
+            "sign.started", "hash.calculated", "sign.completed", "signature.saved"
+        ]
+        assert received[1][1]["hash"] == signature_data["document_hash"]
+        assert received[3][1]["path"] == filepath
+        
+        # La consola de main.py/demo.py conserva los mensajes de siempre
+        with listening(console_listener):
+            self.signature_manager.load_signature(filepath)
+        assert capsys.readouterr().out == f"✓ Firma cargada desde: {filepath}\n"
+        
+        # Fuera del with el oyente ya no está registrado
+        self.signature_manager.load_signature(filepath)
+        assert capsys.readouterr().out == ""
+    
+    def test_sign_many(self):
+        """Test: Firmar un lote en paralelo conservando el orden."""
+        paths = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"lote_{i}.txt")
+            with open(path, 'w') as f:
+                f.write(f"Documento del lote número {i}")
+            paths.append(path)
+        paths.insert(2, os.path.join(self.temp_dir, "no_existe.txt"))
+        
+        results = self.signature_manager.sign_many(paths, self.private_key, max_workers=2)
+        
+        assert [r["documento"] for r in results] == paths
+        assert results[2]["exito"] == False
+        assert results[2]["error"]
+        
+        verifier = SignatureVerifier()
+        for result in results[:2] + results[3:]:
+            assert result["exito"] == True
+            assert os.path.exists(result["archivo_firma"])
+            is_valid, _ = verifier.verify_signature(
+                result["documento"], result["firma"], self.public_key
+            )
+            assert is_valid == True
+        
+        # Mismo nombre en dos directorios: ninguno de los dos pisa la firma del otro
+        duplicate = os.path.join(self.temp_dir, "otro", "lote_0.txt")
+        os.makedirs(os.path.dirname(duplicate))
+        with open(duplicate, 'w') as f:
+            f.write("Otro documento con el mismo nombre")
+        results = self.signature_manager.sign_many([paths[0], paths[1], duplicate],
+                                                   self.private_key, max_workers=2)
+        assert [r["exito"] for r in results] == [False, True, False]
+        assert "lote_0_signature" in results[2]["error"]
+        
+        # Sin pool, la clave no se queda en el módulo tras el lote
+        import digital_signature
+        results = self.signature_manager.sign_many(paths[:2], self.private_key, max_workers=1)
+        assert all(r["exito"] for r in results)
+        assert digital_signature._worker_private_key is None
+
+
+class TestMetrics:
+    """Tests para las métricas de tiempo."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.signature_manager = DigitalSignature(signatures_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.documents = []
+        for i in range(3):
+            path = os.path.join(self.temp_dir, f"doc_{i}.txt")
+            with open(path, 'w') as f:
+                f.write("x" * (1000 * (i + 1)))
+            self.documents.append(path)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_operations_are_measured(self):
+        """Test: Hash, firma, escritura, verificación y carga de claves quedan medidos."""
+        before = REGISTRY.snapshot()["metricas"]
+        
+        signature_data = self.signature_manager.sign_document(self.documents[0], self.private_key)
+        self.signature_manager.save_signature(signature_data, "doc_0")
+        # Hash alterado: la firma falla sin leer el documento
+        signature_data["document_hash"] = "00" * 32
+        SignatureVerifier().verify_signature(self.documents[0], signature_data, self.public_key)
+        path = self.key_manager.save_public_key(self.public_key, "metricas")
+        self.key_manager.load_public_key(path)
+        # Lote en procesos: las métricas de los trabajadores se suman aquí
+        self.signature_manager.sign_many(self.documents, self.private_key, max_workers=2)
+        
+        after = REGISTRY.snapshot()["metricas"]
+        def delta(name, field="cuenta"):
+            return after[name][field] - before[name][field]
+        
+        assert delta("firma_hash_bytes_total", "valor") == 1000 + 6000
+        assert delta("firma_hash_seconds") == 4
+        assert delta("firma_sign_seconds") == 4
+        assert delta("firma_signature_write_seconds") == 4
+        assert delta("firma_verify_seconds") == 1
+        assert delta("firma_verify_failures_total", "valor") == 1
+        assert delta("firma_key_load_seconds") == 1
+    
+    def test_export(self):
+        """Test: Exportación en formato de Prometheus y JSON."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("prueba_seconds", "Latencia", buckets=(0.01, 0.1))
+        counter = registry.counter("prueba_total", "Operaciones")
+        for value in (0.005, 0.05, 0.05, 3.0):
+            histogram.observe(value)
+        counter.inc(4)
+        
+        text = registry.to_prometheus()
+        assert "# TYPE prueba_seconds histogram" in text
+        assert 'prueba_seconds_bucket{le="0.01"} 1' in text
+        assert 'prueba_seconds_bucket{le="0.1"} 3' in text
+        assert 'prueba_seconds_bucket{le="+Inf"} 4' in text
+        assert "prueba_seconds_count 4" in text
+        assert "prueba_total 4" in text
+        
+        path = registry.write(os.path.join(self.temp_dir, "metricas.json"))
+        with open(path) as f:
+            snapshot = json.load(f)["metricas"]
+        assert snapshot["prueba_seconds"]["p50"] == 0.1
+        assert snapshot["prueba_seconds"]["suma"] == pytest.approx(3.105)
+        
+        # Un trabajador devuelve su estado y el proceso principal lo suma
+        other = MetricsRegistry()
+        other.histogram("prueba_seconds", "Latencia", buckets=(0.01, 0.1))
+        other.merge(registry.drain())
+        assert other.get("prueba_seconds").count == 4
+        assert histogram.count == 0
+
+
+class TestSignatureContainer:
+    """Tests para el contenedor binario de firmas."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair()
+        self.certificate = self.key_manager.create_certificate(
+            self.private_key, {"name": "Alice", "organization": "ESPOL"}
+        )
+        
+        self.test_doc = os.path.join(self.temp_dir, "test.txt")
+        with open(self.test_doc, 'w') as f:
+            f.write("Documento guardado en formato binario.")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_round_trip(self):
+        """Test: JSON → binario → JSON no pierde información (v1 y v2)."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        for version in (1, 2):
+            signature_data = manager.sign_document(
+                self.test_doc, self.private_key, self.certificate, format_version=version
+            )
+            signature_data["campo_extra"] = [1, "dos"]
+            
+            encoded = encode_signature_record(signature_data)
+            assert decode_signature_record(encoded) == signature_data
+            assert len(encoded) < len(json.dumps(signature_data, indent=4))
+    
+    def test_binary_storage_and_autodetect(self):
+        """Test: Guardar en binario y cargar detectando el formato."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir, storage_format="binary")
+        path = manager.sign_and_save(self.test_doc, self.private_key, self.certificate)
+        
+        assert path.endswith(".sig")
+        loaded = manager.load_signature(path)
+        is_valid, _ = SignatureVerifier().verify_signature(self.test_doc, loaded, self.public_key)
+        assert is_valid == True
+    
+    def test_convert_directory(self):
+        """Test: Convertir un directorio de firmas JSON a binario."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        json_path = manager.sign_and_save(self.test_doc, self.private_key, output_name="firma")
+        
+        result = convert_directory(self.temp_dir, "binary", remove_original=True)
+        
+        assert result["convertidas"] == 1
+        assert not os.path.exists(json_path)
+        loaded = manager.load_signature(os.path.join(self.temp_dir, "firma.sig"))
+        assert "document_hash" in loaded
+    
+    def test_corrupted_container(self):
+        """Test: Un contenedor truncado produce un error claro."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        encoded = encode_signature_record(manager.sign_document(self.test_doc, self.private_key))
+        
+        with pytest.raises(ValueError):
+            decode_signature_record(encoded[:40])
+
+
+class TestSignatureLog:
+    """Tests para el registro de firmas de solo anexado."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair()
+        
+        self.test_doc = os.path.join(self.temp_dir, "test.txt")
+        with open(self.test_doc, 'w') as f:
+            f.write("Documento firmado en el registro.")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_save_and_load_by_id(self):
+        """Test: save_signature anexa al registro y load_signature lee por id."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir, storage_format="log")
+        record_id = manager.sign_and_save(self.test_doc, self.private_key)
+        
+        loaded = manager.load_signature(record_id)
+        is_valid, _ = SignatureVerifier().verify_signature(self.test_doc, loaded, self.public_key)
+        assert is_valid
+        assert not any(name.endswith(".json") for name in os.listdir(self.temp_dir))
+        
+        results = manager.sign_many([self.test_doc], self.private_key, max_workers=1)
+        assert results[0]["archivo_firma"] == "test_signature"
+        assert manager.load_signature("test_signature")["document_hash"] == loaded["document_hash"]
+    
+    def test_reopen_rotation_and_compaction(self):
+        """Test: El índice sobrevive a reabrir el registro y la compactación descarta obsoletos."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        signature_data = manager.sign_document(self.test_doc, self.private_key)
+        log_dir = os.path.join(self.temp_dir, "log")
+        
+        with SignatureLog(log_dir, segment_max_bytes=2048, compaction_threshold=1.0) as log:
+            for i in range(20):
+                log.append(f"firma_{i % 5}", dict(signature_data, n=i))
+            log.delete("firma_4")
+            assert log.stats()["segmentos"] > 1
+        
+        with SignatureLog(log_dir) as log:
+            assert sorted(log.ids()) == [f"firma_{i}" for i in range(4)]
+            assert log.get("firma_3")["n"] == 18
+            
+            result = log.compact()
+            assert result["registros_descartados"] > 0
+            assert log.stats()["segmentos"] == 1
+            assert log.get("firma_0")["n"] == 15
+            with pytest.raises(KeyError):
+                log.get("firma_4")
+    
+    def test_get_during_compaction(self):
+        """Test: get() relee el registro si compact() lo mueve mientras se lee."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        signature_data = manager.sign_document(self.test_doc, self.private_key)
+        log_dir = os.path.join(self.temp_dir, "log")
+        
+        with SignatureLog(log_dir, segment_max_bytes=2048, compaction_threshold=1.0) as log:
+            for i in range(20):
+                log.append(f"firma_{i % 5}", dict(signature_data, n=i))
+            read_at = log._read_at
+            
+            def compact_then_read(segment, offset):
+                # compact() se ejecuta entre la consulta del índice y la lectura
+                log._read_at = read_at
+                log.compact()
+                return read_at(segment, offset)
+            
+            log._read_at = compact_then_read
+            assert log.get("firma_0")["n"] == 15
+            assert [record["n"] for _, record in sorted(log.items())] == [15, 16, 17, 18, 19]
+    
+    def test_torn_write_is_ignored(self):
+        """Test: Un registro incompleto al final del segmento se ignora al reabrir."""
+        manager = DigitalSignature(signatures_directory=self.temp_dir)
+        signature_data = manager.sign_document(self.test_doc, self.private_key)
+        log_dir = os.path.join(self.temp_dir, "log")
+        
+        with SignatureLog(log_dir) as log:
+            log.append_many([("a", signature_data), ("b", signature_data)])
+        segment = os.path.join(log_dir, "segment_000001.log")
+        with open(segment, "r+b") as f:
+            f.truncate(os.path.getsize(segment) - 10)
+        
+        with SignatureLog(log_dir) as log:
+            assert log.ids() == ["a"]
+            log.append("c", signature_data)
+        
+        with SignatureLog(log_dir) as log:
+            assert sorted(log.ids()) == ["a", "c"]
 
 
 class TestSignatureVerifier:
@@ -200,6 +598,239 @@ class TestSignatureVerifier:
         assert is_valid == False
         assert "modificado" in message.lower()
     
+    def test_verify_v1_signature(self):
+        """Test: Las firmas en formato v1 (hexadecimal) siguen siendo válidas."""
+        v1_data = self.signature_manager.sign_document(
+            self.test_doc,
+            self.private_key,
+            format_version=1
+        )
+        
+        assert "format_version" not in v1_data
+        assert len(v1_data["signature"]) == 2 * 256  # Hexadecimal de 2048 bits
+        
+        is_valid, _ = self.verifier.verify_signature(self.test_doc, v1_data, self.public_key)
+        assert is_valid == True
+    
+    def test_v2_signature_binds_version_and_algorithm(self):
+        """Test: La firma v2 es RSA-PSS del digest precedido de la versión y el algoritmo."""
+        import base64
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        
+        assert self.signature_data["format_version"] == 2
+        digest = bytes.fromhex(self.signature_data["document_hash"])
+        
+        # No lanza excepción si la firma es válida
+        self.public_key.verify(
+            base64.b64decode(self.signature_data["signature"]),
+            b"firma-digital:v2:sha256-256:" + digest,
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
+                        salt_length=padding.PSS.MAX_LENGTH),
+            hashes.SHA256()
+        )
+    
+    def test_v1_signature_cannot_be_relabelled_as_v2(self):
+        """Test: Una firma v1 no sirve como firma v2 de un documento con el hash en texto."""
+        import base64
+        v1_data = self.signature_manager.sign_document(self.test_doc, self.private_key,
+                                                       format_version=1)
+        # Documento falso cuyo contenido es el hash hexadecimal firmado en v1
+        forged_doc = os.path.join(self.temp_dir, "falso.txt")
+        with open(forged_doc, 'w') as f:
+            f.write(v1_data["document_hash"])
+        forged = dict(v1_data, format_version=2,
+                      document_hash=hash_file(forged_doc, "sha256"),
+                      signature=base64.b64encode(bytes.fromhex(v1_data["signature"])).decode())
+        
+        is_valid, _ = self.verifier.verify_signature(forged_doc, forged, self.public_key)
+        assert is_valid == False
+    
+    def test_verify_tampered_v2_signature(self):
+        """Test: Una firma v2 alterada es rechazada."""
+        forged = dict(self.signature_data)
+        forged["format_version"] = 1
+        
+        is_valid, message = self.verifier.verify_signature(self.test_doc, forged, self.public_key)
+        assert is_valid == False
+        assert "FALLO" in message
+    
+    def test_forged_signature_rejected_before_reading_document(self):
+        """Test: Una firma falsa se rechaza sin calcular el hash del documento."""
+        forged = dict(self.signature_data)
+        forged["document_hash"] = "0" * 64
+        
+        def fail_if_called(path):
+            raise AssertionError("No se debería leer el documento")
+        self.verifier.calculate_hash = fail_if_called
+        
+        is_valid, message = self.verifier.verify_signature(self.test_doc, forged, self.public_key)
+        assert is_valid == False
+        assert "Firma inválida" in message
+    
+    def test_metadata_only_mode(self):
+        """Test: El modo solo metadatos no lee el documento."""
+        os.remove(self.test_doc)
+        
+        is_valid, message = self.verifier.verify_signature(
+            self.test_doc, self.signature_data, self.public_key, mode="metadata_only"
+        )
+        assert is_valid == True
+        assert "solo metadatos" in message
+    
+    def test_pluggable_digests(self):
+        """Test: Cada algoritmo de hash registrado firma y verifica, y se registra en la firma."""
+        for digest in ("sha256", "sha512", "blake2b"):
+            signature_data = self.signature_manager.sign_document(
+                self.test_doc, self.private_key, digest=digest
+            )
+            assert signature_data.get("hash_algorithm", "sha256") == digest
+            assert signature_data["document_hash"] == hash_file(self.test_doc, digest)
+            is_valid, _ = self.verifier.verify_signature(self.test_doc, signature_data, self.public_key)
+            assert is_valid == True
+        
+        # Cambiar el algoritmo registrado invalida la firma
+        signature_data["hash_algorithm"] = "sha512"
+        is_valid, _ = self.verifier.verify_signature(self.test_doc, signature_data, self.public_key)
+        assert is_valid == False
+    
+    def test_blake2b_signature_cannot_be_relabelled(self):
+        """Test: Una firma BLAKE2b no sirve como firma SHA-256 del digest BLAKE2b."""
+        signature_data = self.signature_manager.sign_document(
+            self.test_doc, self.private_key, digest="blake2b"
+        )
+        # Documento falso cuyo contenido son los bytes del digest BLAKE2b
+        forged_doc = os.path.join(self.temp_dir, "falso.bin")
+        with open(forged_doc, 'wb') as f:
+            f.write(bytes.fromhex(signature_data["document_hash"]))
+        forged = dict(signature_data, document_hash=hash_file(forged_doc, "sha256"))
+        del forged["hash_algorithm"]
+        
+        is_valid, _ = self.verifier.verify_signature(forged_doc, forged, self.public_key)
+        assert is_valid == False
+        
+        results = self.signature_manager.sign_many([self.test_doc], self.private_key,
+                                                   save=False, max_workers=1, digest="sha512")
+        assert results[0]["firma"]["algorithm"] == "RSA-PSS with SHA-512"
+        
+        with pytest.raises(ValueError):
+            self.signature_manager.sign_document(self.test_doc, self.private_key, digest="md5")
+        assert fastest_digest(sample_size=1024 * 1024, repeat=1) in available_digests()
+    
+    def test_signature_schemes(self):
+        """Test: Ed25519 y ECDSA P-256 cubren claves, certificados, firma y verificación."""
+        for scheme in ("ed25519", "ecdsa-p256"):
+            private_key, public_key = self.key_manager.generate_key_pair(scheme=scheme)
+            private_path = self.key_manager.save_private_key(private_key, scheme, password="clave")
+            public_path = self.key_manager.save_public_key(public_key, scheme)
+            private_key = self.key_manager.load_private_key(private_path, password="clave")
+            public_key = self.key_manager.load_public_key(public_path)
+            certificate = self.key_manager.create_certificate(private_key, {"name": "Alice"})
+            
+            signature_data = self.signature_manager.sign_document(
+                self.test_doc, private_key, certificate
+            )
+            assert signature_data["signature_scheme"] == scheme
+            assert decode_signature_record(encode_signature_record(signature_data)) == signature_data
+            results = self.verifier.full_verification(
+                self.test_doc, signature_data, public_key, certificate
+            )
+            assert results["valida"] == True
+            
+            results = self.signature_manager.sign_many([self.test_doc], private_key,
+                                                       save=False, max_workers=1)
+            is_valid, _ = self.verifier.verify_signature(self.test_doc, results[0]["firma"],
+                                                         public_key)
+            assert is_valid == True
+            
+            # Una clave de otro esquema no verifica la firma
+            is_valid, _ = self.verifier.verify_signature(self.test_doc, signature_data,
+                                                         self.public_key)
+            assert is_valid == False
+    
+    def test_chunked_signature_localizes_tampering(self):
+        """Test: La firma por bloques se verifica e indica los rangos modificados."""
+        large_doc = os.path.join(self.temp_dir, "large.bin")
+        with open(large_doc, 'wb') as f:
+            f.write(os.urandom(10 * 1024))
+        
+        signature_data = self.signature_manager.sign_document(
+            large_doc, self.private_key, chunked=True, chunk_size=1024
+        )
+        assert len(signature_data["chunk_hashes"]) == 10
+        is_valid, _ = self.verifier.verify_signature(large_doc, signature_data, self.public_key)
+        assert is_valid == True
+        
+        with open(large_doc, 'r+b') as f:
+            f.seek(3000)
+            f.write(b"X")
+            f.seek(0, os.SEEK_END)
+            f.write(b"cola")
+        
+        is_valid, message = self.verifier.verify_signature(large_doc, signature_data, self.public_key)
+        assert is_valid == False
+        assert "2048-3072" in message
+        assert "10240-10244" in message
+        
+        # Un tamaño de bloque ausente o no válido es un FALLO, no una excepción
+        for chunk_size in (None, 0, -1024, "1024", 1.5):
+            forged = dict(signature_data, chunk_size=chunk_size)
+            is_valid, message = self.verifier.verify_signature(large_doc, forged, self.public_key)
+            assert not is_valid and "Tamaño de bloque" in message
+    
+    def test_sign_and_verify_stream(self):
+        """Test: Firmar y verificar datos desde flujos sin archivo temporal."""
+        import io
+        import asyncio
+        content = b"Datos recibidos por un flujo " * 1000
+        
+        signature_data = self.signature_manager.sign_stream(
+            io.BytesIO(content), self.private_key, "subida.bin"
+        )
+        assert signature_data["document_name"] == "subida.bin"
+        
+        # Iterable de bloques
+        chunks = [content[i:i + 4096] for i in range(0, len(content), 4096)]
+        is_valid, _ = self.verifier.verify_stream(iter(chunks), signature_data, self.public_key)
+        assert is_valid == True
+        
+        # Iterador asíncrono
+        async def async_chunks():
+            for chunk in chunks:
+                yield chunk
+        
+        is_valid, _ = asyncio.run(self.verifier.verify_async_stream(
+            async_chunks(), signature_data, self.public_key
+        ))
+        assert is_valid == True
+        
+        is_valid, message = self.verifier.verify_stream(
+            io.BytesIO(content + b"!"), signature_data, self.public_key
+        )
+        assert is_valid == False
+        assert "modificado" in message.lower()
+        
+        async_data = asyncio.run(self.signature_manager.sign_async_stream(
+            async_chunks(), self.private_key, "subida.bin"
+        ))
+        assert async_data["document_hash"] == signature_data["document_hash"]
+    
+    def test_verify_many(self):
+        """Test: Verificar un lote de forma concurrente."""
+        sig_path = self.signature_manager.save_signature(self.signature_data, "lote")
+        missing_doc = os.path.join(self.temp_dir, "no_existe.txt")
+        
+        summary = self.verifier.verify_many([
+            (self.test_doc, self.signature_data, self.public_key),
+            (self.test_doc, sig_path, self.public_key),
+            (missing_doc, self.signature_data, self.public_key),
+        ], max_workers=2)
+        
+        assert summary["total"] == 3
+        assert summary["validas"] == 2
+        assert [r["valida"] for r in summary["resultados"]] == [True, True, False]
+        assert summary["tiempo_total"] >= 0
+    
     def test_compare_identical_files(self):
         """Test: Comparar archivos idénticos."""
         # Crear copia idéntica
@@ -220,6 +851,916 @@ class TestSignatureVerifier:
         assert are_equal == False
 
 
+class TestIncrementalVerifier:
+    """Tests para la verificación incremental de directorios."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair()
+        self.signature_manager = DigitalSignature(signatures_directory=self.temp_dir)
+        self.snapshot = os.path.join(self.temp_dir, "snapshot.json")
+        
+        self.docs = []
+        for i in range(3):
+            path = os.path.join(self.temp_dir, f"doc{i}.txt")
+            with open(path, 'w') as f:
+                f.write(f"Documento {i}")
+            # Fecha de modificación antigua: fuera de la ventana de carrera
+            os.utime(path, (time.time() - 60, time.time() - 60))
+            self.signature_manager.sign_and_save(path, self.private_key)
+            self.docs.append(path)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_second_run_skips_unchanged(self):
+        """Test: Solo se releen los documentos nuevos o modificados."""
+        report = IncrementalVerifier(self.snapshot).verify_directory(self.temp_dir, self.public_key)
+        assert len(report["nuevos"]) == 3
+        assert report["invalidos"] == []
+        
+        with open(self.docs[0], 'a') as f:
+            f.write(" modificado")
+        os.remove(self.docs[1])
+        
+        # Una instancia nueva carga la instantánea desde disco
+        report = IncrementalVerifier(self.snapshot).verify_directory(self.temp_dir, self.public_key)
+        assert report["verificados"] == [self.docs[2]]
+        assert report["modificados"] == [self.docs[0]]
+        assert report["faltantes"] == [self.docs[1]]
+        assert [r["documento"] for r in report["invalidos"]] == [self.docs[0]]
+        assert report["bytes_procesados"] == os.path.getsize(self.docs[0])
+    
+    def test_sampling_rereads_unchanged(self):
+        """Test: Con sample_rate=1 se releen también los documentos sin cambios."""
+        IncrementalVerifier(self.snapshot).verify_directory(self.temp_dir, self.public_key)
+        
+        report = IncrementalVerifier(self.snapshot, sample_rate=1.0).verify_directory(
+            self.temp_dir, self.public_key
+        )
+        assert report["muestreados"] == 3
+        assert len(report["verificados"]) == 3
+        assert report["bytes_procesados"] > 0
+    
+    def test_keys_created_per_item(self):
+        """Test: Claves creadas para cada elemento (ids reutilizados) no heredan la huella de otra."""
+        public_pem = self.public_key.public_bytes(serialization.Encoding.PEM,
+                                                  serialization.PublicFormat.SubjectPublicKeyInfo)
+        signatures = [os.path.join(self.temp_dir, f"doc{i}_signature.json")
+                      for i in range(len(self.docs))]
+        
+        def items(load_key):
+            for doc, signature in zip(self.docs, signatures):
+                yield doc, signature, load_key()
+        
+        verifier = IncrementalVerifier(self.snapshot)
+        report = verifier.verify(items(lambda: serialization.load_pem_public_key(public_pem)))
+        assert len(report["nuevos"]) == 3
+        
+        # Otra clave en cada elemento: nada se da por verificado sin comprobarlo
+        report = verifier.verify(items(lambda: self.key_manager.generate_key_pair()[1]))
+        assert report["verificados"] == []
+        assert len(report["invalidos"]) == 3
+    
+    def test_key_from_trust_store(self):
+        """Test: Sin clave, se busca en el almacén de confianza del verificador."""
+        items = [(doc, os.path.join(self.temp_dir, f"doc{i}_signature.json"), None)
+                 for i, doc in enumerate(self.docs)]
+        
+        verifier = SignatureVerifier(trust_store=TrustStore(public_keys=[self.public_key]))
+        report = IncrementalVerifier(self.snapshot, verifier=verifier).verify(items)
+        assert len(report["nuevos"]) == 3
+        assert report["invalidos"] == []
+        
+        _, other_key = self.key_manager.generate_key_pair()
+        verifier = SignatureVerifier(trust_store=TrustStore(public_keys=[other_key]))
+        report = IncrementalVerifier(self.snapshot, verifier=verifier).verify(items)
+        assert len(report["invalidos"]) == 3
+        assert "almacén de confianza" in report["invalidos"][0]["mensaje"]
+
+
+class TestAsyncSignatureService:
+    """Tests para el servicio asíncrono de firmas."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.service = AsyncSignatureService(
+            signature_manager=DigitalSignature(signatures_directory=self.temp_dir),
+            key_manager=self.key_manager, max_workers=2, max_pending=2
+        )
+        
+        self.docs = []
+        for i in range(8):
+            path = os.path.join(self.temp_dir, f"doc{i}.txt")
+            with open(path, 'w') as f:
+                f.write(f"Documento asíncrono {i}")
+            self.docs.append(path)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_concurrent_sign_and_verify(self):
+        """Test: Muchas firmas concurrentes sin superar el límite de pendientes."""
+        async def scenario():
+            async with self.service as service:
+                signatures = await service.sign_many(self.docs, self.private_key)
+                checks = await asyncio.gather(*(
+                    service.verify_signature(doc, sig, self.public_key)
+                    for doc, sig in zip(self.docs, signatures)
+                ))
+                return signatures, checks, service.metrics()
+        
+        signatures, checks, metrics = asyncio.run(scenario())
+        assert all(is_valid for is_valid, _ in checks)
+        assert metrics["completadas"] == 16
+        assert metrics["en_curso"] == 0
+    
+    def test_sign_stream(self):
+        """Test: Un flujo asíncrono se firma con el hash calculado en el bucle de eventos."""
+        content = b"Cuerpo de una subida HTTP " * 1000
+        
+        async def body():
+            for i in range(0, len(content), 4096):
+                yield content[i:i + 4096]
+        
+        async def scenario():
+            async with self.service as service:
+                return await service.sign_stream(body(), self.private_key, "subida.bin")
+        
+        signature = asyncio.run(scenario())
+        assert signature["document_name"] == "subida.bin"
+        assert signature["document_hash"] == hashlib.sha256(content).hexdigest()
+        assert SignatureVerifier().verify_stream([content], signature, self.public_key)[0]
+    
+    def test_backpressure_and_cancellation(self, monkeypatch):
+        """Test: Sin plazas, wait=False rechaza; una petición cancelada no deja la plaza ocupada."""
+        # Las dos operaciones ocupan sus plazas hasta que el test las libera
+        release = threading.Event()
+        monkeypatch.setattr(self.key_manager, "generate_key_pair",
+                            lambda *args, **kwargs: release.wait())
+        
+        async def scenario():
+            async with self.service as service:
+                try:
+                    busy = [asyncio.ensure_future(service.generate_key_pair(2048))
+                            for _ in range(2)]
+                    queued = asyncio.ensure_future(
+                        service.sign_document(self.docs[0], self.private_key)
+                    )
+                    # Esperar a que ambas estén en el pool y la tercera en cola
+                    while service.metrics()["en_curso"] < 2 or service.metrics()["en_espera"] < 1:
+                        await asyncio.sleep(0)
+                    
+                    with pytest.raises(ServiceOverloadedError):
+                        await service.sign_document(self.docs[1], self.private_key, wait=False)
+                    
+                    queued.cancel()
+                    with pytest.raises(asyncio.CancelledError):
+                        await queued
+                finally:
+                    release.set()
+                await asyncio.gather(*busy)
+                
+                signature = await service.sign_document(self.docs[2], self.private_key, wait=False)
+                return signature, service.metrics()
+        
+        signature, metrics = asyncio.run(scenario())
+        assert signature["signature_scheme"] == "ed25519"
+        assert metrics["rechazadas"] == 1
+        assert metrics["canceladas"] == 1
+        assert metrics["en_curso"] == 0
+
+
+class TestSigningDaemon:
+    """Tests para el demonio de firma y su cliente."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, self.public_key = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.socket_path = os.path.join(self.temp_dir, "firma.sock")
+        self.daemon = SigningDaemon(unix_socket=self.socket_path, max_workers=2,
+                                    allowed_root=self.temp_dir)
+        self.daemon.add_key("juan", self.private_key)
+        self.daemon.start_background()
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        self.daemon.stop_background()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_sign_and_verify(self):
+        """Test: Firmas del demonio verificables localmente y por el propio demonio."""
+        doc_path = os.path.join(self.temp_dir, "contrato.txt")
+        with open(doc_path, 'wb') as f:
+            f.write(b"Contrato firmado por el demonio")
+        
+        with SigningClient(unix_socket=self.socket_path) as client:
+            assert client.ping()
+            inline = client.sign(data=b"Contrato firmado por el demonio",
+                                 key="juan", document_name="contrato.txt")
+            by_path = client.sign(path=doc_path)
+            
+            assert client.verify(inline, path=doc_path, key="juan")["valida"]
+            assert not client.verify(inline, data=b"Contrato alterado", key="juan")["valida"]
+            with pytest.raises(DaemonError):
+                client.sign(data=b"x", key="desconocida")
+            # Solo se leen archivos dentro de allowed_root
+            with pytest.raises(DaemonError, match="fuera del directorio"):
+                client.sign(path=os.path.join(self.temp_dir, "..", "otro.txt"))
+        
+        assert os.stat(self.socket_path).st_mode & 0o777 == 0o600
+        assert inline["document_hash"] == by_path["document_hash"]
+        is_valid, _ = SignatureVerifier().verify_signature(doc_path, inline, self.public_key)
+        assert is_valid
+    
+    def test_pipelined_requests_are_batched(self):
+        """Test: Peticiones concurrentes se agrupan en lotes y conservan su orden."""
+        documents = [f"documento {i}".encode() for i in range(50)]
+        
+        with SigningClient(unix_socket=self.socket_path) as client:
+            signatures = client.request_many(
+                [{"op": "sign", "data": base64.b64encode(d).decode()} for d in documents]
+            )
+            results = client.request_many(
+                [{"op": "verify", "data": base64.b64encode(d).decode(), "signature": sig}
+                 for d, sig in zip(documents, signatures)]
+            )
+            stats = client.stats()
+            metrics = client.metrics()["metricas"]
+        
+        assert all(result["valida"] for result in results)
+        assert metrics["firma_sign_seconds"]["cuenta"] >= 50
+        assert metrics["firma_verify_seconds"]["cuenta"] >= 50
+        assert [sig["document_hash"] for sig in signatures] == \
+            [hashlib.sha256(d).hexdigest() for d in documents]
+        assert stats["lotes"] < 100
+        assert stats["errores"] == 0
+    
+    def test_certificate_signer_and_queue_limit(self):
+        """Test: Con certificado no se acepta otro firmante; con la cola llena, 'ocupado'."""
+        certificate = self.key_manager.create_certificate(self.private_key, {"name": "Juan"})
+        daemon = SigningDaemon(unix_socket=os.path.join(self.temp_dir, "limitado.sock"),
+                               max_workers=1, max_queue=1)
+        daemon.add_key("juan", self.private_key, certificate)
+        daemon.start_background()
+        try:
+            with SigningClient(unix_socket=daemon.unix_socket) as client:
+                signature = client.sign(data=b"documento")
+                assert signature["signer"]["nombre"] == "Juan"
+                with pytest.raises(DaemonError, match="certificado"):
+                    client.sign(data=b"documento", signer_info={"nombre": "Otra persona"})
+                
+                requests = [{"op": "sign", "data": base64.b64encode(b"x").decode()}] * 100
+                results = client.request_many(requests, raise_errors=False)
+            busy = [r for r in results if isinstance(r, DaemonError)]
+            assert busy and all("ocupado" in str(r) for r in busy)
+            assert len(busy) < len(results)
+        finally:
+            daemon.stop_background()
+    
+    def test_tcp_requires_token(self):
+        """Test: En TCP el demonio exige token; sin allowed_root no acepta rutas."""
+        with pytest.raises(ValueError):
+            SigningDaemon(port=0)
+        
+        daemon = SigningDaemon(port=0, max_workers=1, token="secreto")
+        daemon.add_key("juan", self.private_key)
+        daemon.start_background()
+        try:
+            with SigningClient(port=daemon.port) as client:
+                with pytest.raises(DaemonError, match="Token"):
+                    client.ping()
+            with SigningClient(port=daemon.port, token="secreto") as client:
+                assert client.ping()
+                with pytest.raises(DaemonError, match="desactivadas"):
+                    client.sign(path=__file__)
+        finally:
+            daemon.stop_background()
+
+
+class TestCommandLine:
+    """Tests para los subcomandos no interactivos."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.keys_dir = os.path.join(self.temp_dir, "keys")
+        self.sig_dir = os.path.join(self.temp_dir, "signatures")
+        for i in range(3):
+            with open(os.path.join(self.temp_dir, f"doc{i}.txt"), 'w') as f:
+                f.write(f"Documento por línea de comandos {i}")
+        self.pattern = os.path.join(self.temp_dir, "doc*.txt")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def run_json(self, capsys, *argv):
+        """Ejecuta un subcomando con --format json y devuelve (código, resultado)."""
+        code = cli.main(list(argv) + ["--format", "json"])
+        return code, json.loads(capsys.readouterr().out)
+    
+    def test_keygen_sign_verify_inspect(self, capsys):
+        """Test: Flujo completo sin input(), con salida JSON y códigos de salida."""
+        code, keys = self.run_json(capsys, "keygen", "juan", "--keys-dir", self.keys_dir,
+                                   "--scheme", "ed25519")
+        assert code == cli.EXIT_OK
+        
+        code, signed = self.run_json(capsys, "sign", self.pattern, "--key", keys["clave_privada"],
+                                     "--cert", keys["certificado"], "--signatures", self.sig_dir,
+                                     "--jobs", "2")
+        assert code == cli.EXIT_OK
+        assert signed["firmados"] == 3
+        
+        code, verified = self.run_json(capsys, "verify", self.pattern, "--public-key",
+                                       keys["clave_publica"], "--signatures", self.sig_dir)
+        assert code == cli.EXIT_OK
+        assert verified["validas"] == 3
+        
+        code, verified = self.run_json(capsys, "verify", self.pattern, "--trust-store",
+                                       self.keys_dir, "--signatures", self.sig_dir)
+        assert code == cli.EXIT_OK
+        assert verified["validas"] == 3
+        
+        code, inspected = self.run_json(capsys, "inspect", os.path.join(self.sig_dir, "*.json"))
+        assert code == cli.EXIT_OK
+        assert {item["esquema"] for item in inspected["resultados"]} == {"ed25519"}
+        assert inspected["resultados"][0]["firmante"]["nombre"] == "juan"
+        
+        with open(os.path.join(self.temp_dir, "doc1.txt"), 'a') as f:
+            f.write(" alterado")
+        code, verified = self.run_json(capsys, "verify", self.pattern, "--public-key",
+                                       keys["clave_publica"], "--signatures", self.sig_dir)
+        assert code == cli.EXIT_FAILED
+        assert [r["valida"] for r in verified["resultados"]] == [True, False, True]
+        
+        # Un glob recursivo con nombres repetidos no firma ni verifica contra otra firma
+        os.makedirs(os.path.join(self.temp_dir, "copia"))
+        shutil.copy(os.path.join(self.temp_dir, "doc0.txt"), os.path.join(self.temp_dir, "copia"))
+        recursive = os.path.join(self.temp_dir, "**", "doc0.txt")
+        assert cli.main(["sign", recursive, "--key", keys["clave_privada"],
+                         "--signatures", self.sig_dir]) == cli.EXIT_ERROR
+        assert cli.main(["verify", recursive, "--public-key", keys["clave_publica"],
+                         "--signatures", self.sig_dir]) == cli.EXIT_ERROR
+        assert "mismo archivo de firma" in capsys.readouterr().err
+    
+    def test_sign_and_verify_with_log_storage(self, capsys):
+        """Test: Lo firmado con --storage log se verifica con verify --storage log."""
+        code, keys = self.run_json(capsys, "keygen", "ana", "--keys-dir", self.keys_dir,
+                                   "--scheme", "ed25519")
+        code, signed = self.run_json(capsys, "sign", self.pattern, "--key", keys["clave_privada"],
+                                     "--signatures", self.sig_dir, "--storage", "log")
+        assert code == cli.EXIT_OK and signed["firmados"] == 3
+        
+        code, verified = self.run_json(capsys, "verify", self.pattern, "--trust-store",
+                                       self.keys_dir, "--signatures", self.sig_dir,
+                                       "--storage", "log")
+        assert code == cli.EXIT_OK
+        assert verified["validas"] == 3
+        
+        doc0 = os.path.join(self.temp_dir, "doc0.txt")
+        code, verified = self.run_json(capsys, "verify", doc0, "--public-key",
+                                       keys["clave_publica"], "--signatures", self.sig_dir,
+                                       "--storage", "log", "--signature", "doc1_signature")
+        assert code == cli.EXIT_FAILED
+        
+        # Un documento sin firma en el registro falla sin detener el lote
+        with open(os.path.join(self.temp_dir, "doc3.txt"), 'w') as f:
+            f.write("Documento sin firmar")
+        code, verified = self.run_json(capsys, "verify", self.pattern, "--trust-store",
+                                       self.keys_dir, "--signatures", self.sig_dir,
+                                       "--storage", "log")
+        assert code == cli.EXIT_FAILED
+        assert [r["valida"] for r in verified["resultados"]] == [True, True, True, False]
+        
+        assert cli.main(["verify", self.pattern, "--trust-store", self.keys_dir,
+                         "--signatures", os.path.join(self.temp_dir, "nada"),
+                         "--storage", "log"]) == cli.EXIT_ERROR
+    
+    def test_cold_start_defers_cryptography(self):
+        """Test: El CLI y los módulos de metadatos no importan cryptography al arrancar."""
+        src_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+        code = ("import sys, cli, signature_log, verification\n"
+                "print('cryptography' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], cwd=src_dir,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
+    
+    def test_exit_codes_for_bad_input(self, capsys):
+        """Test: Argumentos incorrectos y archivos inexistentes tienen códigos propios."""
+        assert cli.main(["sign"]) == cli.EXIT_USAGE
+        assert cli.main(["inspect", os.path.join(self.temp_dir, "nada*.json")]) == cli.EXIT_ERROR
+        assert cli.main(["sign", self.pattern, "--key", "no_existe.pem"]) == cli.EXIT_ERROR
+
+
+class TestCertificateChain:
+    """Tests para la validación de cadenas de certificados."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test: raíz → intermedia → firmantes."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        
+        self.root_key, _ = self.key_manager.generate_key_pair(scheme="ecdsa-p256")
+        self.root = self.key_manager.create_certificate(self.root_key, {"name": "Raíz"}, ca=True)
+        self.inter_key, inter_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.intermediate = self.key_manager.issue_certificate(
+            self.root_key, self.root, inter_public, {"name": "Intermedia"}, ca=True
+        )
+        self.leaves = []
+        for i in range(3):
+            _, public_key = self.key_manager.generate_key_pair(scheme="ed25519")
+            self.leaves.append(self.key_manager.issue_certificate(
+                self.inter_key, self.intermediate, public_key, {"name": f"Firmante {i}"}
+            ))
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_chain_is_cached_by_issuer(self):
+        """Test: La ruta del emisor se construye una vez y se reutiliza."""
+        validator = CertificateChainValidator([self.root], [self.intermediate])
+        
+        for leaf in self.leaves:
+            is_valid, message = validator.validate(leaf)
+            assert is_valid, message
+        
+        # La intermedia solo se valida contra la raíz la primera vez
+        stats = validator.stats()
+        assert stats["aciertos"] == 2
+        assert stats["entradas"] == 4
+        
+        verifier = SignatureVerifier(chain_validator=validator)
+        assert verifier.verify_certificate(self.leaves[0])[0]
+    
+    def test_untrusted_and_invalid_chains(self):
+        """Test: Raíz desconocida, intermedia ausente, emisor no CA y certificado caducado."""
+        other_key, _ = self.key_manager.generate_key_pair(scheme="ed25519")
+        other_root = self.key_manager.create_certificate(other_key, {"name": "Otra"}, ca=True)
+        
+        assert not CertificateChainValidator([other_root], [self.intermediate]).validate(self.leaves[0])[0]
+        assert not CertificateChainValidator([self.root]).validate(self.leaves[0])[0]
+        # Las intermedias que llegan con la firma también sirven
+        assert CertificateChainValidator([self.root]).validate(self.leaves[0], [self.intermediate])[0]
+        
+        # Un certificado final no puede emitir otros
+        _, public_key = self.key_manager.generate_key_pair(scheme="ed25519")
+        leaf_key, leaf_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        leaf = self.key_manager.issue_certificate(self.inter_key, self.intermediate,
+                                                  leaf_public, {"name": "Final"})
+        forged = self.key_manager.issue_certificate(leaf_key, leaf, public_key, {"name": "Falso"})
+        is_valid, message = CertificateChainValidator([self.root], [self.intermediate, leaf]) \
+            .validate(forged)
+        assert not is_valid and "autoridad certificadora" in message
+        
+        validator = CertificateChainValidator([self.root], [self.intermediate])
+        future = datetime.now(timezone.utc) + timedelta(days=400)
+        is_valid, message = validator.validate(self.leaves[0], at=future)
+        assert not is_valid and "expirado" in message
+
+
+class TestRevocation:
+    """Tests para el índice de certificados revocados."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.crl_path = os.path.join(self.temp_dir, "ca.crl")
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.ca_key, _ = self.key_manager.generate_key_pair(scheme="ecdsa-p256")
+        self.ca = self.key_manager.create_certificate(self.ca_key, {"name": "CA"}, ca=True)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def write_crl(self, serials, signing_key=None):
+        """Escribe una CRL de la CA con los números de serie indicados."""
+        now = datetime.now(timezone.utc)
+        builder = (x509.CertificateRevocationListBuilder()
+                   .issuer_name(self.ca.subject)
+                   .last_update(now)
+                   .next_update(now + timedelta(days=7)))
+        for serial in serials:
+            builder = builder.add_revoked_certificate(
+                x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(now).build()
+            )
+        crl = builder.sign(signing_key or self.ca_key, hashes.SHA256())
+        with open(self.crl_path, 'wb') as f:
+            f.write(crl.public_bytes(serialization.Encoding.PEM))
+    
+    def test_sorted_serials(self):
+        """Test: Búsqueda binaria sobre el bloque de series (incluidas series de 20 bytes)."""
+        serials = SortedSerials(list(range(0, 200_000, 2)) + [2 ** 159 + 1])
+        assert len(serials) == 100_001
+        assert 199_998 in serials and 2 ** 159 + 1 in serials
+        assert 3 not in serials and 2 ** 170 not in serials and -2 not in serials
+    
+    def test_revoked_signer_is_rejected_and_crl_reloaded(self):
+        """Test: La firma de un certificado revocado se rechaza; la CRL se relee al cambiar."""
+        signer_key, signer_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        certificate = self.key_manager.issue_certificate(self.ca_key, self.ca, signer_public,
+                                                         {"name": "Firmante"})
+        doc_path = os.path.join(self.temp_dir, "doc.txt")
+        with open(doc_path, 'w') as f:
+            f.write("Documento con firmante revocable")
+        signature = DigitalSignature(signatures_directory=self.temp_dir) \
+            .sign_document(doc_path, signer_key, certificate)
+        
+        self.write_crl([12345])
+        index = RevocationIndex(self.temp_dir, issuers=[self.ca], check_interval=0)
+        verifier = SignatureVerifier(revocation_index=index)
+        assert verifier.verify_signature(doc_path, signature, signer_public,
+                                         certificate=certificate)[0]
+        assert verifier.verify_certificate(certificate)[0]
+        
+        self.write_crl([12345, certificate.serial_number])
+        os.utime(self.crl_path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        is_valid, message = verifier.verify_signature(doc_path, signature, signer_public,
+                                                      certificate=certificate)
+        assert not is_valid and "revocado" in message
+        assert not verifier.verify_certificate(certificate)[0]
+        
+        # Sin certificado indicado se usa el que el trust_store asocia a la clave
+        store_verifier = SignatureVerifier(revocation_index=index,
+                                           trust_store=TrustStore([certificate]))
+        assert not store_verifier.verify_signature(doc_path, signature)[0]
+        assert not store_verifier.verify_signature(doc_path, signature, signer_public)[0]
+        
+        # La serie de los metadatos no está firmada: cambiarla no evita el rechazo
+        # ni revoca la firma de otro firmante
+        forged = dict(signature, signer=dict(signature["signer"], certificado_serie="12345"))
+        assert not store_verifier.verify_signature(doc_path, forged, signer_public)[0]
+        other_signer, other_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        other = DigitalSignature(signatures_directory=self.temp_dir).sign_document(doc_path, other_signer)
+        other["signer"] = {"certificado_serie": str(certificate.serial_number)}
+        assert store_verifier.verify_signature(doc_path, other, other_public)[0]
+        assert index.stats()["revocados"] == 2
+        
+        # Una CRL que no firmó la CA configurada se rechaza y se conserva la anterior
+        other_key, _ = self.key_manager.generate_key_pair(scheme="ecdsa-p256")
+        self.write_crl([], signing_key=other_key)
+        os.utime(self.crl_path, ns=(time.time_ns() + 2 * 10**9, time.time_ns() + 2 * 10**9))
+        assert index.is_revoked(certificate)
+        assert self.crl_path in index.stats()["errores"]
+    
+    def test_corrupt_crl_keeps_last_good_version(self):
+        """Test: Una CRL sobrescrita con basura no desrevoca los certificados ya indexados."""
+        self.write_crl([777])
+        index = RevocationIndex(self.crl_path, issuers=[self.ca], check_interval=3600)
+        assert index.is_serial_revoked(777, self.ca.subject)
+        
+        with open(self.crl_path, 'wb') as f:
+            f.write(b"-----BEGIN X509 CRL-----\nbasura\n")
+        index.refresh()
+        assert index.is_serial_revoked(777, self.ca.subject)
+        assert self.crl_path in index.stats()["errores"]
+        
+        # Al corregirse el archivo se carga la versión nueva
+        self.write_crl([888])
+        index.refresh(force=True)
+        assert not index.is_serial_revoked(777) and index.is_serial_revoked(888)
+        assert index.stats()["errores"] == {}
+
+
+class TestTrustStore:
+    """Tests para el almacén de confianza y la resolución de la clave del firmante."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test: dos firmantes con sus claves en keys/."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.keys_dir = os.path.join(self.temp_dir, "keys")
+        self.key_manager = KeyManager(keys_directory=self.keys_dir)
+        self.signature_manager = DigitalSignature(signatures_directory=self.temp_dir)
+        
+        self.ana_key, ana_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.ana_cert = self.key_manager.create_certificate(self.ana_key, {"name": "Ana"})
+        self.key_manager.save_certificate(self.ana_cert, "ana")
+        self.key_manager.save_private_key(self.ana_key, "ana")
+        self.luis_key, luis_public = self.key_manager.generate_key_pair(scheme="ecdsa-p256")
+        self.key_manager.save_public_key(luis_public, "luis")
+        
+        self.documents = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"doc{i}.txt")
+            with open(path, 'w') as f:
+                f.write(f"Documento de varios firmantes {i}")
+            self.documents.append(path)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_verify_many_resolves_signer_keys(self):
+        """Test: Un lote de varios firmantes se verifica sin indicar ninguna clave."""
+        signatures = [
+            self.signature_manager.sign_document(self.documents[0], self.ana_key, self.ana_cert),
+            self.signature_manager.sign_document(self.documents[1], self.luis_key),
+            # v1: sin huella, la clave se encuentra por el número de serie del certificado
+            self.signature_manager.sign_document(self.documents[2], self.ana_key, self.ana_cert,
+                                                 format_version=1)
+        ]
+        assert signatures[1]["key_fingerprint"] == key_fingerprint(self.luis_key.public_key())
+        assert "key_fingerprint" not in signatures[2]
+        
+        store = TrustStore.from_directory(self.keys_dir)
+        assert store.stats()["claves"] == 2 and store.stats()["certificados"] == 1
+        verifier = SignatureVerifier(trust_store=store)
+        summary = verifier.verify_many(zip(self.documents, signatures))
+        assert summary["validas"] == 3
+        
+        results = verifier.full_verification(self.documents[0], signatures[0])
+        assert results["valida"] and "certificado" in results["verificaciones"]
+        
+        # Un firmante que no está en el almacén no se acepta
+        stranger_key, _ = self.key_manager.generate_key_pair(scheme="ed25519")
+        unknown = self.signature_manager.sign_document(self.documents[3], stranger_key)
+        is_valid, message = verifier.verify_signature(self.documents[3], unknown)
+        assert not is_valid and "almacén de confianza" in message
+        # Sin almacén sigue siendo necesario indicar la clave
+        assert not SignatureVerifier().verify_signature(self.documents[0], signatures[0])[0]
+        
+        # Campos del firmante con tipos inesperados: FALLO, no una excepción
+        for field, value in (("key_fingerprint", 12345), ("signer", "Ana")):
+            forged = dict(signatures[2], **{field: value})
+            is_valid, message = verifier.verify_signature(self.documents[2], forged)
+            assert not is_valid and message.startswith("FALLO")
+    
+    def test_key_fingerprint_is_cached(self):
+        """Test: La huella de un mismo objeto clave se calcula una sola vez."""
+        fingerprint = key_fingerprint(self.ana_key)
+        assert key_fingerprint(self.ana_key) is fingerprint
+        assert key_fingerprint(self.ana_key.public_key()) == fingerprint
+    
+    def test_directory_reload_reads_only_new_files(self):
+        """Test: Volver a cargar el directorio solo lee los archivos nuevos."""
+        store = TrustStore.from_directory(self.keys_dir)
+        assert store.add_path(self.keys_dir) == 0
+        
+        _, new_public = self.key_manager.generate_key_pair(scheme="ed25519")
+        self.key_manager.save_public_key(new_public, "nueva")
+        assert store.add_path(self.keys_dir) == 1
+        assert key_fingerprint(new_public) in store
+        assert store.find_by_serial(self.ana_cert.serial_number).certificate == self.ana_cert
+        assert store.stats()["errores"] == {}
+
+
+class TestHashing:
+    """Tests para los backends de cálculo de hash."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.temp_dir, "datos.bin")
+        self.content = os.urandom(3 * 1024 * 1024 + 123)
+        with open(self.test_file, 'wb') as f:
+            f.write(self.content)
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_backends_match(self):
+        """Test: Todos los backends producen el mismo hash."""
+        import hashlib
+        expected = hashlib.sha256(self.content).hexdigest()
+        
+        for backend in ["auto", "mmap", "readinto", "read"]:
+            assert hash_file(self.test_file, backend=backend) == expected
+    
+    def test_empty_file(self):
+        """Test: Un archivo vacío no rompe el backend mmap."""
+        empty = os.path.join(self.temp_dir, "vacio.bin")
+        open(empty, 'wb').close()
+        
+        assert hash_file(empty, backend="mmap") == hash_file(empty, backend="read")
+    
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="Requiere tuberías con nombre")
+    def test_pipe_fallback(self):
+        """Test: Una tubería se hashea aunque no se pueda usar mmap."""
+        import hashlib
+        import threading
+        fifo = os.path.join(self.temp_dir, "tuberia")
+        os.mkfifo(fifo)
+        
+        def writer():
+            with open(fifo, 'wb') as f:
+                f.write(self.content)
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        digest = hash_file(fifo, backend="mmap")
+        thread.join()
+        
+        assert digest == hashlib.sha256(self.content).hexdigest()
+    
+    def test_chunk_size_grows_with_file(self):
+        """Test: El tamaño de bloque crece con el tamaño del archivo."""
+        assert choose_chunk_size(1000) <= choose_chunk_size(10 * 1024 * 1024)
+        assert choose_chunk_size(10 * 1024 * 1024) <= choose_chunk_size(10 * 1024 ** 3)
+
+
+class TestHashCache:
+    """Tests para la caché persistente de hashes."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, "cache.json")
+        self.cache = HashCache(cache_path=self.cache_path)
+        self.signature_manager = DigitalSignature(signatures_directory=self.temp_dir,
+                                                  hash_cache=self.cache)
+        self.verifier = SignatureVerifier(hash_cache=self.cache)
+        
+        self.test_doc = os.path.join(self.temp_dir, "test.txt")
+        self._write(self.test_doc, "Contenido para la caché de hashes.")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        shutil.rmtree(self.temp_dir)
+    
+    def _write(self, path, content):
+        """Escribe un archivo con una fecha de modificación antigua."""
+        with open(path, 'w') as f:
+            f.write(content)
+        old = os.stat(path).st_mtime - 60
+        os.utime(path, (old, old))
+    
+    def test_hit_shared_between_signer_and_verifier(self):
+        """Test: Un hash calculado al firmar se reutiliza al verificar."""
+        first = self.signature_manager.calculate_hash(self.test_doc)
+        second = self.verifier.calculate_hash(self.test_doc)
+        
+        assert first == second
+        stats = self.cache.stats()
+        assert stats["fallos"] == 1
+        assert stats["aciertos"] == 1
+        assert stats["bytes_ahorrados"] == os.path.getsize(self.test_doc)
+    
+    def test_modified_file_is_rehashed(self):
+        """Test: Un archivo modificado no devuelve el hash antiguo."""
+        first = self.verifier.calculate_hash(self.test_doc)
+        self._write(self.test_doc, "Contenido distinto y más largo que el original.")
+        second = self.verifier.calculate_hash(self.test_doc)
+        
+        assert first != second
+        assert self.cache.stats()["aciertos"] == 0
+    
+    def test_persistence_and_eviction(self):
+        """Test: La caché persiste en disco y respeta su tamaño máximo."""
+        small_cache = HashCache(cache_path=self.cache_path, max_entries=2)
+        verifier = SignatureVerifier(hash_cache=small_cache)
+        for i in range(3):
+            path = os.path.join(self.temp_dir, f"doc_{i}.txt")
+            self._write(path, f"Documento {i}")
+            verifier.calculate_hash(path)
+        small_cache.save()
+        
+        reloaded = HashCache(cache_path=self.cache_path, max_entries=2)
+        assert len(reloaded) == 2
+        _, digest = reloaded.lookup(os.path.join(self.temp_dir, "doc_2.txt"))
+        assert digest is not None
+        _, digest = reloaded.lookup(os.path.join(self.temp_dir, "doc_0.txt"))
+        assert digest is None
+    
+    def test_concurrent_saves(self):
+        """Test: Guardados concurrentes dejan un archivo válido y ningún temporal."""
+        paths = []
+        for i in range(8):
+            path = os.path.join(self.temp_dir, f"doc_{i}.txt")
+            self._write(path, f"Documento {i}")
+            paths.append(path)
+        
+        errors = []
+        
+        def worker(path):
+            try:
+                for _ in range(20):
+                    self.verifier.calculate_hash(path)
+                    with self.cache._lock:
+                        self.cache._pending_writes += 1
+                    self.cache.save()
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker, args=(path,)) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert len(HashCache(cache_path=self.cache_path)) == len(self.cache)
+        assert not [name for name in os.listdir(self.temp_dir) if name.endswith(".tmp")]
+    
+    def test_close_saves_and_bad_entries_are_skipped(self):
+        """Test: close() guarda la caché y al cargarla se descartan las entradas defectuosas."""
+        import hash_cache
+        with HashCache(cache_path=self.cache_path) as cache:
+            SignatureVerifier(hash_cache=cache).calculate_hash(self.test_doc)
+            assert cache in hash_cache._open_caches
+        assert cache not in hash_cache._open_caches
+        
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data["entries"] = [["clave", 1], "ab", None, ["a", "b", "c"]] + data["entries"]
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        
+        reloaded = HashCache(cache_path=self.cache_path)
+        assert len(reloaded) == 1
+        _, digest = reloaded.lookup(self.test_doc)
+        assert digest is not None
+
+
+class TestSignatureCatalog:
+    """Tests para el catálogo indexado de firmas."""
+    
+    def setup_method(self):
+        """Configuración antes de cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sig_dir = os.path.join(self.temp_dir, "signatures")
+        self.catalog = SignatureCatalog(os.path.join(self.temp_dir, "catalog.db"))
+        self.signature_manager = DigitalSignature(signatures_directory=self.sig_dir,
+                                                  catalog=self.catalog)
+        self.key_manager = KeyManager(keys_directory=self.temp_dir)
+        self.private_key, _ = self.key_manager.generate_key_pair()
+        self.certificate = self.key_manager.create_certificate(
+            self.private_key, {"name": "Alice", "organization": "ESPOL"}
+        )
+        
+        self.test_doc = os.path.join(self.temp_dir, "contrato.txt")
+        with open(self.test_doc, 'w') as f:
+            f.write("Contrato indexado en el catálogo.")
+    
+    def teardown_method(self):
+        """Limpieza después de cada test."""
+        self.catalog.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_save_signature_updates_catalog(self):
+        """Test: Guardar una firma la registra en el catálogo."""
+        signature_data = self.signature_manager.sign_document(
+            self.test_doc, self.private_key, self.certificate
+        )
+        path = self.signature_manager.save_signature(signature_data, "contrato")
+        
+        by_hash = self.catalog.find_by_hash(signature_data["document_hash"])
+        assert [row["path"] for row in by_hash] == [os.path.abspath(path)]
+        assert len(self.catalog.find_by_signer("Alice")) == 1
+        assert len(self.catalog.find_by_serial(self.certificate.serial_number)) == 1
+        assert len(self.catalog.find_by_document("contrato.txt")) == 1
+    
+    def test_rebuild(self):
+        """Test: Reconstruir el catálogo desde un directorio existente."""
+        unindexed = DigitalSignature(signatures_directory=self.sig_dir)
+        unindexed.sign_and_save(self.test_doc, self.private_key, output_name="a")
+        unindexed.sign_and_save(self.test_doc, self.private_key, output_name="b")
+        with open(os.path.join(self.sig_dir, "corrupta.json"), 'w') as f:
+            f.write("{no es json")
+        
+        assert self.catalog.count() == 0
+        result = self.catalog.rebuild(self.sig_dir)
+        
+        assert result == {"indexadas": 2, "errores": 1}
+        assert self.catalog.count() == 2
+        
+        # Las firmas del registro (subdirectorio log/) sobreviven a la reconstrucción
+        DigitalSignature(signatures_directory=self.sig_dir, catalog=self.catalog,
+                         storage_format="log").sign_and_save(self.test_doc, self.private_key)
+        os.remove(os.path.join(self.sig_dir, "a.json"))
+        assert self.catalog.rebuild(self.sig_dir)["indexadas"] == 1
+        assert self.catalog.count() == 2
+        assert len(self.catalog.find_by_document("contrato.txt")) == 2
+    
+    def test_export_summary_from_catalog(self):
+        """Test: El resumen usa el catálogo sin abrir los archivos."""
+        import json
+        from utils import export_signature_summary
+        
+        path = self.signature_manager.sign_and_save(
+            self.test_doc, self.private_key, self.certificate, "contrato"
+        )
+        os.remove(path)  # Solo el catálogo conoce esta firma
+        
+        output = os.path.join(self.temp_dir, "resumen.json")
+        export_signature_summary([path], output, catalog=self.catalog)
+        
+        with open(output, encoding='utf-8') as f:
+            summary = json.load(f)
+        assert summary["firmas"][0]["firmante"] == "Alice"
+
+
 class TestIntegration:
     """Tests de integración del sistema completo."""
     